@@ -1,18 +1,43 @@
 """REST API for the duplicate finder application."""
 
-import io
 import logging
 import argparse
 import os
+import shutil
 import sys
-from typing import Dict, Any, List
+import tempfile
+import time
+import zlib
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Optional, Sequence, BinaryIO, AsyncIterator, Callable
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, status, APIRouter
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, File, UploadFile, HTTPException, status, APIRouter, Response, Header, Body, Query
+from fastapi.responses import HTMLResponse, StreamingResponse, JSONResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
-from model import read_csv_from_string, find_duplicates, get_stats, _create_comparison_key
+from parallel import analyze_csv_parallel
+from readers import iter_rows_stream, detect_format, decompressed
+from batch import analyze_files, SOURCE_FIELD
+from external import analyze_external, parse_size
+from sketch import approximate_duplicates, DEFAULT_TOP, DEFAULT_WIDTH, DEFAULT_DEPTH, DEFAULT_PRECISION
+from window import analyze_window, parse_duration
+from metrics import duplicate_metrics
+from instrumentation import (RunProfile, get_metrics_registry, get_request_profiler, configure_request_profiler,
+                             profiled, server_timing, PROMETHEUS_MEDIA_TYPE)
+from pool import (get_analysis_pool, configure_analysis_pool, PoolSaturatedError, POOL_KINDS,
+                  DEFAULT_POOL_WORKERS, DEFAULT_MAX_PENDING)
+from jobs import (Job, get_job_manager, configure_job_manager, track_progress, DEFAULT_JOB_WORKERS,
+                  DEFAULT_MAX_QUEUED, DEFAULT_RESULT_TTL, DEFAULT_MAX_RESULTS)
+from result_cache import (get_result_cache, configure_result_cache, hash_stream, result_key,
+                          DEFAULT_MEMORY_ENTRIES)
+from result_format import (accepts_ndjson, iter_ndjson, paginate, parse_fields, shape_result,
+                           NDJSON_MEDIA_TYPE)
+from signature_index import (SignatureIndex, get_signature_index, configure_signature_index, open_index,
+                             parse_signature, indexed_result)
+from model import (DuplicateFinder, REPORT_FIELDS, configure_url_cache, url_cache_stats,
+                   DEFAULT_URL_CACHE_SIZE)
 
 # Configure logging
 logging.basicConfig(
@@ -24,9 +49,91 @@ logger = logging.getLogger(__name__)
 # API Version
 API_VERSION = "v1"
 
+# Upper bound for worker processes requested by a single upload
+MAX_WORKERS = os.cpu_count() or 1
+
+# Upper bound for a request body sent with Content-Encoding: gzip once decompressed
+MAX_DECOMPRESSED_SIZE = 4 * 1024 ** 3
+
+# Largest piece of a gzip request body decompressed at once
+DECOMPRESSED_CHUNK_SIZE = 1024 * 1024
+
 # Create API router with version prefix
 api_router = APIRouter(prefix=f"/{API_VERSION}/api")
 
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    """Stop analysis and job workers when the server shuts down."""
+    yield
+    get_analysis_pool().shutdown(wait=False)
+    get_job_manager().shutdown(wait=False)
+
+
+class GzipRequestMiddleware:
+    """
+    Decompress request bodies sent with Content-Encoding: gzip.
+    
+    The body is decompressed chunk by chunk as the application receives it,
+    at most DECOMPRESSED_CHUNK_SIZE bytes at a time, so compressed uploads
+    are never held in memory as a whole. Bodies larger than max_size once
+    decompressed are rejected with 413, other encodings with 415.
+    """
+
+    def __init__(self, app: Callable, max_size: int = MAX_DECOMPRESSED_SIZE) -> None:
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        encoding = None
+        if scope["type"] == "http":
+            encoding = dict(scope["headers"]).get(b"content-encoding", b"").strip().lower()
+        if not encoding or encoding == b"identity":
+            await self.app(scope, receive, send)
+            return
+        if encoding != b"gzip":
+            response = JSONResponse({"detail": "Only gzip request bodies are supported"},
+                                    status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+            await response(scope, receive, send)
+            return
+        
+        # Length of the decompressed body is not known in advance
+        headers = [(name, value) for name, value in scope["headers"]
+                   if name not in (b"content-encoding", b"content-length")]
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        state = {"more_body": True, "size": 0}
+        
+        async def receive_decompressed() -> Dict[str, Any]:
+            # Input left over from the previous chunk is decompressed before more is received
+            data = decompressor.unconsumed_tail
+            if not data:
+                if not state["more_body"]:
+                    return await receive()
+                message = await receive()
+                if message["type"] != "http.request":
+                    return message
+                data = message.get("body", b"")
+                state["more_body"] = message.get("more_body", False)
+            try:
+                body = decompressor.decompress(data, DECOMPRESSED_CHUNK_SIZE)
+                more_body = state["more_body"] or bool(decompressor.unconsumed_tail)
+                if not more_body:
+                    body += decompressor.flush()
+                    if not decompressor.eof:
+                        raise zlib.error("body is truncated")
+            except zlib.error as e:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                    detail=f"Invalid gzip request body: {str(e)}")
+            state["size"] += len(body)
+            if state["size"] > self.max_size:
+                raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                    detail=f"Request body exceeds {self.max_size} bytes once decompressed")
+            return {"type": "http.request", "body": body, "more_body": more_body}
+        
+        await self.app(dict(scope, headers=headers), receive_decompressed, send)
+
+
 # Create FastAPI app instance
 app = FastAPI(
     title="Duplicate Log Finder API",
@@ -34,7 +141,8 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    lifespan=lifespan
 )
 
 # Add CORS middleware for remote access
@@ -45,6 +153,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(GzipRequestMiddleware)
 
 
 @api_router.get("/health", tags=["Health"])
@@ -58,66 +167,351 @@ async def health_check() -> Dict[str, str]:
     return {"status": "healthy"}
 
 
+@api_router.get("/cache/url", tags=["Health"])
+async def url_cache_endpoint() -> Dict[str, Any]:
+    """
+    Get URL normalization cache counters of this worker.
+    
+    Returns:
+        Dict[str, Any]: Size, capacity, hits, misses, evictions and hit rate
+    """
+    return url_cache_stats()
+
+
+@api_router.get("/cache/results", tags=["Health"])
+async def result_cache_endpoint() -> Dict[str, Any]:
+    """
+    Get result cache counters of this worker.
+    
+    Returns:
+        Dict[str, Any]: Hits, misses, hit rate and counters of memory and disk tiers
+    """
+    return get_result_cache().stats()
+
+
+@api_router.get("/pool", tags=["Health"])
+async def analysis_pool_endpoint() -> Dict[str, Any]:
+    """
+    Get analysis pool counters of this worker.
+    
+    Returns:
+        Dict[str, Any]: Kind, workers, max pending, tasks in flight,
+        completed and rejected tasks
+    """
+    return get_analysis_pool().stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse, tags=["Health"])
+async def metrics_endpoint() -> PlainTextResponse:
+    """
+    Get analysis metrics of this worker in the Prometheus text format.
+    
+    Histograms of request and per-stage durations and of peak memory, and
+    counters of rows and bytes analyzed.
+    
+    Returns:
+        PlainTextResponse: Metrics text
+    """
+    return PlainTextResponse(get_metrics_registry().expose(), media_type=PROMETHEUS_MEDIA_TYPE)
+
+
+@api_router.get("/index", tags=["Index"])
+async def signature_index_endpoint() -> Dict[str, Any]:
+    """
+    Get signature index size.
+    
+    Returns:
+        Dict[str, Any]: Path, number of signatures and total requests counted
+        
+    Raises:
+        HTTPException: When the index is not configured
+    """
+    index = open_index(_index_path(True))
+    return await run_in_threadpool(index.stats)
+
+
+@api_router.post("/index/lookup",
+          tags=["Index"],
+          summary="Get history of requests",
+          description="Looks up counts and first and last seen times of many result keys at once.")
+async def signature_lookup_endpoint(keys: List[str] = Body(..., embed=True),
+                                    template: bool = False) -> Dict[str, Any]:
+    """
+    Get history of result keys from earlier uploads.
+    
+    Args:
+        keys (List[str]): Comparison keys, or hex keys of 'hash' mode results
+            with the default digest size
+        template (bool): Look up keys of template mode results, which are
+            counted apart from exact ones
+        
+    Returns:
+        Dict[str, Any]: Count and first and last seen times of every key found
+        
+    Raises:
+        HTTPException: When the index is not configured
+    """
+    index = open_index(_index_path(True))
+    signatures = {parse_signature(key, template): key for key in keys}
+    found = await run_in_threadpool(index.lookup, signatures)
+    return {
+        "found": len(found),
+        "history": {key: found[sig] for sig, key in signatures.items() if sig in found}
+    }
+
+
 @api_router.post("/find-duplicates", 
           tags=["Processing"],
-          summary="Find duplicates in CSV file",
-          description="Uploads a CSV file and finds duplicate records based on URL, method, response code, and status.")
-async def find_duplicates_endpoint(file: UploadFile = File(...)) -> Dict[str, Any]:
+          summary="Find duplicates in capture file",
+          description="Uploads a CSV, JSON Lines, HAR or Charles JSON session capture and finds duplicate "
+                      "records based on URL, method, response code, and status.")
+async def find_duplicates_endpoint(response: Response, file: UploadFile = File(...), full_rows: bool = False,
+                                   key_mode: str = 'string', digest_size: int = 16,
+                                   verify_collisions: bool = False, workers: Optional[int] = None,
+                                   memory_limit: Optional[str] = None, approximate: bool = False,
+                                   top: int = DEFAULT_TOP, sketch_width: int = DEFAULT_WIDTH,
+                                   sketch_depth: int = DEFAULT_DEPTH, hll_precision: int = DEFAULT_PRECISION,
+                                   sketch_capacity: Optional[int] = None, compact: bool = False,
+                                   fields: Optional[str] = None, limit: Optional[int] = None,
+                                   cursor: Optional[str] = None, index: bool = False,
+                                   window: Optional[str] = None, template: bool = False,
+                                   template_pattern: Optional[List[str]] = Query(None),
+                                   metrics: bool = False, profile: bool = False,
+                                   accept: Optional[str] = Header(None)) -> Any:
     """
-    Find duplicates in uploaded CSV file.
+    Find duplicates in uploaded capture file.
+    
+    CSV, JSON Lines, HAR and Charles JSON session captures are told apart
+    by their content.
+    
+    Results are cached by content and options; the X-Cache response header
+    tells whether the result came from the cache. Requests recorded in the
+    signature index and profiled requests bypass the cache. An upload is
+    recorded in the index by the request without a cursor; later pages are
+    served from its cached result, or on a miss only look up history, so
+    paging does not count the requests again. With Accept:
+    application/x-ndjson results are streamed one group per line, and with
+    limit or cursor one page of groups is returned.
     
     Args:
+        response (Response): Response used to set the X-Cache header
         file (UploadFile): Uploaded CSV file
+        full_rows (bool): Return all CSV columns for duplicate rows instead of
+            only the columns used for comparison and reporting
+        key_mode (str): 'string' to key groups by full comparison keys, 'hash'
+            to key them by hex digests
+        digest_size (int): Digest size in bytes for 'hash' keys (8 or 16)
+        verify_collisions (bool): Check full keys of rows sharing a digest
+        workers (Optional[int]): Number of worker processes, capped at the number
+            of CPUs; None uses one, as for a single file on the command line
+        memory_limit (Optional[str]): Memory budget such as '512M'; when set, rows are
+            spilled to disk and deduplicated bucket by bucket
+        approximate (bool): Estimate duplicates in fixed memory and return only
+            the most repeated requests with error bounds
+        top (int): Number of most repeated requests returned in approximate mode
+        sketch_width (int): Count-Min sketch width in approximate mode
+        sketch_depth (int): Count-Min sketch depth in approximate mode
+        hll_precision (int): HyperLogLog precision in approximate mode, 2 ** precision registers
+        sketch_capacity (Optional[int]): Space-Saving counters in approximate mode,
+            by default the larger of 4096 and 10 * top
+        compact (bool): Return per group only the key, count, first and last
+            Request Start Time and row numbers instead of the rows
+        fields (Optional[str]): Comma-separated columns to include in rows
+        limit (Optional[int]): Maximum number of groups per page
+        cursor (Optional[str]): next_cursor of the previous page
+        index (bool): Record requests in the signature index and add their
+            history from earlier uploads to the results
+        window (Optional[str]): Window such as '5s'; when set, only requests
+            repeated within the window by Request Start Time are reported
+        template (bool): Group URLs that differ only by IDs in the path and
+            count the concrete URLs of every group
+        template_pattern (Optional[List[str]]): Extra 'name=regex' path segment
+            patterns for template mode, may be repeated
+        metrics (bool): Add time and bytes wasted by duplicates and latency
+            percentiles, per group and overall
+        profile (bool): Run the analysis under cProfile when the server keeps
+            profiles, the dump is named in the X-Profile-Dump header; key
+            computation is timed apart as 'normalize' in Server-Timing
+        accept (Optional[str]): Accept header
         
     Returns:
-        Dict[str, Any]: Processing results
+        Any: Processing results, a page of them or an NDJSON stream
         
     Raises:
-        HTTPException: When file processing fails
+        HTTPException: When file processing fails or the analysis pool is saturated
     """
+    started = time.perf_counter()
+    index_path = _index_path(index)
     try:
-        # Read file content
-        content = (await file.read()).decode('utf-8')
+        # Starlette spools the upload to a temporary file, read it in chunks from there
+        stream = file.file
+        stream.seek(0, os.SEEK_END)
+        size = stream.tell()
+        stream.seek(0)
         
-        # Use StringIO to work with string as file
-        csv_file = io.StringIO(content)
+        # Workers and memory limit change how results are computed, not the results
+        result_options = {
+            "full_rows": full_rows,
+            "key_mode": key_mode,
+            "digest_size": digest_size,
+            "verify_collisions": verify_collisions,
+            "approximate": approximate,
+            "top": top,
+            "sketch_width": sketch_width,
+            "sketch_depth": sketch_depth,
+            "hll_precision": hll_precision,
+            "sketch_capacity": sketch_capacity,
+            "window": window,
+            "template": template,
+            "template_patterns": template_pattern or [],
+            "metrics": metrics,
+            "compact": compact,
+            "fields": parse_fields(fields)
+        }
+        cache = get_result_cache()
+        indexed = dict(result_options, index=True) if index_path is not None else result_options
+        cache_key = result_key(await run_in_threadpool(hash_stream, stream), indexed)
+        # Profiled requests, asked for or sampled, must run the analysis to have something to profile
+        profiler = get_request_profiler()
+        profile_dump = profiler.dump_path(profile)
+        profiled = profile or profile_dump is not None
+        # History changes with every upload, so only later pages of an indexed upload are cache hits
+        record = index_path is not None and cursor is None
+        bypass = record or profiled
+        if not bypass:
+            result, tier = await run_in_threadpool(cache.get, cache_key)
+            if result is not None:
+                formatted = _format_result(result, limit, cursor, accept, response,
+                                           {"X-Cache": "HIT", "X-Cache-Tier": tier})
+                get_metrics_registry().record("find-duplicates", time.perf_counter() - started)
+                return formatted
         
-        # Process CSV data
-        rows = read_csv_from_string(csv_file)
+        # Analysis is CPU-bound, run it in the pool so the event loop keeps serving requests
+        result = await _run_in_pool(stream, size, workers=workers, memory_limit=memory_limit,
+                                    index_path=index_path, update_index=record, profile_dump=profile_dump,
+                                    profile_min_seconds=profiler.min_seconds, time_keys=profiled,
+                                    **result_options)
+        run = result.pop("profile")
         
         # Check for empty data
-        if not rows:
+        if not result['total_rows']:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="File is empty"
             )
+        
+        headers = _profile_headers(run)
+        headers["X-Cache"] = "BYPASS" if bypass else "MISS"
+        if not profiled:
+            # Recorded results are kept for the later pages of the upload
+            await run_in_threadpool(cache.put, cache_key, result)
+        formatted = _format_result(result, limit, cursor, accept, response, headers)
+        get_metrics_registry().record("find-duplicates", time.perf_counter() - started, run)
+        return formatted
+        
+    except PoolSaturatedError as e:
+        logger.warning(f"Rejected upload: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, retry later",
+            headers={"Retry-After": "1"}
+        )
+    except ValueError as e:
+        logger.error(f"Data error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Data error: {str(e)}"
+        )
+    except HTTPException:
+        # Re-raise HTTP exceptions
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Unexpected error: {str(e)}"
+        )
+
 
-        total = len(rows)
-        duplicates_info = find_duplicates(rows)
-        stats = get_stats(rows)
-        duplicates_count = sum(v - 1 for v in duplicates_info.values())
-
-        # Group duplicate rows
-        duplicates_full: Dict[str, List[Dict[str, Any]]] = {}
-        for row in rows:
-            # Use the same key creation function as in the model for proper grouping
-            key = _create_comparison_key(row)
-            if key in duplicates_info:
-                if key not in duplicates_full:
-                    duplicates_full[key] = []
-                duplicates_full[key].append(row)
-
-        # Prepare response with duplicate group information
-        result = {
-            "total_rows": total,
-            "duplicates_count": duplicates_count,
-            "duplicates": duplicates_full,
-            "statistics": stats,
-            "duplicate_groups": len(duplicates_full)  # Number of different duplicate groups
+@api_router.post("/find-duplicates/batch",
+          tags=["Processing"],
+          summary="Find duplicates in several CSV files",
+          description="Uploads several CSV files and finds duplicates in every file and across all of them.")
+async def find_duplicates_batch_endpoint(files: List[UploadFile] = File(...), full_rows: bool = False,
+                                         key_mode: str = 'string', digest_size: int = 16,
+                                         verify_collisions: bool = False, workers: Optional[int] = None,
+                                         compact: bool = False, fields: Optional[str] = None,
+                                         index: bool = False, template: bool = False,
+                                         template_pattern: Optional[List[str]] = Query(None),
+                                         metrics: bool = False) -> Dict[str, Any]:
+    """
+    Find duplicates in every uploaded CSV file and across all of them.
+    
+    Every row carries the name of its upload in the 'Source File' column.
+    
+    Args:
+        files (List[UploadFile]): Uploaded CSV files
+        full_rows (bool): Return all CSV columns for duplicate rows
+        key_mode (str): 'string' or 'hash' comparison keys
+        digest_size (int): Digest size in bytes for 'hash' keys (8 or 16)
+        verify_collisions (bool): Check full keys of rows sharing a digest
+        workers (Optional[int]): Number of files parsed at once, capped at the number
+            of CPUs; None uses one per file up to the number of CPUs
+        compact (bool): Summarize groups by row numbers instead of listing rows
+        fields (Optional[str]): Comma-separated columns to include in rows
+        index (bool): Record requests in the signature index and add their
+            history from earlier uploads to the results of all files
+        template (bool): Group URLs that differ only by IDs in the path
+        template_pattern (Optional[List[str]]): Extra 'name=regex' path segment patterns
+        metrics (bool): Add time and bytes wasted by duplicates and latency percentiles
+        
+    Returns:
+        Dict[str, Any]: Results per file, results of all files together and the
+        number of groups with rows from several files
+        
+    Raises:
+        HTTPException: When file processing fails or the analysis pool is saturated
+    """
+    index_path = _index_path(index)
+    paths: List[str] = []
+    try:
+        options = {
+            "full_rows": full_rows,
+            "key_mode": key_mode,
+            "digest_size": digest_size,
+            "verify_collisions": verify_collisions,
+            "compact": compact,
+            "fields": parse_fields(fields),
+            "index_path": index_path,
+            "template": template,
+            "template_patterns": tuple(template_pattern or ()),
+            "metrics": metrics
         }
+        # Worker processes parse the files, so uploads are saved to disk first
+        for file in files:
+            paths.append(await run_in_threadpool(_save_upload, file.file))
+        sources = _source_names([file.filename for file in files])
+        
+        if workers is not None:
+            workers = min(workers, MAX_WORKERS)
+        result = await get_analysis_pool().run(_analyze_batch, paths, sources, workers, **options)
+        
+        # Check for empty data
+        if not result['merged']['total_rows']:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Files are empty"
+            )
         
         return result
         
+    except PoolSaturatedError as e:
+        logger.warning(f"Rejected upload: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, retry later",
+            headers={"Retry-After": "1"}
+        )
     except ValueError as e:
         logger.error(f"Data error: {str(e)}")
         raise HTTPException(
@@ -133,6 +527,565 @@ async def find_duplicates_endpoint(file: UploadFile = File(...)) -> Dict[str, An
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Unexpected error: {str(e)}"
         )
+    finally:
+        for path in paths:
+            os.unlink(path)
+
+
+@api_router.post("/jobs",
+          status_code=status.HTTP_202_ACCEPTED,
+          tags=["Jobs"],
+          summary="Submit CSV file for background processing",
+          description="Stores a CSV file and queues duplicate search; poll the job and fetch its result when done.")
+async def submit_job_endpoint(file: UploadFile = File(...), full_rows: bool = False,
+                              key_mode: str = 'string', digest_size: int = 16,
+                              verify_collisions: bool = False, workers: Optional[int] = None,
+                              memory_limit: Optional[str] = None, approximate: bool = False,
+                              top: int = DEFAULT_TOP, sketch_width: int = DEFAULT_WIDTH,
+                              sketch_depth: int = DEFAULT_DEPTH, hll_precision: int = DEFAULT_PRECISION,
+                              sketch_capacity: Optional[int] = None, compact: bool = False,
+                              fields: Optional[str] = None, index: bool = False,
+                              window: Optional[str] = None, template: bool = False,
+                              template_pattern: Optional[List[str]] = Query(None),
+                              metrics: bool = False) -> Dict[str, Any]:
+    """
+    Queue duplicate search in uploaded CSV file.
+    
+    Takes the same options as the find-duplicates endpoint.
+    
+    Args:
+        file (UploadFile): Uploaded CSV file
+        full_rows (bool): Return all CSV columns for duplicate rows
+        key_mode (str): 'string' or 'hash' comparison keys
+        digest_size (int): Digest size in bytes for 'hash' keys (8 or 16)
+        verify_collisions (bool): Check full keys of rows sharing a digest
+        workers (Optional[int]): Number of worker processes, capped at the number
+            of CPUs; None uses one
+        memory_limit (Optional[str]): Memory budget such as '512M' for spilling rows to disk
+        approximate (bool): Estimate duplicates in fixed memory
+        top (int): Number of most repeated requests returned in approximate mode
+        sketch_width (int): Count-Min sketch width in approximate mode
+        sketch_depth (int): Count-Min sketch depth in approximate mode
+        hll_precision (int): HyperLogLog precision in approximate mode
+        sketch_capacity (Optional[int]): Space-Saving counters in approximate mode
+        compact (bool): Summarize groups by row numbers instead of listing rows
+        fields (Optional[str]): Comma-separated columns to include in rows
+        index (bool): Record requests in the signature index
+        window (Optional[str]): Window such as '5s' to report only requests repeated within
+        template (bool): Group URLs that differ only by IDs in the path
+        template_pattern (Optional[List[str]]): Extra 'name=regex' path segment patterns
+        metrics (bool): Add time and bytes wasted by duplicates and latency percentiles
+        
+    Returns:
+        Dict[str, Any]: Job status including the job id
+        
+    Raises:
+        HTTPException: When options are invalid or the job queue is full
+    """
+    index_path = _index_path(index)
+    try:
+        selected = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Data error: {str(e)}"
+        )
+    try:
+        # Storing the upload is blocking file I/O, keep it off the event loop
+        job = await run_in_threadpool(
+            get_job_manager().submit, file.file, _analyze_job,
+            full_rows=full_rows, key_mode=key_mode, digest_size=digest_size,
+            verify_collisions=verify_collisions, workers=workers, memory_limit=memory_limit,
+            approximate=approximate, top=top, sketch_width=sketch_width, sketch_depth=sketch_depth,
+            hll_precision=hll_precision, sketch_capacity=sketch_capacity, window=window,
+            compact=compact, fields=selected,
+            index_path=index_path, template=template, template_patterns=template_pattern or [],
+            metrics=metrics
+        )
+    except PoolSaturatedError as e:
+        logger.warning(f"Rejected job: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Job queue is full, retry later",
+            headers={"Retry-After": "5"}
+        )
+    logger.info(f"Queued job {job.id} ({job.size} bytes)")
+    return job.to_dict()
+
+
+@api_router.get("/jobs/{job_id}", tags=["Jobs"], summary="Get job status")
+async def job_status_endpoint(job_id: str) -> Dict[str, Any]:
+    """
+    Get status and progress of a job.
+    
+    Args:
+        job_id (str): Job id
+        
+    Returns:
+        Dict[str, Any]: Job status, rows processed, error and timestamps
+        
+    Raises:
+        HTTPException: When the job is unknown or expired
+    """
+    return _find_job(job_id).to_dict()
+
+
+@api_router.get("/jobs/{job_id}/result", tags=["Jobs"], summary="Get job result")
+async def job_result_endpoint(response: Response, job_id: str, limit: Optional[int] = None,
+                              cursor: Optional[str] = None,
+                              accept: Optional[str] = Header(None)) -> Any:
+    """
+    Get processing results of a finished job.
+    
+    Supports NDJSON streaming and pages like the find-duplicates endpoint.
+    
+    Args:
+        response (Response): Response of the request
+        job_id (str): Job id
+        limit (Optional[int]): Maximum number of groups per page
+        cursor (Optional[str]): next_cursor of the previous page
+        accept (Optional[str]): Accept header
+        
+    Returns:
+        Any: Processing results, a page of them or an NDJSON stream
+        
+    Raises:
+        HTTPException: When the job is unknown, expired, failed or not finished yet
+    """
+    job = _find_job(job_id)
+    if job.status == 'failed':
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Data error: {job.error}"
+        )
+    if job.status != 'done':
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job is {job.status}"
+        )
+    try:
+        return _format_result(job.result, limit, cursor, accept, response, {})
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Data error: {str(e)}"
+        )
+
+
+def _format_result(result: Dict[str, Any], limit: Optional[int], cursor: Optional[str],
+                   accept: Optional[str], response: Response, headers: Dict[str, str]) -> Any:
+    """
+    Shape processing results as requested by the client.
+    
+    Args:
+        result (Dict[str, Any]): Processing results with rows as dictionaries
+        limit (Optional[int]): Maximum number of groups per page
+        cursor (Optional[str]): next_cursor of the previous page
+        accept (Optional[str]): Accept header
+        response (Response): Response of the request
+        headers (Dict[str, str]): Extra response headers
+        
+    Returns:
+        Any: Results, a page of them or an NDJSON stream
+        
+    Raises:
+        ValueError: If limit or cursor is invalid
+    """
+    if limit is not None or cursor is not None:
+        result = paginate(result, limit, cursor)
+    if accepts_ndjson(accept):
+        # Lines are encoded as the client reads them instead of as one document
+        return StreamingResponse(iter_ndjson(result), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+    response.headers.update(headers)
+    return result
+
+
+def _profile_headers(run: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Make response headers describing the analysis of a request.
+    
+    Args:
+        run (Dict[str, Any]): Profile of the run with the cProfile dump path under 'dump'
+        
+    Returns:
+        Dict[str, str]: Server-Timing header, and X-Profile-Dump with the dump
+        file name if statistics were written
+    """
+    headers = {"Server-Timing": server_timing(run)}
+    if run["dump"] is not None:
+        headers["X-Profile-Dump"] = os.path.basename(run["dump"])
+    return headers
+
+
+def _index_path(index: bool) -> Optional[str]:
+    """
+    Get the signature index file for a request that asks for it.
+    
+    Args:
+        index (bool): Whether the request asked to use the index
+        
+    Returns:
+        Optional[str]: Path to the index, None if not asked for
+        
+    Raises:
+        HTTPException: When the index is asked for but not configured
+    """
+    if not index:
+        return None
+    signature_index = get_signature_index()
+    if signature_index is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Signature index is not configured, start the server with --index"
+        )
+    return signature_index.path
+
+
+def _find_job(job_id: str) -> Job:
+    """
+    Get a job or fail with 404.
+    
+    Args:
+        job_id (str): Job id
+        
+    Returns:
+        Job: Job
+        
+    Raises:
+        HTTPException: When the job is unknown or expired
+    """
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job
+
+
+async def _run_in_pool(stream: BinaryIO, size: int, **options: Any) -> Dict[str, Any]:
+    """
+    Analyze uploaded data in the shared analysis pool.
+    
+    Process pools cannot receive the open upload, so it is copied to a
+    temporary file that the worker process reads instead.
+    
+    Args:
+        stream (BinaryIO): Uploaded CSV data
+        size (int): Size of uploaded data in bytes
+        **options: Options passed to _analyze_upload
+        
+    Returns:
+        Dict[str, Any]: Processing results with rows as dictionaries
+        
+    Raises:
+        PoolSaturatedError: If the pool is saturated
+    """
+    pool = get_analysis_pool()
+    if pool.kind == 'thread':
+        return await pool.run(_analyze_and_serialize, stream, size, **options)
+    
+    with tempfile.NamedTemporaryFile(suffix=".csv", delete=False) as temp_file:
+        shutil.copyfileobj(stream, temp_file)
+    try:
+        return await pool.run(_analyze_file, temp_file.name, size, **options)
+    finally:
+        os.unlink(temp_file.name)
+
+
+def _save_upload(stream: BinaryIO) -> str:
+    """
+    Copy an upload to a temporary file.
+    
+    Args:
+        stream (BinaryIO): Uploaded data
+        
+    Returns:
+        str: Path to the temporary file, removed by the caller
+    """
+    with tempfile.NamedTemporaryFile(suffix=".csv", delete=False) as temp_file:
+        shutil.copyfileobj(stream, temp_file)
+    return temp_file.name
+
+
+def _source_names(filenames: List[Optional[str]]) -> List[str]:
+    """
+    Make unique source names from upload file names.
+    
+    Args:
+        filenames (List[Optional[str]]): File names as sent by the client
+        
+    Returns:
+        List[str]: Names with a numeric suffix added to repeated names
+    """
+    names: List[str] = []
+    seen: Dict[str, int] = {}
+    for index, filename in enumerate(filenames, 1):
+        name = filename or f"file-{index}"
+        seen[name] = seen.get(name, 0) + 1
+        names.append(name if seen[name] == 1 else f"{name} ({seen[name]})")
+    return names
+
+
+def _analyze_batch(paths: List[str], sources: List[str], workers: Optional[int], full_rows: bool = False,
+                   compact: bool = False, fields: Optional[List[str]] = None,
+                   index_path: Optional[str] = None, metrics: bool = False,
+                   **key_options: Any) -> Dict[str, Any]:
+    """
+    Pool task: analyze saved uploads per file and together, and prepare results for JSON.
+    
+    Args:
+        paths (List[str]): Paths to saved uploads
+        sources (List[str]): Unique names of the uploads
+        workers (Optional[int]): Number of files parsed at once, None for one per
+            file up to the number of CPUs
+        full_rows (bool): Keep all CSV columns
+        compact (bool): Summarize groups by row numbers instead of listing rows
+        fields (Optional[List[str]]): Columns to keep in rows, all if None
+        index_path (Optional[str]): Signature index to record requests in
+        metrics (bool): Add metrics of duplicates per file and of all files
+        **key_options: Key options for DuplicateFinder
+        
+    Returns:
+        Dict[str, Any]: Batch results with rows as dictionaries
+    """
+    if compact:
+        key_options["row_numbers"] = True
+    if metrics:
+        if fields is None and not compact and not full_rows:
+            # Metrics need all columns, rows are returned as they would be without them
+            fields = list(REPORT_FIELDS + (SOURCE_FIELD,))
+        full_rows = True
+    elif fields is not None and not set(fields).issubset(REPORT_FIELDS + (SOURCE_FIELD,)):
+        full_rows = True
+    index = open_index(index_path) if index_path is not None else None
+    result = analyze_files(paths, workers, full_rows=full_rows, sources=sources, index=index,
+                           **key_options)
+    if metrics:
+        for file_result in list(result["files"].values()) + [result["merged"]]:
+            file_result["metrics"] = duplicate_metrics(file_result["duplicates"])
+    result["files"] = {source: shape_result(file_result, compact, fields)
+                       for source, file_result in result["files"].items()}
+    result["merged"] = shape_result(result["merged"], compact, fields)
+    return result
+
+
+def _analyze_file(path: str, size: int, **options: Any) -> Dict[str, Any]:
+    """
+    Pool task: analyze uploaded data saved to a file.
+    
+    Args:
+        path (str): Path to the saved upload
+        size (int): Size of uploaded data in bytes
+        **options: Options passed to _analyze_upload
+        
+    Returns:
+        Dict[str, Any]: Processing results with rows as dictionaries
+    """
+    with open(path, 'rb') as stream:
+        return _analyze_and_serialize(stream, size, **options)
+
+
+def _analyze_and_serialize(stream: BinaryIO, size: int, compact: bool = False,
+                           fields: Optional[List[str]] = None, metrics: bool = False,
+                           profile_dump: Optional[str] = None, profile_min_seconds: float = 0.0,
+                           time_keys: bool = False, **options: Any) -> Dict[str, Any]:
+    """
+    Pool task: analyze uploaded data and prepare results for JSON.
+    
+    Args:
+        stream (BinaryIO): Uploaded CSV data
+        size (int): Size of uploaded data in bytes
+        compact (bool): Summarize groups by row numbers instead of listing rows
+        fields (Optional[List[str]]): Columns to keep in rows, all if None
+        metrics (bool): Add metrics of duplicates, see metrics.duplicate_metrics
+        profile_dump (Optional[str]): File to dump cProfile statistics of the run to,
+            None not to profile
+        profile_min_seconds (float): Statistics of faster runs are discarded
+        time_keys (bool): Time key computation as the 'normalize' stage, see RunProfile
+        **options: Options passed to _analyze_upload
+        
+    Returns:
+        Dict[str, Any]: Processing results with rows as dictionaries, and the
+        profile of the run under 'profile', see instrumentation.RunProfile.to_dict
+        
+    Raises:
+        ValueError: If metrics are requested in approximate mode
+    """
+    if compact:
+        options["row_numbers"] = True
+    if metrics:
+        if options.get("approximate"):
+            raise ValueError("Metrics cannot be used with approximate mode")
+        if fields is None and not compact and not options.get("full_rows"):
+            # Metrics need all columns, rows are returned as they would be without them
+            fields = list(REPORT_FIELDS)
+        options["full_rows"] = True
+    elif fields is not None and not set(fields).issubset(REPORT_FIELDS):
+        options["full_rows"] = True
+    run = RunProfile(time_keys=time_keys)
+    run.bytes = size
+    with run.sample_memory(), profiled(profile_dump, profile_min_seconds) as outcome:
+        result = _analyze_upload(stream, size, run=run, **options)
+        if metrics:
+            with run.stage('metrics'):
+                result["metrics"] = duplicate_metrics(result["duplicates"])
+        with run.stage('shape'):
+            result = shape_result(result, compact, fields)
+    run.rows = result['total_rows']
+    result["profile"] = dict(run.to_dict(), dump=outcome["dump"])
+    return result
+
+
+def _analyze_job(stream: BinaryIO, size: int, **options: Any) -> Dict[str, Any]:
+    """
+    Job task: analyze a stored upload and prepare results for JSON.
+    
+    Args:
+        stream (BinaryIO): Stored CSV data
+        size (int): Size of stored data in bytes
+        **options: Options passed to _analyze_upload
+        
+    Returns:
+        Dict[str, Any]: Processing results with rows as dictionaries
+        
+    Raises:
+        ValueError: If the upload has no data rows
+    """
+    result = _analyze_and_serialize(stream, size, **options)
+    run = result.pop("profile")
+    if not result['total_rows']:
+        raise ValueError("File is empty")
+    get_metrics_registry().record("jobs", run["seconds"], run)
+    return result
+
+
+def _analyze_upload(stream: BinaryIO, size: int, full_rows: bool = False, key_mode: str = 'string',
+                    digest_size: int = 16, verify_collisions: bool = False, workers: Optional[int] = None,
+                    memory_limit: Optional[str] = None, approximate: bool = False,
+                    top: int = DEFAULT_TOP, sketch_width: int = DEFAULT_WIDTH,
+                    sketch_depth: int = DEFAULT_DEPTH, hll_precision: int = DEFAULT_PRECISION,
+                    sketch_capacity: Optional[int] = None, window: Optional[str] = None,
+                    row_numbers: bool = False, index_path: Optional[str] = None,
+                    update_index: bool = True, template: bool = False,
+                    template_patterns: Sequence[str] = (), progress: Optional[Callable[[int], None]] = None,
+                    run: Optional[RunProfile] = None) -> Dict[str, Any]:
+    """
+    Find duplicates in uploaded CSV data.
+    
+    Data is read from the stream chunk by chunk and parsed incrementally,
+    so the upload is never held in memory as a whole.
+    
+    Args:
+        stream (BinaryIO): Uploaded CSV data
+        size (int): Size of uploaded data in bytes
+        full_rows (bool): Keep all CSV columns
+        key_mode (str): 'string' or 'hash' comparison keys
+        digest_size (int): Digest size in bytes for 'hash' keys
+        verify_collisions (bool): Check full keys of rows sharing a digest
+        workers (Optional[int]): Number of worker processes, capped at the number
+            of CPUs; None uses one
+        memory_limit (Optional[str]): Memory budget such as '512M' for spilling rows to disk
+        approximate (bool): Estimate duplicates in fixed memory
+        top (int): Number of most repeated requests returned in approximate mode
+        sketch_width (int): Count-Min sketch width in approximate mode
+        sketch_depth (int): Count-Min sketch depth in approximate mode
+        hll_precision (int): HyperLogLog precision in approximate mode
+        sketch_capacity (Optional[int]): Space-Saving counters in approximate mode
+        window (Optional[str]): Window such as '5s' to report only requests repeated within
+        row_numbers (bool): Record row numbers of duplicate groups
+        index_path (Optional[str]): Signature index to record requests in
+        update_index (bool): Add the requests to the index; False only looks up
+            their history, for uploads recorded already
+        template (bool): Group URLs that differ only by IDs in the path
+        template_patterns (Sequence[str]): Extra 'name=regex' path segment patterns
+        progress (Optional[Callable[[int], None]]): Called with the number of rows processed so far
+        run (Optional[RunProfile]): Profile to record stage times in
+        
+    Returns:
+        Dict[str, Any]: Processing results
+        
+    Raises:
+        ValueError: If the signature index is combined with approximate, memory limit
+            or window modes
+    """
+    if index_path is not None and (approximate or memory_limit is not None or window is not None):
+        raise ValueError("Signature index cannot be used with approximate, memory limit or window modes")
+    if run is None:
+        run = RunProfile(time_keys=False)
+    index = open_index(index_path) if index_path is not None else None
+    # Compressed uploads are decompressed while parsed, never as a whole
+    stream = decompressed(stream)
+    # CSV, JSON Lines, HAR or Charles JSON session, told apart by the first bytes
+    file_format = detect_format(stream)
+    rows = run.timed_rows(iter_rows_stream(stream, full_rows=full_rows, format_name=file_format))
+    if progress is not None:
+        rows = track_progress(rows, progress)
+    
+    template_options = {
+        "template": template,
+        "template_patterns": tuple(template_patterns)
+    }
+    if approximate:
+        with run.stage('analyze'):
+            return approximate_duplicates(rows, top=top, width=sketch_width, depth=sketch_depth,
+                                          precision=hll_precision, capacity=sketch_capacity,
+                                          **template_options)
+    
+    key_options = {
+        "key_mode": key_mode,
+        "digest_size": digest_size,
+        "verify_collisions": verify_collisions,
+        "row_numbers": row_numbers,
+        **template_options
+    }
+    workers = min(workers or 1, MAX_WORKERS)
+    if window is not None:
+        # Track only requests of the last window, expiring older ones
+        with run.stage('analyze'):
+            return analyze_window(rows, parse_duration(window), **key_options)
+    if memory_limit is not None:
+        # Spill rows to disk partitioned by key and deduplicate bucket by bucket
+        with run.stage('analyze'):
+            return analyze_external(rows, parse_size(memory_limit), size_hint=size, **key_options)
+    if workers > 1 and file_format == 'csv':
+        # Split the upload between worker processes and merge their results
+        with run.stage('analyze'):
+            result = _analyze_parallel(stream, workers, full_rows, key_options, index, update_index)
+        if progress is not None:
+            progress(result['total_rows'])
+        return result
+    
+    # Stream rows straight into the duplicate finder in a single pass
+    with run.stage('group'):
+        return indexed_result(run.timed_keys(DuplicateFinder(**key_options)).update(rows), index, update_index)
+
+
+def _analyze_parallel(stream: BinaryIO, workers: int, full_rows: bool, key_options: Dict[str, Any],
+                      index: Optional[SignatureIndex] = None, update_index: bool = True) -> Dict[str, Any]:
+    """
+    Find duplicates in uploaded data using several processes.
+    
+    Worker processes read their part of the data from a temporary file.
+    
+    Args:
+        stream (BinaryIO): Uploaded CSV data
+        workers (int): Number of worker processes
+        full_rows (bool): Keep all CSV columns
+        key_options (Dict[str, Any]): Key options for DuplicateFinder
+        index (Optional[SignatureIndex]): Index to record requests in
+        update_index (bool): Add the requests to the index; False only looks up their history
+        
+    Returns:
+        Dict[str, Any]: Processing results
+    """
+    with tempfile.NamedTemporaryFile(suffix=".csv", delete=False) as temp_file:
+        shutil.copyfileobj(stream, temp_file)
+    try:
+        return analyze_csv_parallel(temp_file.name, workers, full_rows=full_rows, index=index,
+                                    update_index=update_index, **key_options)
+    finally:
+        os.unlink(temp_file.name)
 
 
 @app.get("/", response_class=HTMLResponse, tags=["UI"])
@@ -254,7 +1207,7 @@ async def index() -> HTMLResponse:
         <form id="uploadForm" enctype="multipart/form-data">
             <div class="form-group">
                 <label for="csvFile">Upload CSV file:</label><br>
-                <input type="file" id="csvFile" name="file" accept=".csv" required>
+                <input type="file" id="csvFile" name="file" accept=".csv,.jsonl,.ndjson,.har,.chlsj,.json" required>
             </div>
             <button type="submit">Find Duplicates</button>
         </form>
@@ -279,23 +1232,43 @@ async def index() -> HTMLResponse:
             // Show loading message
             showResult('Processing... Please wait.', 'warning');
             
+            // Results arrive one duplicate group per line and are shown as they come
             fetch('/{API_VERSION}/api/find-duplicates', {{
                 method: 'POST',
+                headers: {{'Accept': 'application/x-ndjson'}},
                 body: formData
             }})
-            .then(response => response.json())
-            .then(data => {{
-                if (data.detail) {{
-                    showResult('Error: ' + data.detail, 'error');
-                }} else {{
-                    showResult(formatResult(data), 'success');
+            .then(response => {{
+                if (!response.ok) {{
+                    return response.json().then(data => showResult('Error: ' + data.detail, 'error'));
                 }}
+                return readGroups(response);
             }})
             .catch(error => {{
                 showResult('Network error: ' + error, 'error');
             }});
         }});
         
+        async function readGroups(response) {{
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            let result = '';
+            while (true) {{
+                const {{done, value}} = await reader.read();
+                buffer += decoder.decode(value || new Uint8Array(), {{stream: !done}});
+                const lines = buffer.split('\\n');
+                buffer = lines.pop();
+                for (const line of lines) {{
+                    if (!line) continue;
+                    const item = JSON.parse(line);
+                    result += item.type === 'summary' ? formatSummary(item) : formatGroup(item.rows);
+                }}
+                showResult(result, 'success');
+                if (done) break;
+            }}
+        }}
+        
         function showResult(message, type) {{
             const resultDiv = document.getElementById('result');
             resultDiv.innerHTML = '<pre>' + message + '</pre>';
@@ -303,7 +1276,7 @@ async def index() -> HTMLResponse:
             resultDiv.style.display = 'block';
         }}
         
-        function formatResult(data) {{
+        function formatSummary(data) {{
             let result = '=== Processing statistics ===\\n';
             result += 'Processed rows: ' + data.total_rows + '\\n';
             result += 'Duplicates found: ' + data.duplicates_count + '\\n';
@@ -313,34 +1286,32 @@ async def index() -> HTMLResponse:
                 result += '=== Duplicate rows ===\\n';
                 result += 'Response code | Start time                | Method  | URL\\n';
                 result += '-'.repeat(200) + '\\n';
-                
-                let groupIndex = 0;
-                for (const [key, rows] of Object.entries(data.duplicates)) {{
-                    for (const row of rows) {{
-                        const code = row['Response Code'] || '';
-                        let codeDisplay = code;
-                        
-                        // Add special formatting for error codes
-                        if (code.startsWith('4')) {{
-                            codeDisplay = code + ' [4xx Error]';
-                        }} else if (code.startsWith('5')) {{
-                            codeDisplay = code + ' [5xx Error]';
-                        }}
-                        
-                        result += 
-                            codeDisplay.padEnd(15) + ' | ' +
-                            (row['Request Start Time'] || '').substring(0, 25).padEnd(25) + ' | ' +
-                            (row['Method'] || '').padEnd(7) + ' | ' +
-                            (row['URL'] || '').substring(0, 150) + '\\n';
-                    }}
-                    result += '\\n'; // Separate groups with empty line
-                    groupIndex = (groupIndex + 1) % 8;
-                }}
-                result += '\\n';
             }}
             
             return result;
         }}
+        
+        function formatGroup(rows) {{
+            let result = '';
+            for (const row of rows) {{
+                const code = row['Response Code'] || '';
+                let codeDisplay = code;
+                
+                // Add special formatting for error codes
+                if (code.startsWith('4')) {{
+                    codeDisplay = code + ' [4xx Error]';
+                }} else if (code.startsWith('5')) {{
+                    codeDisplay = code + ' [5xx Error]';
+                }}
+                
+                result += 
+                    codeDisplay.padEnd(15) + ' | ' +
+                    (row['Request Start Time'] || '').substring(0, 25).padEnd(25) + ' | ' +
+                    (row['Method'] || '').padEnd(7) + ' | ' +
+                    (row['URL'] || '').substring(0, 150) + '\\n';
+            }}
+            return result + '\\n'; // Separate groups with empty line
+        }}
     </script>
 </body>
 </html>
@@ -357,8 +1328,51 @@ def main():
     parser = argparse.ArgumentParser(description="Run the Duplicate Log Finder API")
     parser.add_argument("--host", default="194.35.48.118", help="Host to bind the server to")
     parser.add_argument("--port", type=int, default=8080, help="Port to bind the server to")
+    parser.add_argument("--url-cache-size", type=int, default=DEFAULT_URL_CACHE_SIZE,
+                        help="Number of normalized URLs to cache, 0 disables caching")
+    parser.add_argument("--pool", choices=POOL_KINDS, default='thread',
+                        help="Run analyses in worker threads or worker processes")
+    parser.add_argument("--pool-workers", type=int, default=DEFAULT_POOL_WORKERS,
+                        help="Number of uploads analyzed at once")
+    parser.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING,
+                        help="Number of uploads allowed to wait for a free worker "
+                             "before requests are rejected with 503")
+    parser.add_argument("--job-workers", type=int, default=DEFAULT_JOB_WORKERS,
+                        help="Number of background jobs running at once")
+    parser.add_argument("--job-queue", type=int, default=DEFAULT_MAX_QUEUED,
+                        help="Number of background jobs allowed to wait for a free worker")
+    parser.add_argument("--job-ttl", type=float, default=DEFAULT_RESULT_TTL,
+                        help="Seconds to keep results of finished jobs")
+    parser.add_argument("--job-max-results", type=int, default=DEFAULT_MAX_RESULTS,
+                        help="Number of finished jobs kept, the oldest are evicted first")
+    parser.add_argument("--job-dir", default=None,
+                        help="Directory for uploads of queued jobs, system temp directory by default")
+    parser.add_argument("--result-cache-size", type=int, default=DEFAULT_MEMORY_ENTRIES,
+                        help="Number of results of repeated uploads kept in memory, 0 disables it")
+    parser.add_argument("--result-cache-dir", default=None,
+                        help="Directory for results of repeated uploads kept on disk, disabled by default")
+    parser.add_argument("--result-cache-disk-limit", default="1G",
+                        help="Disk space for cached results, e.g. 512M or 2G")
+    parser.add_argument("--index", default=None, metavar="PATH",
+                        help="SQLite signature index that uploads can record requests in "
+                             "with ?index=true, disabled by default")
+    parser.add_argument("--profile-dir", default=None,
+                        help="Directory for cProfile dumps of requests sent with ?profile=true "
+                             "or sampled, disabled by default")
+    parser.add_argument("--profile-sample-rate", type=float, default=0.0,
+                        help="Share of requests profiled without asking, 0 to 1")
+    parser.add_argument("--profile-min-seconds", type=float, default=0.0,
+                        help="Keep dumps only of analyses that took at least this long")
     args = parser.parse_args()
     
+    configure_url_cache(args.url_cache_size)
+    configure_analysis_pool(args.pool, args.pool_workers, args.max_pending, args.url_cache_size)
+    configure_job_manager(args.job_workers, args.job_queue, args.job_ttl, args.job_dir, args.job_max_results)
+    configure_result_cache(args.result_cache_size, args.result_cache_dir,
+                           parse_size(args.result_cache_disk_limit))
+    configure_signature_index(args.index)
+    configure_request_profiler(args.profile_dir, args.profile_sample_rate, args.profile_min_seconds)
+    
     logger.info(f"Starting server on {args.host}:{args.port}")
     
     uvicorn.run(
@@ -0,0 +1,129 @@
+"""Batch analysis of several capture files with cross-file duplicate merging."""
+
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Sequence
+
+from model import DuplicateFinder, tag_rows
+from readers import iter_rows, capture_extensions
+from signature_index import SignatureIndex
+
+# Column added to every row with the file it was read from
+SOURCE_FIELD: str = 'Source File'
+
+# Extensions picked up when a directory is given
+CAPTURE_EXTENSIONS = capture_extensions()
+
+
+def expand_paths(patterns: Sequence[str]) -> List[str]:
+    """
+    Expand file paths, glob patterns and directories into a list of files.
+
+    Directories contribute their capture files, glob patterns their matches,
+    each sorted by name. Files listed more than once are kept once.
+
+    Args:
+        patterns (Sequence[str]): File paths, glob patterns or directories
+
+    Returns:
+        List[str]: File paths in order of the patterns
+
+    Raises:
+        ValueError: If a pattern matches no file
+    """
+    paths: List[str] = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(
+                os.path.join(pattern, name) for name in os.listdir(pattern)
+                if name.lower().endswith(CAPTURE_EXTENSIONS) and os.path.isfile(os.path.join(pattern, name))
+            )
+        elif glob.has_magic(pattern):
+            matches = sorted(path for path in glob.glob(pattern) if os.path.isfile(path))
+        elif os.path.isfile(pattern):
+            matches = [pattern]
+        else:
+            raise ValueError(f"File not found: {pattern}")
+        if not matches:
+            raise ValueError(f"No files found: {pattern}")
+        paths.extend(path for path in matches if path not in paths)
+    return paths
+
+
+def _analyze_file(path: str, source: str, skip_header: bool, full_rows: bool,
+                  options: Dict[str, Any]) -> DuplicateFinder:
+    """
+    Worker: find duplicates in one file, tagging rows with their source.
+
+    Args:
+        path (str): Path to capture file in any format of readers
+        source (str): Source name put into the SOURCE_FIELD column
+        skip_header (bool): Whether to skip header row
+        full_rows (bool): Keep all columns instead of only REPORT_FIELDS
+        options (Dict[str, Any]): Key options for DuplicateFinder
+
+    Returns:
+        DuplicateFinder: Results for the file
+    """
+    rows = tag_rows(iter_rows(path, skip_header, full_rows), SOURCE_FIELD, source)
+    return DuplicateFinder(**options).update(rows)
+
+
+def analyze_files(paths: Sequence[str], workers: Optional[int] = None, skip_header: bool = True,
+                  full_rows: bool = False, sources: Optional[Sequence[str]] = None,
+                  index: Optional[SignatureIndex] = None, **options: Any) -> Dict[str, Any]:
+    """
+    Find duplicates in every file and across all of them.
+
+    Files are parsed concurrently by a process pool, one worker per file up
+    to the number of CPUs unless workers says otherwise. Every
+    row carries its source name, by default the file path, in the
+    SOURCE_FIELD column. Merged groups keep the order of first occurrence
+    with files taken in the given order.
+
+    Args:
+        paths (Sequence[str]): Paths to CSV files
+        workers (Optional[int]): Number of worker processes, 1 parses the files
+            in this process, None one per file up to the number of CPUs
+        skip_header (bool): Whether to skip header row of every file
+        full_rows (bool): Keep all columns instead of only REPORT_FIELDS
+        sources (Optional[Sequence[str]]): Unique source names of the files,
+            e.g. names of uploads saved to temporary paths
+        index (Optional[SignatureIndex]): Index to record the requests of all
+            files in, adding their history from earlier runs to the merged results
+        **options: Key options passed to DuplicateFinder
+
+    Returns:
+        Dict[str, Any]: Results per source, merged results of all files and the
+        number of merged groups with rows from more than one file
+
+    Raises:
+        ValueError: If file reading fails or required fields are missing
+    """
+    if sources is None:
+        sources = paths
+    if len(set(sources)) != len(sources):
+        raise ValueError("Source names must be unique")
+    count = len(paths)
+    if workers is None:
+        workers = min(count, os.cpu_count() or 1)
+    arguments = (paths, sources, [skip_header] * count, [full_rows] * count, [options] * count)
+    if workers > 1 and count > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, count)) as executor:
+            finders = list(executor.map(_analyze_file, *arguments))
+    else:
+        finders = list(map(_analyze_file, *arguments))
+
+    merged = DuplicateFinder(**options)
+    files = {}
+    for source, finder in zip(sources, finders):
+        files[source] = finder.result()
+        merged.merge(finder)
+
+    result = merged.result()
+    if index is not None:
+        result["history"] = index.record(merged)
+    cross_file = sum(1 for rows in result["duplicates"].values()
+                     if len({row[SOURCE_FIELD] for row in rows}) > 1)
+    return {"files": files, "merged": result, "cross_file_groups": cross_file}
@@ -0,0 +1,281 @@
+"""Benchmarks of processing stages with regression checks against a stored baseline."""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from model import (read_csv, find_duplicates, get_stats, DuplicateFinder, configure_url_cache,
+                   DEFAULT_URL_CACHE_SIZE, _normalize_url_for_comparison, _canonical_query_pair)
+from synthetic import generate_capture
+from view import print_results
+
+# Stages in the order they run
+STAGES = ('read_csv', 'normalize_url', 'find_duplicates', 'get_stats', 'duplicate_finder',
+          'print_results', 'api_round_trip')
+
+# Allowed slowdown relative to the baseline before a stage counts as regressed
+DEFAULT_THRESHOLD: float = 0.25
+
+# Slowdowns below this are timer noise, whatever the ratio
+MIN_REGRESSION_SECONDS: float = 0.005
+
+DEFAULT_ROWS: int = 100000
+
+
+def _cold_caches() -> None:
+    """Empty URL caches, so every run pays for normalization as a fresh process would."""
+    configure_url_cache(0)
+    configure_url_cache(DEFAULT_URL_CACHE_SIZE)
+    _canonical_query_pair.cache_clear()
+
+
+def _api_round_trip(file_path: str) -> Optional[Callable[[], Any]]:
+    """
+    Build the API stage: upload the file to find-duplicates through an in-process client.
+
+    Returns:
+        Optional[Callable[[], Any]]: Stage, None if the API or its test client
+        dependencies are not installed
+    """
+    try:
+        from fastapi.testclient import TestClient
+        import api
+        from result_cache import configure_result_cache
+    except (ImportError, RuntimeError):
+        return None
+    # Cached results would turn every run after the first into a lookup
+    configure_result_cache(memory_entries=0, directory=None)
+    client = TestClient(api.app)
+
+    def round_trip() -> None:
+        with open(file_path, 'rb') as file:
+            response = client.post('/v1/api/find-duplicates', files={'file': file})
+        if response.status_code != 200:
+            raise RuntimeError(f"API round trip failed with {response.status_code}: {response.text[:200]}")
+
+    return round_trip
+
+
+def _time_stage(stage: Callable[[], Any], repeat: int) -> float:
+    """Run a stage repeat times with cold caches and return the fastest time in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        _cold_caches()
+        start = time.perf_counter()
+        stage()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmarks(file_path: str, repeat: int = 3,
+                   stages: Sequence[str] = STAGES) -> Dict[str, Optional[float]]:
+    """
+    Time processing stages on a capture, each on its own.
+
+    Stages get their input, such as parsed rows, prepared outside of the
+    timed part. The fastest of repeat runs is reported, as timeit does,
+    since slower runs measure interference rather than the code.
+
+    Args:
+        file_path (str): CSV capture
+        repeat (int): Runs per stage
+        stages (Sequence[str]): Stages to time, see STAGES
+
+    Returns:
+        Dict[str, Optional[float]]: Seconds per stage, None for stages that
+        cannot run here
+
+    Raises:
+        ValueError: If a stage is unknown or the capture cannot be read
+    """
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        raise ValueError(f"Unknown stages: {', '.join(sorted(unknown))}")
+    rows = read_csv(file_path)
+    urls = [row['URL'] for row in rows]
+    result = DuplicateFinder().update(rows).result()
+
+    def normalize_urls() -> None:
+        for url in urls:
+            _normalize_url_for_comparison(url)
+
+    def print_quietly() -> None:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            print_results(result['total_rows'], result['duplicates_count'], result['duplicates'],
+                          result['statistics'])
+
+    tasks: Dict[str, Callable[[], Optional[Callable[[], Any]]]] = {
+        'read_csv': lambda: lambda: read_csv(file_path),
+        'normalize_url': lambda: normalize_urls,
+        'find_duplicates': lambda: lambda: find_duplicates(rows),
+        'get_stats': lambda: lambda: get_stats(rows),
+        'duplicate_finder': lambda: lambda: DuplicateFinder().update(rows).result(),
+        'print_results': lambda: print_quietly,
+        'api_round_trip': lambda: _api_round_trip(file_path)
+    }
+    timings: Dict[str, Optional[float]] = {}
+    for name in STAGES:
+        if name in stages:
+            stage = tasks[name]()
+            timings[name] = _time_stage(stage, repeat) if stage is not None else None
+    return timings
+
+
+def find_regressions(timings: Dict[str, Optional[float]], baseline: Dict[str, Optional[float]],
+                     threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """
+    Compare stage timings with a baseline.
+
+    A stage regresses when it is slower than its baseline by more than
+    threshold and by more than MIN_REGRESSION_SECONDS. Stages missing on
+    either side are not compared.
+
+    Args:
+        timings (Dict[str, Optional[float]]): Seconds per stage
+        baseline (Dict[str, Optional[float]]): Baseline seconds per stage
+        threshold (float): Allowed slowdown, e.g. 0.25 for 25%
+
+    Returns:
+        List[str]: Description of every regressed stage
+    """
+    regressions = []
+    for name, seconds in timings.items():
+        expected = baseline.get(name)
+        if seconds is None or expected is None:
+            continue
+        if seconds > expected * (1 + threshold) and seconds - expected > MIN_REGRESSION_SECONDS:
+            regressions.append(f"{name}: {seconds:.4f}s, baseline {expected:.4f}s "
+                               f"(+{seconds / expected - 1:.0%}, allowed +{threshold:.0%})")
+    return regressions
+
+
+def make_report(timings: Dict[str, Optional[float]], parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the JSON report stored as a baseline.
+
+    Args:
+        timings (Dict[str, Optional[float]]): Seconds per stage
+        parameters (Dict[str, Any]): Capture parameters the timings were measured with
+
+    Returns:
+        Dict[str, Any]: Report with parameters, Python version and stage timings
+    """
+    return {
+        "parameters": parameters,
+        "python": platform.python_version(),
+        "stages": timings
+    }
+
+
+def load_baseline(path: str, parameters: Dict[str, Any]) -> Dict[str, Optional[float]]:
+    """
+    Read stage timings of a baseline report.
+
+    Args:
+        path (str): Baseline JSON file
+        parameters (Dict[str, Any]): Capture parameters of the current run
+
+    Returns:
+        Dict[str, Optional[float]]: Baseline seconds per stage
+
+    Raises:
+        ValueError: If the file is not a baseline report or was measured with
+            other capture parameters
+    """
+    try:
+        with open(path, encoding='utf-8') as file:
+            report = json.load(file)
+        stages = report["stages"]
+        measured_with = report["parameters"]
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Invalid baseline {path}: {str(e)}")
+    if measured_with != parameters:
+        raise ValueError(f"Baseline {path} was measured with other parameters: {measured_with}")
+    return stages
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    Command line entry point.
+
+    Args:
+        argv (Optional[Sequence[str]]): Arguments, sys.argv if None
+
+    Returns:
+        int: 0 if no stage regressed, 1 on regressions or errors
+    """
+    parser = argparse.ArgumentParser(
+        description="Time processing stages on a synthetic or given capture and check them against a baseline"
+    )
+    parser.add_argument("--file", help="CSV capture to use instead of a synthetic one")
+    parser.add_argument("--rows", type=lambda value: int(float(value)), default=DEFAULT_ROWS,
+                        help="Rows of the synthetic capture, e.g. 1e6 (default: {})".format(DEFAULT_ROWS))
+    parser.add_argument("--duplicate-ratio", type=float, default=0.3,
+                        help="Share of repeated requests in the synthetic capture (default: 0.3)")
+    parser.add_argument("--url-length", type=int, default=100,
+                        help="Approximate minimum URL length of the synthetic capture (default: 100)")
+    parser.add_argument("--query-params", type=float, default=3.0,
+                        help="Mean number of query parameters of the synthetic capture (default: 3)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic capture (default: 0)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage, the fastest counts (default: 3)")
+    parser.add_argument("--stage", action="append", choices=STAGES, help="Stage to time; may be repeated (default: all)")
+    parser.add_argument("--baseline", metavar="PATH", help="Baseline JSON to compare with")
+    parser.add_argument("--save-baseline", metavar="PATH", help="Store the timings as a baseline JSON")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown against the baseline (default: {})".format(DEFAULT_THRESHOLD))
+    args = parser.parse_args(argv)
+
+    if args.file:
+        parameters: Dict[str, Any] = {"file": os.path.basename(args.file)}
+    else:
+        parameters = {
+            "rows": args.rows,
+            "duplicate_ratio": args.duplicate_ratio,
+            "url_length": args.url_length,
+            "query_params": args.query_params,
+            "seed": args.seed
+        }
+    temp_path = None
+    try:
+        baseline = load_baseline(args.baseline, parameters) if args.baseline else None
+        file_path = args.file
+        if file_path is None:
+            with tempfile.NamedTemporaryFile(suffix=".csv", delete=False) as temp_file:
+                temp_path = file_path = temp_file.name
+            options = {name: value for name, value in parameters.items() if name != "rows"}
+            generate_capture(file_path, args.rows, **options)
+        timings = run_benchmarks(file_path, args.repeat, args.stage or STAGES)
+    except (ValueError, RuntimeError) as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 1
+    finally:
+        if temp_path is not None:
+            os.unlink(temp_path)
+
+    print(f"{'Stage':<18} | {'Seconds':>10} | {'Baseline':>10}")
+    for name, seconds in timings.items():
+        expected = baseline.get(name) if baseline else None
+        print(f"{name:<18} | "
+              f"{'skipped' if seconds is None else f'{seconds:.4f}':>10} | "
+              f"{'-' if expected is None else f'{expected:.4f}':>10}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as file:
+            json.dump(make_report(timings, parameters), file, indent=2)
+    if baseline is not None:
+        regressions = find_regressions(timings, baseline, args.threshold)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
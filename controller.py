@@ -1,13 +1,30 @@
 """Main controller for the duplicate finder application."""
 
 import argparse
+import contextlib
+import glob
 import logging
 import sys
 import os
-from typing import Optional, Dict, Any, List
+import time
+from itertools import chain
+from typing import Any, Dict, Optional, Sequence, Union
 
-from model import read_csv, find_duplicates, get_stats, _create_comparison_key
-from view import print_results
+from model import configure_url_cache, url_cache_stats, DEFAULT_URL_CACHE_SIZE
+from model import KEY_MODES, DIGEST_SIZES, DuplicateFinder, tag_rows
+from batch import analyze_files, expand_paths, SOURCE_FIELD
+from parallel import analyze_csv_parallel
+from readers import iter_rows, detect_file_format
+from external import analyze_external, parse_size
+from sketch import approximate_duplicates, DEFAULT_TOP, DEFAULT_WIDTH, DEFAULT_DEPTH, DEFAULT_PRECISION
+from follow import LogFollower
+from window import analyze_window, parse_duration
+from signature_index import SignatureIndex, open_index, indexed_result
+from metrics import duplicate_metrics
+from instrumentation import RunProfile
+from view import print_results, print_approximate_results, print_batch_results
+from view import print_group_updates, print_follow_summary, print_history, print_window_stats, print_variants
+from view import print_metrics, print_profile
 
 # Configure logging
 logging.basicConfig(
@@ -19,46 +36,111 @@ logger = logging.getLogger(__name__)
 # Default file path - using relative path for portability
 DEFAULT_CSV_FILE_PATH: str = os.path.join("res", "requests_08_26_06.06.2025.csv")
 
+# Seconds between checks for new data and between checkpoints in follow mode
+DEFAULT_POLL_INTERVAL: float = 1.0
+CHECKPOINT_INTERVAL: float = 60.0
 
-def main(file_path: Optional[str] = None) -> int:
+
+def main(file_path: Optional[Union[str, Sequence[str]]] = None, url_cache_size: int = DEFAULT_URL_CACHE_SIZE,
+         key_mode: str = 'string', digest_size: int = 16, verify_collisions: bool = False,
+         workers: Optional[int] = None, memory_limit: Optional[str] = None, approximate: bool = False,
+         top: int = DEFAULT_TOP, sketch_width: int = DEFAULT_WIDTH, sketch_depth: int = DEFAULT_DEPTH,
+         hll_precision: int = DEFAULT_PRECISION, sketch_capacity: Optional[int] = None,
+         follow: bool = False, checkpoint: Optional[str] = None,
+         poll_interval: float = DEFAULT_POLL_INTERVAL, index: Optional[str] = None,
+         window: Optional[str] = None, template: bool = False,
+         template_patterns: Sequence[str] = (), metrics: bool = False, profile: bool = False) -> int:
     """
     Main application function.
     
     Args:
-        file_path (Optional[str]): Path to CSV file to process
+        file_path (Optional[Union[str, Sequence[str]]]): Path to capture file to process
+            (CSV, JSON Lines, HAR or Charles JSON session, detected from its content), or
+            several files, glob patterns and directories analyzed together
+        url_cache_size (int): Number of normalized URLs to cache, 0 disables caching
+        key_mode (str): 'string' or 'hash' comparison keys
+        digest_size (int): Digest size in bytes for 'hash' keys
+        verify_collisions (bool): Check full keys of rows sharing a digest
+        workers (Optional[int]): Number of worker processes, 1 processes the file in this
+            process; None uses one for a single file and one per file up to the
+            number of CPUs for several files
+        memory_limit (Optional[str]): Memory budget such as '512M'; when set, rows are
+            spilled to disk and deduplicated bucket by bucket
+        approximate (bool): Estimate duplicates and report only the most repeated
+            requests, using fixed memory
+        top (int): Number of most repeated requests to report in approximate mode
+        sketch_width (int): Count-Min sketch width in approximate mode
+        sketch_depth (int): Count-Min sketch depth in approximate mode
+        hll_precision (int): HyperLogLog precision in approximate mode, 2 ** precision registers
+        sketch_capacity (Optional[int]): Space-Saving counters in approximate mode,
+            None for the larger of 4096 and 10 * top
+        follow (bool): Keep reading data appended to the file until interrupted
+        checkpoint (Optional[str]): Checkpoint file used to resume follow mode
+        poll_interval (float): Seconds between checks for new data in follow mode
+        index (Optional[str]): Signature index file to record requests in and to
+            report their counts in earlier runs from
+        window (Optional[str]): Window such as '5s'; when set, only requests
+            repeated within the window are reported
+        template (bool): Group URLs differing only by IDs in the path
+        template_patterns (Sequence[str]): Extra 'name=regex' path segment patterns for template mode
+        metrics (bool): Report time and bytes wasted by duplicates and their latency percentiles
+        profile (bool): Print time per stage, rows and bytes processed and peak memory
         
     Returns:
         int: Exit code (0 for success, 1 for error)
     """
     # Use default path if no other path is specified
-    if file_path is None:
+    if not file_path:
         file_path = DEFAULT_CSV_FILE_PATH
     
+    configure_url_cache(url_cache_size)
+
     try:
-        rows = read_csv(file_path)
+        if index is not None and (approximate or memory_limit is not None or follow or window is not None):
+            raise ValueError("Signature index cannot be used with approximate, memory limit, follow or window modes")
+        if metrics and (approximate or follow):
+            raise ValueError("Metrics cannot be used with approximate or follow modes")
+        if profile and follow:
+            raise ValueError("Profile cannot be used with follow mode")
+        window_seconds = parse_duration(window) if window is not None else None
+        signature_index = open_index(index) if index is not None else None
         
-        # Check for empty data
-        if not rows:
-            print("Error: File is empty")
-            return 1
-
-        total = len(rows)
-        duplicates_info = find_duplicates(rows)
-        stats = get_stats(rows)
-        duplicates_count = sum(v - 1 for v in duplicates_info.values())
-
-        # Group duplicate rows
-        duplicates_full: Dict[str, List[Dict[str, Any]]] = {}
-        for row in rows:
-            # Use the same key creation function as in the model for proper grouping
-            key = _create_comparison_key(row)
-            if key in duplicates_info:
-                if key not in duplicates_full:
-                    duplicates_full[key] = []
-                duplicates_full[key].append(row)
-
-        print_results(total, duplicates_count, duplicates_full, stats)
-        return 0
+        patterns = [file_path] if isinstance(file_path, str) else list(file_path)
+        if follow and (len(patterns) > 1 or glob.has_magic(patterns[0]) or os.path.isdir(patterns[0])):
+            raise ValueError("Follow mode follows a single file, not several files, a glob pattern or a directory")
+        paths = patterns
+        if len(patterns) > 1 or not os.path.isfile(patterns[0]):
+            paths = expand_paths(patterns)
+        sketch_options = {
+            'width': sketch_width,
+            'depth': sketch_depth,
+            'precision': hll_precision,
+            'capacity': sketch_capacity
+        }
+        run = RunProfile(time_keys=profile)
+        if len(paths) > 1:
+            with run.sample_memory() if profile else contextlib.nullcontext():
+                exit_code = _main_batch(paths, key_mode, digest_size, verify_collisions, workers,
+                                        memory_limit, approximate, top, signature_index, window_seconds,
+                                        template, template_patterns, metrics, run, sketch_options)
+        else:
+            file_path = paths[0]
+            file_format, compression = detect_file_format(file_path) if os.path.exists(file_path) else ('csv', None)
+            if follow:
+                if file_format != 'csv' or compression is not None:
+                    raise ValueError("Follow mode supports uncompressed CSV logs only")
+                return _main_follow(file_path, checkpoint, poll_interval, key_mode=key_mode,
+                                    digest_size=digest_size, verify_collisions=verify_collisions,
+                                    template=template, template_patterns=tuple(template_patterns))
+            
+            with run.sample_memory() if profile else contextlib.nullcontext():
+                exit_code = _main_file(file_path, file_format, compression, run, workers or 1, memory_limit,
+                                       approximate, top, signature_index, window_seconds, metrics,
+                                       template, template_patterns, sketch_options, key_mode=key_mode,
+                                       digest_size=digest_size, verify_collisions=verify_collisions)
+        if profile and exit_code == 0:
+            print_profile(run.to_dict())
+        return exit_code
 
     except ValueError as e:
         print(f"Data error: {str(e)}")
@@ -70,24 +152,402 @@ def main(file_path: Optional[str] = None) -> int:
         return 1
 
 
+def _main_file(file_path: str, file_format: str, compression: Optional[str], run: RunProfile,
+               workers: int, memory_limit: Optional[str], approximate: bool, top: int,
+               signature_index: Optional[SignatureIndex], window: Optional[float], metrics: bool,
+               template: bool = False, template_patterns: Sequence[str] = (),
+               sketch_options: Optional[Dict[str, Any]] = None, **key_options: Any) -> int:
+    """
+    Analyze a single file and print the results.
+    
+    Args:
+        file_path (str): Path to capture file
+        file_format (str): Capture format, see readers.detect_file_format
+        compression (Optional[str]): Compression of the file, None if uncompressed
+        run (RunProfile): Profile recording stage times, rows and bytes
+        workers (int): Number of worker processes
+        memory_limit (Optional[str]): Memory budget such as '512M'
+        approximate (bool): Estimate duplicates in fixed memory
+        top (int): Number of most repeated requests to report in approximate mode
+        signature_index (Optional[SignatureIndex]): Index to record requests in
+        window (Optional[float]): Window in seconds to report only requests repeated within
+        metrics (bool): Report time and bytes wasted by duplicates
+        template (bool): Group URLs differing only by IDs in the path
+        template_patterns (Sequence[str]): Extra path segment patterns for template mode
+        sketch_options (Optional[Dict[str, Any]]): Sketch sizes for approximate_duplicates
+        **key_options: Key options for DuplicateFinder
+        
+    Returns:
+        int: Exit code (0 for success, 1 for error)
+    """
+    run.bytes = os.path.getsize(file_path)
+    rows = run.timed_rows(iter_rows(file_path, full_rows=metrics, format_name=file_format))
+    template_options = {
+        'template': template,
+        'template_patterns': tuple(template_patterns)
+    }
+    if approximate:
+        with run.stage('analyze'):
+            result = approximate_duplicates(rows, top=top, **(sketch_options or {}), **template_options)
+        run.rows = result['total_rows']
+        if not result['total_rows']:
+            print("Error: File is empty")
+            return 1
+        with run.stage('output'):
+            print_approximate_results(result)
+        return 0
+
+    key_options.update(template_options)
+    if window is not None:
+        # Track only requests of the last window, expiring older ones
+        with run.stage('analyze'):
+            result = analyze_window(rows, window, **key_options)
+    elif memory_limit is not None:
+        # Spill rows to disk partitioned by key and deduplicate bucket by bucket
+        with run.stage('analyze'):
+            result = analyze_external(rows, parse_size(memory_limit), size_hint=run.bytes, **key_options)
+    elif workers > 1 and file_format == 'csv' and compression is None:
+        # Split the file between worker processes and merge their results
+        with run.stage('analyze'):
+            result = analyze_csv_parallel(file_path, workers, full_rows=metrics, index=signature_index,
+                                          **key_options)
+    else:
+        # Stream rows straight into the duplicate finder in a single pass
+        finder = run.timed_keys(DuplicateFinder(**key_options))
+        with run.stage('group'):
+            finder.update(rows)
+            result = indexed_result(finder, signature_index)
+    run.rows = result['total_rows']
+    
+    # Check for empty data
+    if not result['total_rows']:
+        print("Error: File is empty")
+        return 1
+
+    cost = None
+    if metrics:
+        with run.stage('metrics'):
+            cost = duplicate_metrics(result['duplicates'])
+    with run.stage('output'):
+        print_results(result['total_rows'], result['duplicates_count'],
+                      result['duplicates'], result['statistics'])
+        if 'variants' in result:
+            print_variants(result['variants'])
+        if cost is not None:
+            print_metrics(cost)
+        if 'window' in result:
+            print_window_stats(result['window'])
+        if 'history' in result:
+            print_history(result['history'])
+    logger.info(f"URL cache: {url_cache_stats()}")
+    return 0
+
+
+def _main_follow(file_path: str, checkpoint: Optional[str], poll_interval: float,
+                 **key_options: Any) -> int:
+    """
+    Follow a growing file, printing duplicate groups as they appear or grow.
+    
+    Runs until interrupted, then saves the checkpoint and prints totals.
+    
+    Args:
+        file_path (str): Path to CSV file
+        checkpoint (Optional[str]): Checkpoint file, no checkpoints if None
+        poll_interval (float): Seconds between checks for new data
+        **key_options: Key options passed to DuplicateFinder
+        
+    Returns:
+        int: Exit code (0 for success, 1 for error)
+    """
+    follower = LogFollower(file_path, checkpoint, **key_options)
+    logger.info(f"Following {file_path} from byte {follower.offset}, press Ctrl+C to stop")
+    saved = time.monotonic()
+    try:
+        while True:
+            updates = follower.poll()
+            if updates:
+                print_group_updates(updates)
+            if time.monotonic() - saved >= CHECKPOINT_INTERVAL:
+                follower.save_checkpoint()
+                saved = time.monotonic()
+            time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        follower.save_checkpoint()
+
+    print_follow_summary(follower.result())
+    return 0
+
+
+def _main_batch(paths: Sequence[str], key_mode: str, digest_size: int, verify_collisions: bool,
+                workers: Optional[int], memory_limit: Optional[str], approximate: bool, top: int,
+                signature_index: Optional[SignatureIndex] = None,
+                window: Optional[float] = None, template: bool = False,
+                template_patterns: Sequence[str] = (), metrics: bool = False,
+                run: Optional[RunProfile] = None,
+                sketch_options: Optional[Dict[str, Any]] = None) -> int:
+    """
+    Analyze several files, per file and across all of them.
+    
+    Approximate, memory-limited and window modes analyze the merged rows of
+    all files only.
+    
+    Args:
+        paths (Sequence[str]): Paths to CSV files
+        key_mode (str): 'string' or 'hash' comparison keys
+        digest_size (int): Digest size in bytes for 'hash' keys
+        verify_collisions (bool): Check full keys of rows sharing a digest
+        workers (Optional[int]): Number of files parsed at once in worker processes,
+            None for one per file up to the number of CPUs
+        memory_limit (Optional[str]): Memory budget such as '512M'
+        approximate (bool): Estimate duplicates in fixed memory
+        top (int): Number of most repeated requests to report in approximate mode
+        signature_index (Optional[SignatureIndex]): Index to record requests of all files in
+        window (Optional[float]): Window in seconds to report only requests repeated within
+        template (bool): Group URLs differing only by IDs in the path
+        template_patterns (Sequence[str]): Extra path segment patterns for template mode
+        metrics (bool): Report time and bytes wasted by duplicates of all files
+        run (Optional[RunProfile]): Profile recording stage times, rows and bytes
+        sketch_options (Optional[Dict[str, Any]]): Sketch sizes for approximate_duplicates
+        
+    Returns:
+        int: Exit code (0 for success, 1 for error)
+    """
+    logger.info(f"Analyzing {len(paths)} files")
+    if run is None:
+        run = RunProfile(time_keys=False)
+    run.bytes = sum(os.path.getsize(path) for path in paths)
+    rows = run.timed_rows(chain.from_iterable(tag_rows(iter_rows(path, full_rows=metrics), SOURCE_FIELD, path)
+                                              for path in paths))
+    template_options = {
+        'template': template,
+        'template_patterns': tuple(template_patterns)
+    }
+    if approximate:
+        with run.stage('analyze'):
+            result = approximate_duplicates(rows, top=top, **(sketch_options or {}), **template_options)
+        run.rows = result['total_rows']
+        if not result['total_rows']:
+            print("Error: Files are empty")
+            return 1
+        with run.stage('output'):
+            print_approximate_results(result)
+        return 0
+
+    key_options = {
+        'key_mode': key_mode,
+        'digest_size': digest_size,
+        'verify_collisions': verify_collisions,
+        **template_options
+    }
+    if memory_limit is not None or window is not None:
+        with run.stage('analyze'):
+            if window is not None:
+                result = analyze_window(rows, window, **key_options)
+            else:
+                result = analyze_external(rows, parse_size(memory_limit), size_hint=run.bytes, **key_options)
+        run.rows = result['total_rows']
+        if not result['total_rows']:
+            print("Error: Files are empty")
+            return 1
+        cost = None
+        if metrics:
+            with run.stage('metrics'):
+                cost = duplicate_metrics(result['duplicates'])
+        with run.stage('output'):
+            print_results(result['total_rows'], result['duplicates_count'],
+                          result['duplicates'], result['statistics'], extra_column=SOURCE_FIELD)
+            if 'variants' in result:
+                print_variants(result['variants'])
+            if cost is not None:
+                print_metrics(cost)
+            if 'window' in result:
+                print_window_stats(result['window'])
+        return 0
+
+    with run.stage('analyze'):
+        batch_result = analyze_files(paths, workers, full_rows=metrics, index=signature_index, **key_options)
+    run.rows = batch_result['merged']['total_rows']
+    if not batch_result['merged']['total_rows']:
+        print("Error: Files are empty")
+        return 1
+    cost = None
+    if metrics:
+        with run.stage('metrics'):
+            cost = duplicate_metrics(batch_result['merged']['duplicates'])
+    with run.stage('output'):
+        print_batch_results(batch_result, SOURCE_FIELD)
+        if 'variants' in batch_result['merged']:
+            print_variants(batch_result['merged']['variants'])
+        if cost is not None:
+            print_metrics(cost)
+        if 'history' in batch_result['merged']:
+            print_history(batch_result['merged']['history'])
+    logger.info(f"URL cache: {url_cache_stats()}")
+    return 0
+
+
 if __name__ == "__main__":
     # Parse command line arguments
     parser = argparse.ArgumentParser(
-        description="Find duplicate entries in CSV log files",
+        description="Find duplicate entries in CSV, JSON Lines, HAR and Charles JSON session captures",
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 Examples:
   %(prog)s                           # Use default file
   %(prog)s path/to/your/file.csv     # Specify file
+  %(prog)s "res/requests_*.csv"      # Analyze matching files together
+  %(prog)s session.har               # HAR and Charles .chlsj exports are detected
+  %(prog)s res/                      # Analyze all capture files of a directory
         """
     )
     
     parser.add_argument(
         "file_path", 
-        nargs="?", 
-        default=DEFAULT_CSV_FILE_PATH,
-        help="Path to CSV file to process (default: {})".format(DEFAULT_CSV_FILE_PATH)
+        nargs="*", 
+        default=[DEFAULT_CSV_FILE_PATH],
+        help="Capture files, glob patterns or directories to process; several files are "
+             "analyzed per file and together (default: {})".format(DEFAULT_CSV_FILE_PATH)
+    )
+    
+    parser.add_argument(
+        "--url-cache-size",
+        type=int,
+        default=DEFAULT_URL_CACHE_SIZE,
+        help="Number of normalized URLs to cache, 0 disables caching (default: {})".format(DEFAULT_URL_CACHE_SIZE)
+    )
+    
+    parser.add_argument(
+        "--key-mode",
+        choices=KEY_MODES,
+        default="string",
+        help="Group by full comparison keys or by fixed-width hashes of them (default: string)"
+    )
+    parser.add_argument(
+        "--digest-size",
+        type=int,
+        choices=DIGEST_SIZES,
+        default=16,
+        help="Digest size in bytes for hashed keys (default: 16)"
+    )
+    parser.add_argument(
+        "--verify-collisions",
+        action="store_true",
+        help="Check full keys of rows sharing a hash digest"
+    )
+    
+    processing = parser.add_mutually_exclusive_group()
+    processing.add_argument(
+        "--workers",
+        type=int,
+        help="Number of worker processes for large files, or files parsed at once "
+             "(default: 1 for a file, one per file up to the number of CPUs for several files)"
+    )
+    processing.add_argument(
+        "--memory-limit",
+        help="Memory budget such as 512M or 2G; spills rows to disk for files larger than RAM"
+    )
+    processing.add_argument(
+        "--approximate",
+        action="store_true",
+        help="Estimate duplicates in fixed memory and report only the most repeated requests"
+    )
+    processing.add_argument(
+        "--window",
+        help="Report only requests repeated within this time, e.g. 5s, 500ms or 2m, "
+             "judged by Request Start Time"
+    )
+    processing.add_argument(
+        "--follow",
+        action="store_true",
+        help="Keep reading lines appended to the file and print duplicate groups as they appear"
+    )
+    parser.add_argument(
+        "--checkpoint",
+        help="Checkpoint file for --follow, to resume without re-reading processed data "
+             "(default: <file>.checkpoint)"
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        help="Seconds between checks for new data with --follow (default: {})".format(DEFAULT_POLL_INTERVAL)
+    )
+    parser.add_argument(
+        "--template",
+        action="store_true",
+        help="Group URLs that differ only by numeric, UUID or hex path segments, "
+             "counting the concrete URLs of every group"
+    )
+    parser.add_argument(
+        "--template-pattern",
+        action="append",
+        default=[],
+        metavar="NAME=REGEX",
+        help="Extra path segment pattern replaced by {NAME} with --template; may be repeated"
+    )
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="Report time and bytes wasted by duplicate requests and latency percentiles per group; "
+             "reads all columns"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print time per stage (parse, normalize, group, output), rows and bytes per second "
+             "and peak memory"
+    )
+    parser.add_argument(
+        "--index",
+        metavar="PATH",
+        help="SQLite signature index to record requests in, reporting how often they were "
+             "seen in earlier runs; created if missing"
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=DEFAULT_TOP,
+        help="Number of most repeated requests reported with --approximate (default: {})".format(DEFAULT_TOP)
+    )
+    parser.add_argument(
+        "--sketch-width",
+        type=int,
+        default=DEFAULT_WIDTH,
+        help="Count-Min sketch width with --approximate; counts are overestimated by at most "
+             "e / width of all rows (default: {})".format(DEFAULT_WIDTH)
+    )
+    parser.add_argument(
+        "--sketch-depth",
+        type=int,
+        default=DEFAULT_DEPTH,
+        help="Count-Min sketch depth with --approximate; the bound fails with probability "
+             "exp(-depth) (default: {})".format(DEFAULT_DEPTH)
+    )
+    parser.add_argument(
+        "--hll-precision",
+        type=int,
+        default=DEFAULT_PRECISION,
+        help="HyperLogLog precision with --approximate, 4 to 18; distinct requests are counted "
+             "with 2 ** precision one-byte registers (default: {})".format(DEFAULT_PRECISION)
+    )
+    parser.add_argument(
+        "--sketch-capacity",
+        type=int,
+        help="Number of Space-Saving counters tracking the most repeated requests with "
+             "--approximate (default: the larger of 4096 and 10 * --top)"
     )
     
     args = parser.parse_args()
-    sys.exit(main(args.file_path))
\ No newline at end of file
+    checkpoint = args.checkpoint
+    if args.follow and checkpoint is None:
+        checkpoint = args.file_path[0] + ".checkpoint"
+    sys.exit(main(args.file_path, url_cache_size=args.url_cache_size, key_mode=args.key_mode,
+                  digest_size=args.digest_size, verify_collisions=args.verify_collisions,
+                  workers=args.workers, memory_limit=args.memory_limit, approximate=args.approximate,
+                  top=args.top, sketch_width=args.sketch_width, sketch_depth=args.sketch_depth,
+                  hll_precision=args.hll_precision, sketch_capacity=args.sketch_capacity, follow=args.follow, checkpoint=checkpoint,
+                  poll_interval=args.poll_interval, index=args.index, window=args.window,
+                  template=args.template, template_patterns=args.template_pattern, metrics=args.metrics,
+                  profile=args.profile))
\ No newline at end of file
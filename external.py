@@ -0,0 +1,447 @@
+"""Out-of-core duplicate detection with spill-to-disk under a memory budget."""
+
+import collections.abc
+import hashlib
+import itertools
+import math
+import os
+import pickle
+import re
+import shutil
+import sys
+import tempfile
+import weakref
+from collections import defaultdict
+from typing import List, Dict, Any, Iterable, Iterator, Mapping, Optional, Tuple
+
+from model import DuplicateFinder, merge_url_variants, _format_key
+
+# Shares of the memory budget: rows buffered for bucket files, distinct keys of the bucket
+# being deduplicated, and duplicate rows sorted before they are written as a run. The rest
+# is headroom for the batch of spilled rows being read back.
+BUFFER_SHARE: float = 0.25
+KEY_TABLE_SHARE: float = 0.25
+RUN_SHARE: float = 0.25
+
+# Largest batch of spilled rows read back at once, in bytes of memory
+MAX_BATCH_BYTES: int = 64 * 1024
+
+# Number of buckets when the input size is unknown
+DEFAULT_BUCKETS: int = 64
+
+# Upper bound for buckets, each keeps two files open while rows are spilled
+MAX_BUCKETS: int = 512
+
+# A bucket whose distinct keys do not fit is split into this many buckets, at most MAX_SPLIT_DEPTH times
+SPLIT_FACTOR: int = 8
+MAX_SPLIT_DEPTH: int = 6
+
+# Memory of a key table entry besides the key: dictionary slots and the [first row, count] list
+_KEY_ENTRY_OVERHEAD = sys.getsizeof([0, 0]) + 2 * sys.getsizeof(1 << 40) + 64
+# Memory of a spilled record besides its key and row: the tuple and its numbers
+_RECORD_OVERHEAD = sys.getsizeof((0, 0, 0, 0, 0)) + 3 * sys.getsizeof(1 << 40)
+
+# Files of a bucket: spilled records, and their row numbers and keys for counting keys
+ROWS_SUFFIX: str = '.rows'
+KEYS_SUFFIX: str = '.keys'
+
+_SIZE_RE = re.compile(r'\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*\Z', re.IGNORECASE)
+_SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+# Spilled records: (row number, key, memory, row) in bucket files and
+# (row number of the group's first row, row number, key, memory, row) when sorted into runs
+BucketRecord = Tuple[int, Any, int, Mapping[str, Any]]
+RunRecord = Tuple[int, int, Any, int, Mapping[str, Any]]
+
+
+def parse_size(value: str) -> int:
+    """
+    Parse a human-readable size such as '512M' or '2GB' into bytes.
+
+    Args:
+        value (str): Size with optional K, M, G or T suffix
+
+    Returns:
+        int: Size in bytes
+
+    Raises:
+        ValueError: If value is not a valid size
+    """
+    match = _SIZE_RE.match(value)
+    if not match:
+        raise ValueError(f"Invalid size: {value}")
+    size = int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+    if size <= 0:
+        raise ValueError(f"Invalid size: {value}")
+    return size
+
+
+def _bucket_count(memory_limit: int, size_hint: Optional[int]) -> int:
+    """
+    Choose the initial number of buckets.
+
+    Keys take less memory than the input lines they come from, so a bucket
+    of size_hint / buckets input bytes usually fits into the key table share
+    of the budget. Buckets that do not fit are split further.
+
+    Args:
+        memory_limit (int): Memory budget in bytes
+        size_hint (Optional[int]): Input size in bytes, if known
+
+    Returns:
+        int: Number of buckets
+    """
+    if size_hint is None:
+        return DEFAULT_BUCKETS
+    buckets = math.ceil(size_hint / (memory_limit * KEY_TABLE_SHARE))
+    return min(max(1, buckets), MAX_BUCKETS)
+
+
+def _row_memory(row: Mapping[str, Any]) -> int:
+    """Memory of a row: the row, a slot per column and the values; column names are shared."""
+    return sys.getsizeof(row) + sys.getsizeof(()) + 8 * len(row) + sum(map(sys.getsizeof, row.values()))
+
+
+def _bucket_of(key: Any, salt: bytes, buckets: int) -> int:
+    """Get the bucket of a key; every salt spreads keys independently."""
+    if isinstance(key, str):
+        key = key.encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8, salt=salt).digest(), 'little') % buckets
+
+
+def _partition(records: Iterable[BucketRecord], buckets: List[str], salt: bytes, buffer_bytes: float) -> None:
+    """
+    Spill records into bucket files by key hash.
+
+    Every bucket has a rows file with the records and a keys file with
+    their row numbers and keys only, so keys can be counted without reading
+    the rows. Records are buffered until they take buffer_bytes of memory
+    together, then every bucket's buffer is written as one batch.
+
+    Args:
+        records (Iterable[BucketRecord]): Records to spill
+        buckets (List[str]): Bucket paths, see ROWS_SUFFIX and KEYS_SUFFIX
+        salt (bytes): Salt of the key hash, see _bucket_of
+        buffer_bytes (float): Memory of buffered records
+    """
+    count = len(buckets)
+    # Batches are pickled whole, so files need no write buffers of their own
+    files = [(open(bucket + ROWS_SUFFIX, 'wb', buffering=0), open(bucket + KEYS_SUFFIX, 'wb', buffering=0))
+             for bucket in buckets]
+    buffers: List[List[BucketRecord]] = [[] for _ in range(count)]
+
+    def flush() -> None:
+        for buffer, (rows_file, keys_file) in zip(buffers, files):
+            if buffer:
+                pickle.dump(buffer, rows_file, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump([record[:2] for record in buffer], keys_file, protocol=pickle.HIGHEST_PROTOCOL)
+                buffer.clear()
+
+    buffered = 0
+    try:
+        for record in records:
+            buffers[_bucket_of(record[1], salt, count)].append(record)
+            buffered += record[2]
+            if buffered >= buffer_bytes:
+                flush()
+                buffered = 0
+        flush()
+    finally:
+        for rows_file, keys_file in files:
+            rows_file.close()
+            keys_file.close()
+
+
+def _remove_bucket(bucket: str) -> None:
+    os.unlink(bucket + ROWS_SUFFIX)
+    os.unlink(bucket + KEYS_SUFFIX)
+
+
+def _read_spill(path: str) -> Iterator[Any]:
+    """
+    Read spilled records back from a bucket file in write order.
+
+    Args:
+        path (str): Rows or keys file path of a bucket
+
+    Yields:
+        Any: Records, one batch of them in memory at a time
+    """
+    with open(path, 'rb', buffering=0) as file:
+        while True:
+            try:
+                batch = pickle.load(file)
+            except EOFError:
+                return
+            yield from batch
+
+
+class _ExternalRun:
+    """
+    State of one analyze_external call: directory, budget and the duplicate groups found so far.
+
+    Rows of duplicate groups are written to run files sorted by the row
+    number of the group's first row, so the rows of a group written by one
+    run are contiguous. Every group is found by its segments, one per run
+    holding its rows: run path, offset of the batch the group starts in,
+    position in that batch and number of rows.
+    """
+
+    def __init__(self, directory: str, memory_limit: int, finder: Optional[DuplicateFinder],
+                 template: bool) -> None:
+        self.directory = directory
+        self.memory_limit = memory_limit
+        self.batch_bytes = max(1, min(MAX_BATCH_BYTES, memory_limit // 64))
+        # Row number of the first row of a group -> group key and segments
+        self.groups: Dict[int, Tuple[Any, List[List[Any]]]] = {}
+        # Group key -> count per raw URL in template mode
+        self.urls: Optional[Dict[Any, Dict[str, int]]] = {} if template else None
+        # Finder verifying hashed keys for collisions, None not to verify
+        self._finder = finder
+        self._files = itertools.count()
+
+    def path(self, kind: str) -> str:
+        """Get a new file path in the directory."""
+        return os.path.join(self.directory, f"{kind}-{next(self._files):06d}")
+
+    def deduplicate(self, bucket: str, depth: int = 0) -> None:
+        """
+        Second pass over a bucket: write the rows of its duplicate groups as sorted runs.
+
+        Keys of the bucket are counted from its keys file, then its rows are
+        read once to collect the rows of keys seen more than once. A bucket
+        whose distinct keys do not fit into the key table share of the
+        budget is split in SPLIT_FACTOR buckets by a differently salted hash
+        instead.
+
+        Args:
+            bucket (str): Bucket path, its files are removed when done
+            depth (int): Number of splits that led to this bucket
+
+        Raises:
+            ValueError: If buckets still do not fit after MAX_SPLIT_DEPTH splits,
+                or collision verification finds two keys with the same digest
+        """
+        table: Dict[Any, List[int]] = {}
+        table_bytes = 0
+        table_limit = self.memory_limit * KEY_TABLE_SHARE
+        for seq, key in _read_spill(bucket + KEYS_SUFFIX):
+            entry = table.get(key)
+            if entry is not None:
+                entry[1] += 1
+                continue
+            table_bytes += sys.getsizeof(key) + _KEY_ENTRY_OVERHEAD
+            # A single key cannot be split further, so the first one is always taken
+            if table_bytes > table_limit and table:
+                break
+            table[key] = [seq, 1]
+        else:
+            self._collect(bucket, table)
+            _remove_bucket(bucket)
+            return
+
+        table.clear()
+        if depth >= MAX_SPLIT_DEPTH:
+            raise ValueError(f"Memory limit of {self.memory_limit} bytes is too small for the keys of the input")
+        parts = [self.path("bucket") for _ in range(SPLIT_FACTOR)]
+        _partition(_read_spill(bucket + ROWS_SUFFIX), parts, bytes([depth + 1]), self.memory_limit * BUFFER_SHARE)
+        _remove_bucket(bucket)
+        for part in parts:
+            self.deduplicate(part, depth + 1)
+
+    def _collect(self, bucket: str, table: Dict[Any, List[int]]) -> None:
+        """Sort rows of duplicate groups of a bucket by first occurrence and write them as runs."""
+        run_limit = self.memory_limit * RUN_SHARE
+        checks: Optional[Dict[Any, bytes]] = {} if self._finder is not None else None
+        urls = self.urls
+        buffer: List[RunRecord] = []
+        buffered = 0
+        for seq, key, size, row in _read_spill(bucket + ROWS_SUFFIX):
+            first, count = table[key]
+            if count < 2:
+                continue
+            if checks is not None:
+                check = self._finder.verified_key(row)[1]
+                expected = checks.setdefault(key, check)
+                if expected is check:
+                    buffered += sys.getsizeof(check)
+                elif expected != check:
+                    raise ValueError(f"Hash collision for key {self._finder.key_text(row)}, "
+                                     f"use a larger digest size")
+            if urls is not None:
+                counts = urls.setdefault(key, {})
+                counts[row['URL']] = counts.get(row['URL'], 0) + 1
+            buffer.append((first, seq, key, size, row))
+            buffered += size
+            if buffered >= run_limit:
+                self._write_run(buffer)
+                buffered = 0
+        if buffer:
+            self._write_run(buffer)
+
+    def _write_run(self, buffer: List[RunRecord]) -> None:
+        """Write buffered rows sorted by group as a run file of (row number, row) batches."""
+        # Row numbers are unique, so sorting never compares keys or rows
+        buffer.sort()
+        path = self.path("run")
+        groups = self.groups
+        with open(path, 'wb', buffering=0) as file:
+            batch: List[Tuple[int, Mapping[str, Any]]] = []
+            size = 0
+            offset = 0
+            for first, seq, key, row_size, row in buffer:
+                entry = groups.get(first)
+                if entry is None:
+                    entry = groups[first] = (key, [])
+                segments = entry[1]
+                if segments and segments[-1][0] is path:
+                    segments[-1][3] += 1
+                else:
+                    segments.append([path, offset, len(batch), 1])
+                batch.append((seq, row))
+                size += row_size
+                if size >= self.batch_bytes:
+                    pickle.dump(batch, file, protocol=pickle.HIGHEST_PROTOCOL)
+                    offset = file.tell()
+                    batch = []
+                    size = 0
+            if batch:
+                pickle.dump(batch, file, protocol=pickle.HIGHEST_PROTOCOL)
+        buffer.clear()
+
+
+class _GroupStore:
+    """Run files of duplicate groups with the segments of every group; removed with their directory."""
+
+    def __init__(self, directory: str, index: Dict[str, List[List[Any]]]) -> None:
+        self.index = index
+        weakref.finalize(self, shutil.rmtree, directory, True)
+
+    def size(self, key: str) -> int:
+        """Get number of rows of a group."""
+        return sum(segment[3] for segment in self.index[key])
+
+    def read(self, key: str) -> Tuple[List[int], List[Mapping[str, Any]]]:
+        """Read row numbers and rows of a group."""
+        numbers: List[int] = []
+        rows: List[Mapping[str, Any]] = []
+        for path, offset, skip, count in self.index[key]:
+            with open(path, 'rb') as file:
+                file.seek(offset)
+                while count:
+                    batch = pickle.load(file)[skip:skip + count]
+                    skip = 0
+                    count -= len(batch)
+                    for number, row in batch:
+                        numbers.append(number)
+                        rows.append(row)
+        return numbers, rows
+
+
+class SpilledGroups(collections.abc.Mapping):
+    """
+    Read-only mapping of duplicate groups kept on disk by analyze_external.
+
+    Keys are listed from memory; rows, or row numbers, of a group are read
+    back from disk when it is looked up, so iterating over the groups holds
+    one of them in memory at a time. The files are removed once no mapping
+    refers to them. Pickling, e.g. to return results from a worker process,
+    turns the mapping into a dictionary.
+    """
+
+    def __init__(self, groups: _GroupStore, row_numbers: bool = False) -> None:
+        self._groups = groups
+        self._row_numbers = row_numbers
+
+    def __getitem__(self, key: str) -> List[Any]:
+        numbers, rows = self._groups.read(key)
+        return numbers if self._row_numbers else rows
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._groups.index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._groups.index)
+
+    def __len__(self) -> int:
+        return len(self._groups.index)
+
+    def __reduce__(self):
+        return (dict, (list(self.items()),))
+
+
+def analyze_external(rows: Iterable[Mapping[str, Any]], memory_limit: int, size_hint: Optional[int] = None,
+                     temp_dir: Optional[str] = None, **options: Any) -> Dict[str, Any]:
+    """
+    Find duplicates in data that does not fit into memory.
+
+    Rows are hash-partitioned by comparison key into temporary bucket files,
+    together with the key, so all rows of a group land in the same bucket and
+    keys are computed once; the keys are also written on their own. Each
+    bucket is then deduplicated on its own: its keys are counted, holding
+    only its distinct keys, and its rows are read once to write the rows of
+    duplicate groups as runs sorted by the group's first occurrence. The
+    result reads groups back from the runs a group at a time.
+
+    So the input is read once and spilled rows once more; only the keys and
+    the rows of duplicate groups are read besides. Memory is bounded by
+    memory_limit plus the result index, a key and a run segment or a few per
+    duplicate group, URL variants in template mode and statistics; reading
+    the result holds one group's rows at a time.
+
+    Args:
+        rows (Iterable[Mapping[str, Any]]): Rows to analyze, e.g. from iter_csv
+        memory_limit (int): Memory budget in bytes
+        size_hint (Optional[int]): Input size in bytes, used to choose the number of buckets
+        temp_dir (Optional[str]): Directory for bucket files, system default if None
+        **options: Key options passed to DuplicateFinder
+
+    Returns:
+        Dict[str, Any]: Processing results, see DuplicateFinder.result, with
+        duplicates and row numbers as SpilledGroups
+
+    Raises:
+        ValueError: If the memory limit is too small for the keys of the input,
+            or collision verification finds two keys with the same digest
+    """
+    finder = DuplicateFinder(**options)
+    verify = options.get('key_mode') == 'hash' and options.get('verify_collisions')
+    directory = tempfile.mkdtemp(prefix="duplicates-", dir=temp_dir)
+    try:
+        run = _ExternalRun(directory, memory_limit, finder if verify else None, bool(options.get('template')))
+        code_counts: Dict[str, int] = defaultdict(int)
+        method_counts: Dict[str, int] = defaultdict(int)
+
+        def records() -> Iterator[BucketRecord]:
+            # Partition by the finder's key, so template mode keeps a template's rows in one bucket
+            key_of = finder.key
+            for number, row in enumerate(rows, 1):
+                code_counts[row.get('Response Code', 'No code')] += 1
+                method_counts[row.get('Method', 'No method')] += 1
+                key = key_of(row)
+                yield number, key, _RECORD_OVERHEAD + sys.getsizeof(key) + _row_memory(row), row
+
+        buckets = [run.path("bucket") for _ in range(_bucket_count(memory_limit, size_hint))]
+        _partition(records(), buckets, b'', memory_limit * BUFFER_SHARE)
+        for bucket in buckets:
+            run.deduplicate(bucket)
+    except BaseException:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+
+    # Groups in order of first occurrence
+    index = {_format_key(key): segments for _, (key, segments) in sorted(run.groups.items())}
+    groups = _GroupStore(directory, index)
+    result = {
+        "total_rows": sum(code_counts.values()),
+        "duplicates_count": sum(groups.size(key) - 1 for key in index),
+        "duplicates": SpilledGroups(groups),
+        "statistics": {'codes': dict(code_counts), 'methods': dict(method_counts)},
+        "duplicate_groups": len(index)
+    }
+    if options.get('row_numbers'):
+        result["row_numbers"] = SpilledGroups(groups, row_numbers=True)
+    if run.urls is not None:
+        result["variants"] = {_format_key(key): merge_url_variants(run.urls[key])
+                              for _, (key, _) in sorted(run.groups.items())}
+    return result
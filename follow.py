@@ -0,0 +1,147 @@
+"""Incremental duplicate detection on a growing log file."""
+
+import copy
+import logging
+import os
+import pickle
+import tempfile
+from typing import List, Dict, Any, Mapping, Optional, Tuple
+
+from model import CsvRowParser, DuplicateFinder, STREAM_CHUNK_SIZE, _format_key
+
+logger = logging.getLogger(__name__)
+
+# Bump when the checkpoint layout changes, older checkpoints are then ignored
+CHECKPOINT_VERSION: int = 3
+
+
+class LogFollower:
+    """
+    Tail a CSV log and keep duplicate groups and statistics up to date.
+
+    Every poll reads only bytes appended since the previous one. An
+    incomplete last record waits in the parser until the rest is written.
+    The byte offset, parser and finder state can be saved to a checkpoint,
+    so a restarted follower continues where it stopped. When the file is
+    replaced or truncated, the follower starts over from its beginning.
+
+    The offset and parser move past a chunk only once all its rows are
+    parsed and added, so a chunk that fails to parse is read again by the
+    next poll or run instead of being skipped.
+    """
+
+    def __init__(self, file_path: str, checkpoint_path: Optional[str] = None,
+                 skip_header: bool = True, full_rows: bool = False, **options: Any) -> None:
+        """
+        Create a follower, resuming from the checkpoint if there is a matching one.
+
+        Args:
+            file_path (str): Path to the growing CSV file
+            checkpoint_path (Optional[str]): Checkpoint file, no checkpoints if None
+            skip_header (bool): Whether to skip header row
+            full_rows (bool): Keep all columns instead of only REPORT_FIELDS
+            **options: Key options passed to DuplicateFinder
+        """
+        self.file_path = os.path.abspath(file_path)
+        self.checkpoint_path = checkpoint_path
+        self._skip_header = skip_header
+        self._full_rows = full_rows
+        self._options = options
+        self._reset()
+        if checkpoint_path is not None and os.path.exists(checkpoint_path):
+            self._load_checkpoint()
+
+    def _reset(self) -> None:
+        self.offset = 0
+        self._identity: Optional[Tuple[int, int]] = None
+        self.parser = CsvRowParser(self._skip_header, self._full_rows)
+        self.finder = DuplicateFinder(**self._options)
+
+    def poll(self) -> List[Tuple[str, List[Mapping[str, Any]]]]:
+        """
+        Process data appended since the last poll.
+
+        Returns:
+            List[Tuple[str, List[Mapping[str, Any]]]]: Key and all rows of every
+            duplicate group that appeared or grew, in order of their first change
+
+        Raises:
+            ValueError: If data is not valid UTF-8 or required fields are missing
+        """
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return []
+
+        identity = (stat.st_dev, stat.st_ino)
+        if self._identity is not None and (identity != self._identity or stat.st_size < self.offset):
+            logger.warning(f"{self.file_path} was replaced or truncated, starting over")
+            self._reset()
+        self._identity = identity
+        if stat.st_size == self.offset:
+            return []
+
+        finder = self.finder
+        updated: Dict[Any, None] = {}
+        with open(self.file_path, 'rb') as file:
+            file.seek(self.offset)
+            while True:
+                chunk = file.read(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                # Feed a copy, so a failing chunk leaves the parser as it was after the last good one
+                parser = copy.copy(self.parser)
+                for row in parser.feed(chunk):
+                    key = finder.add(row)
+                    if len(finder.group(key)) > 1:
+                        updated[key] = None
+                self.parser = parser
+                self.offset += len(chunk)
+
+        return [(_format_key(key), finder.group(key)) for key in updated]
+
+    def result(self) -> Dict[str, Any]:
+        """
+        Get results for all data processed so far.
+
+        Returns:
+            Dict[str, Any]: Processing results, see DuplicateFinder.result
+        """
+        return self.finder.result()
+
+    def save_checkpoint(self) -> None:
+        """Write offset and state to the checkpoint file, replacing it atomically."""
+        if self.checkpoint_path is None:
+            return
+        state = {
+            "version": CHECKPOINT_VERSION,
+            "file_path": self.file_path,
+            "identity": self._identity,
+            "options": [self._skip_header, self._full_rows, self._options],
+            "offset": self.offset,
+            "parser": self.parser,
+            "finder": self.finder
+        }
+        directory = os.path.dirname(os.path.abspath(self.checkpoint_path))
+        with tempfile.NamedTemporaryFile(dir=directory, suffix='.tmp', delete=False) as file:
+            pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(file.name, self.checkpoint_path)
+
+    def _load_checkpoint(self) -> None:
+        """Restore state from the checkpoint if it belongs to the same file and options."""
+        try:
+            with open(self.checkpoint_path, 'rb') as file:
+                state = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.checkpoint_path}: {str(e)}")
+            return
+
+        if (state.get("version") != CHECKPOINT_VERSION or state["file_path"] != self.file_path
+                or state["options"] != [self._skip_header, self._full_rows, self._options]):
+            logger.warning(f"Ignoring checkpoint {self.checkpoint_path} made for another file or options")
+            return
+        self.offset = state["offset"]
+        self._identity = state["identity"]
+        self.parser = state["parser"]
+        self.finder = state["finder"]
+        logger.info(f"Resuming {self.file_path} at byte {self.offset}")
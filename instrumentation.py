@@ -0,0 +1,476 @@
+"""Stage timers, row and byte counters, peak memory and Prometheus metrics of analysis runs."""
+
+import cProfile
+import contextlib
+import itertools
+import mmap
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Rows parsed between two clock reads when timing the parse stage
+PARSE_BATCH_SIZE: int = 1024
+
+# Seconds between two memory samples
+MEMORY_SAMPLE_INTERVAL: float = 0.05
+
+# Histogram buckets of stage and request durations in seconds, and of peak memory in bytes
+SECONDS_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+                                      60.0, 120.0, 300.0)
+MEMORY_BUCKETS: Tuple[float, ...] = tuple(float(2 ** power * 1024 * 1024) for power in range(4, 14))
+
+METRICS_PREFIX: str = 'duplicate_finder'
+PROMETHEUS_MEDIA_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def current_memory() -> Optional[int]:
+    """
+    Get resident memory of this process.
+
+    Returns:
+        Optional[int]: Resident set size in bytes; where it cannot be read,
+        the peak size so far, or None without the resource module
+    """
+    try:
+        with open('/proc/self/statm', 'rb') as file:
+            return int(file.read().split()[1]) * mmap.PAGESIZE
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class RunProfile:
+    """
+    Time spent per stage of one analysis, rows and bytes processed and peak memory.
+
+    Stages nest: a stage's time excludes the time of stages recorded while
+    it runs, so the parse and normalize time of rows consumed inside the
+    'group' stage are not counted twice. Streamed rows are parsed lazily
+    while grouping, so parsing is timed by timed_rows and key computation,
+    which is mostly URL normalization, by timed_keys.
+
+    Timing every key costs two clock reads per row, about a quarter of the
+    grouping time, so it is done only when asked for; otherwise key
+    computation counts in the enclosing stage. Parsing is timed per batch of
+    rows and is cheap enough to be always on.
+
+    A profile is used by one thread at a time.
+    """
+
+    def __init__(self, time_keys: bool = True) -> None:
+        """
+        Create an empty profile.
+
+        Args:
+            time_keys (bool): Let timed_keys time key computation as the 'normalize' stage
+        """
+        self.time_keys = time_keys
+        self.stages: Dict[str, float] = defaultdict(float)
+        self.rows: int = 0
+        self.bytes: int = 0
+        self.peak_memory: Optional[int] = None
+        self._started = time.perf_counter()
+        # Time recorded so far by stages nested in the running one
+        self._nested = 0.0
+
+    def add(self, name: str, seconds: float) -> None:
+        """
+        Add time to a stage.
+
+        Args:
+            name (str): Stage name
+            seconds (float): Time spent
+        """
+        self.stages[name] += seconds
+        self._nested += seconds
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Time a block as a stage, excluding stages recorded inside it.
+
+        Args:
+            name (str): Stage name
+        """
+        nested = self._nested
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stages[name] += elapsed - (self._nested - nested)
+            self._nested = nested + elapsed
+
+    def timed_rows(self, rows: Iterable[Any]) -> Iterator[Any]:
+        """
+        Time reading of rows as the 'parse' stage.
+
+        Rows are pulled in batches of PARSE_BATCH_SIZE, so the clock is read
+        once per batch rather than once per row.
+
+        Args:
+            rows (Iterable[Any]): Lazily parsed rows
+
+        Yields:
+            Any: The same rows
+        """
+        rows = iter(rows)
+        while True:
+            start = time.perf_counter()
+            batch = list(itertools.islice(rows, PARSE_BATCH_SIZE))
+            self.add('parse', time.perf_counter() - start)
+            if not batch:
+                return
+            yield from batch
+
+    def timed_keys(self, finder: Any) -> Any:
+        """
+        Time comparison key computation of a finder as the 'normalize' stage.
+
+        Does nothing unless the profile was created with time_keys.
+
+        Args:
+            finder (Any): DuplicateFinder, whose key methods are wrapped on this instance only
+
+        Returns:
+            Any: The same finder
+        """
+        if not self.time_keys:
+            return finder
+        clock = time.perf_counter
+        add = self.add
+
+        def timed(key: Callable[[Any], Any]) -> Callable[[Any], Any]:
+            def timed_key(row: Any) -> Any:
+                start = clock()
+                result = key(row)
+                add('normalize', clock() - start)
+                return result
+            return timed_key
+
+        finder.key = timed(finder.key)
+        finder.verified_key = timed(finder.verified_key)
+        return finder
+
+    @contextlib.contextmanager
+    def sample_memory(self, interval: float = MEMORY_SAMPLE_INTERVAL) -> Iterator[None]:
+        """
+        Sample resident memory in a background thread while the block runs and keep the peak.
+
+        Memory is that of the whole process, so runs sharing a process with
+        other work see its memory too.
+
+        Args:
+            interval (float): Seconds between samples
+        """
+        stop = threading.Event()
+
+        def sample() -> None:
+            while True:
+                self._sample()
+                if stop.wait(interval):
+                    return
+
+        sampler = threading.Thread(target=sample, name='memory-sampler', daemon=True)
+        sampler.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            sampler.join()
+            self._sample()
+
+    def _sample(self) -> None:
+        memory = current_memory()
+        if memory is not None and (self.peak_memory is None or memory > self.peak_memory):
+            self.peak_memory = memory
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Get the profile as plain data, e.g. to send it from a worker process.
+
+        Returns:
+            Dict[str, Any]: Seconds since the profile was created, seconds per
+            stage, rows, bytes and peak memory in bytes
+        """
+        return {
+            "seconds": time.perf_counter() - self._started,
+            "stages": dict(self.stages),
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "peak_memory_bytes": self.peak_memory
+        }
+
+
+def server_timing(profile: Dict[str, Any]) -> str:
+    """
+    Format stage times of a profile for the Server-Timing response header.
+
+    Args:
+        profile (Dict[str, Any]): Result of RunProfile.to_dict
+
+    Returns:
+        str: Header value, e.g. 'parse;dur=12.5, group;dur=3.1'
+    """
+    return ', '.join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in profile["stages"].items())
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ''
+    pairs = ','.join('{}="{}"'.format(name, value.replace('\\', '\\\\').replace('"', '\\"'))
+                     for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+class Counter:
+    """Prometheus counter with optional labels."""
+
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, *labels: str) -> None:
+        """Add amount to the series of the given label values."""
+        with self._lock:
+            self._values[labels] += amount
+
+    def expose(self) -> List[str]:
+        """Render the counter in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, labels)} {value:g}")
+        return lines
+
+
+class Histogram:
+    """Prometheus histogram with fixed buckets and optional labels."""
+
+    def __init__(self, name: str, description: str, buckets: Tuple[float, ...],
+                 labels: Tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        self.labels = labels
+        # Per label values: count per bucket, the last one for +Inf, and the sum
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Record a value in the series of the given label values."""
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            counts, total = series
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+            total[0] += value
+
+    def expose(self) -> List[str]:
+        """Render the histogram in the Prometheus text format, with cumulative buckets."""
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        names = self.labels + ('le',)
+        with self._lock:
+            for labels, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else f"{bound:g}"
+                    lines.append(f"{self.name}_bucket{_labels(names, labels + (le,))} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.labels, labels)} {total[0]:g}")
+                lines.append(f"{self.name}_count{_labels(self.labels, labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Metrics of analyses served by this process."""
+
+    def __init__(self) -> None:
+        self.request_seconds = Histogram(f"{METRICS_PREFIX}_request_seconds",
+                                         "Time to answer an analysis request.", SECONDS_BUCKETS, ('endpoint',))
+        self.stage_seconds = Histogram(f"{METRICS_PREFIX}_stage_seconds",
+                                       "Time spent per analysis stage.", SECONDS_BUCKETS, ('stage',))
+        self.peak_memory = Histogram(f"{METRICS_PREFIX}_peak_memory_bytes",
+                                     "Peak resident memory of the process during an analysis.", MEMORY_BUCKETS)
+        self.rows = Counter(f"{METRICS_PREFIX}_rows_total", "Rows analyzed.")
+        self.bytes = Counter(f"{METRICS_PREFIX}_bytes_total", "Bytes of uploads analyzed.")
+
+    def record(self, endpoint: str, seconds: float, profile: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Record an answered request and the profile of its analysis, if it ran one.
+
+        Args:
+            endpoint (str): Endpoint name
+            seconds (float): Time to answer the request
+            profile (Optional[Dict[str, Any]]): Result of RunProfile.to_dict,
+                None for results taken from a cache
+        """
+        self.request_seconds.observe(seconds, endpoint)
+        if profile is None:
+            return
+        for name, stage_seconds in profile["stages"].items():
+            self.stage_seconds.observe(stage_seconds, name)
+        if profile["peak_memory_bytes"] is not None:
+            self.peak_memory.observe(profile["peak_memory_bytes"])
+        self.rows.inc(profile["rows"])
+        self.bytes.inc(profile["bytes"])
+
+    def expose(self) -> str:
+        """
+        Render all metrics in the Prometheus text format.
+
+        Returns:
+            str: Metrics text
+        """
+        lines: List[str] = []
+        for metric in (self.request_seconds, self.stage_seconds, self.peak_memory, self.rows, self.bytes):
+            lines.extend(metric.expose())
+        return '\n'.join(lines) + '\n'
+
+
+_metrics_registry = MetricsRegistry()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """
+    Get the shared metrics registry.
+
+    Returns:
+        MetricsRegistry: Registry of this process
+    """
+    return _metrics_registry
+
+
+class RequestProfiler:
+    """
+    Choose requests to run under cProfile and where to dump their statistics.
+
+    Requests are profiled when they ask for it or, at sample_rate, at random.
+    Statistics are kept only for runs that took at least min_seconds, so
+    sampling collects slow requests. cProfile roughly doubles the time of
+    a run; one run is profiled at a time.
+    """
+
+    def __init__(self, directory: Optional[str] = None, sample_rate: float = 0.0,
+                 min_seconds: float = 0.0) -> None:
+        """
+        Configure request profiling.
+
+        Args:
+            directory (Optional[str]): Directory for .prof dumps, None disables profiling
+            sample_rate (float): Share of requests profiled without asking, 0 to 1
+            min_seconds (float): Dumps of faster runs are discarded
+
+        Raises:
+            ValueError: If sample_rate is not between 0 and 1
+        """
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("Profile sample rate must be between 0 and 1")
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.min_seconds = min_seconds
+
+    def dump_path(self, requested: bool = False) -> Optional[str]:
+        """
+        Decide whether to profile a request.
+
+        Args:
+            requested (bool): Whether the request asked to be profiled
+
+        Returns:
+            Optional[str]: Path of a new .prof file, None not to profile
+        """
+        if self.directory is None or not (requested or random.random() < self.sample_rate):
+            return None
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.prof"
+        return os.path.join(self.directory, name)
+
+
+_request_profiler = RequestProfiler()
+
+# cProfile cannot profile two runs of a process at once
+_profiling_lock = threading.Lock()
+
+
+def configure_request_profiler(directory: Optional[str] = None, sample_rate: float = 0.0,
+                               min_seconds: float = 0.0) -> None:
+    """
+    Replace the shared request profiler.
+
+    Args:
+        directory (Optional[str]): Directory for .prof dumps, None disables profiling
+        sample_rate (float): Share of requests profiled without asking
+        min_seconds (float): Dumps of faster runs are discarded
+    """
+    global _request_profiler
+    _request_profiler = RequestProfiler(directory, sample_rate, min_seconds)
+
+
+def get_request_profiler() -> RequestProfiler:
+    """
+    Get the shared request profiler.
+
+    Returns:
+        RequestProfiler: Request profiler of this process
+    """
+    return _request_profiler
+
+
+@contextlib.contextmanager
+def profiled(path: Optional[str], min_seconds: float = 0.0) -> Iterator[Dict[str, Optional[str]]]:
+    """
+    Run a block under cProfile and dump its statistics if it was slow.
+
+    Only the calling thread is profiled. When another run is being
+    profiled, or path is None, the block runs without profiling.
+
+    Args:
+        path (Optional[str]): File to dump statistics to, see pstats
+        min_seconds (float): Statistics of faster runs are discarded
+
+    Yields:
+        Dict[str, Optional[str]]: Holds the dump path under 'dump' after the
+        block if statistics were written, None otherwise
+    """
+    outcome: Dict[str, Optional[str]] = {"dump": None}
+    if path is None or not _profiling_lock.acquire(blocking=False):
+        yield outcome
+        return
+    try:
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            yield outcome
+        finally:
+            profiler.disable()
+            if time.perf_counter() - start >= min_seconds:
+                profiler.dump_stats(path)
+                outcome["dump"] = path
+    finally:
+        _profiling_lock.release()
@@ -0,0 +1,252 @@
+"""Background analysis jobs for uploads too large for a synchronous request."""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from typing import Dict, Any, Callable, Iterable, Iterator, Optional, BinaryIO, TypeVar
+
+from pool import AnalysisPool
+
+T = TypeVar('T')
+
+JOB_STATUSES = ('queued', 'running', 'done', 'failed')
+
+# Defaults for the shared job manager
+DEFAULT_JOB_WORKERS: int = 1
+DEFAULT_MAX_QUEUED: int = 16
+DEFAULT_RESULT_TTL: float = 3600.0
+DEFAULT_MAX_RESULTS: int = 64
+
+# Number of rows between progress updates
+PROGRESS_INTERVAL: int = 10000
+
+
+def track_progress(rows: Iterable[T], callback: Callable[[int], None],
+                   interval: int = PROGRESS_INTERVAL) -> Iterator[T]:
+    """
+    Pass rows through, reporting the number of rows seen so far.
+
+    Args:
+        rows (Iterable[T]): Rows to pass through
+        callback (Callable[[int], None]): Called with the row count every interval rows and at the end
+        interval (int): Number of rows between calls
+
+    Yields:
+        T: Rows unchanged
+    """
+    count = 0
+    for count, row in enumerate(rows, 1):
+        if count % interval == 0:
+            callback(count)
+        yield row
+    callback(count)
+
+
+class Job:
+    """State of one background analysis."""
+
+    def __init__(self, job_id: str, path: str, size: int) -> None:
+        self.id = job_id
+        self.path = path
+        self.size = size
+        self.status = 'queued'
+        self.rows_processed = 0
+        self.error: Optional[str] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    def set_progress(self, rows: int) -> None:
+        """
+        Record number of rows processed so far.
+
+        Args:
+            rows (int): Rows processed
+        """
+        self.rows_processed = rows
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Get job status without the result.
+
+        Returns:
+            Dict[str, Any]: Id, status, progress, error and timestamps
+        """
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "rows_processed": self.rows_processed,
+            "bytes_total": self.size,
+            "error": self.error,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished
+        }
+
+
+class JobManager:
+    """
+    Run analyses in the background and keep their results for a while.
+
+    Uploads are stored on local disk, analyzed by a thread pool with a
+    bounded queue and deleted once processed. Finished jobs are evicted
+    result_ttl seconds after they finish, and the oldest of them as soon as
+    more than max_results are kept.
+    """
+
+    def __init__(self, workers: int = DEFAULT_JOB_WORKERS, max_queued: int = DEFAULT_MAX_QUEUED,
+                 result_ttl: float = DEFAULT_RESULT_TTL, directory: Optional[str] = None,
+                 max_results: int = DEFAULT_MAX_RESULTS) -> None:
+        if result_ttl < 0:
+            raise ValueError("Job result TTL must not be negative")
+        if max_results < 0:
+            raise ValueError("Job max results must not be negative")
+        # Threads share memory with the server, so job progress is visible to requests
+        self._pool = AnalysisPool('thread', workers, max_queued)
+        self.result_ttl = result_ttl
+        self.max_results = max_results
+        self.directory = directory
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, stream: BinaryIO, task: Callable[..., Dict[str, Any]], **options: Any) -> Job:
+        """
+        Store an upload and queue its analysis.
+
+        Args:
+            stream (BinaryIO): Uploaded data
+            task (Callable[..., Dict[str, Any]]): Called as task(stream, size, progress=..., **options)
+            **options: Options passed to task
+
+        Returns:
+            Job: Queued job
+
+        Raises:
+            PoolSaturatedError: If the job queue is full
+        """
+        self.evict_expired()
+        # Take a queue slot first, so uploads are not copied to disk only to be rejected
+        self._pool.reserve()
+        try:
+            with tempfile.NamedTemporaryFile(prefix="job-", suffix=".upload", dir=self.directory,
+                                             delete=False) as upload:
+                shutil.copyfileobj(stream, upload)
+        except BaseException:
+            self._pool.release()
+            raise
+        job = Job(uuid.uuid4().hex, upload.name, os.path.getsize(upload.name))
+        try:
+            self._pool.submit_reserved(self._run, job, task, options)
+        except BaseException:
+            os.unlink(job.path)
+            raise
+        with self._lock:
+            self._jobs[job.id] = job
+        return job
+
+    def _run(self, job: Job, task: Callable[..., Dict[str, Any]], options: Dict[str, Any]) -> None:
+        job.status = 'running'
+        job.started = time.time()
+        try:
+            with open(job.path, 'rb') as stream:
+                job.result = task(stream, job.size, progress=job.set_progress, **options)
+            job.status = 'done'
+        except Exception as e:
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            os.unlink(job.path)
+            job.finished = time.time()
+        self.evict_expired()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        Find a job that has not been evicted.
+
+        Args:
+            job_id (str): Job id
+
+        Returns:
+            Optional[Job]: Job, or None if unknown or expired
+        """
+        self.evict_expired()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def evict_expired(self) -> int:
+        """
+        Drop jobs that finished more than result_ttl seconds ago, and the
+        oldest finished jobs beyond max_results.
+
+        Returns:
+            int: Number of evicted jobs
+        """
+        deadline = time.time() - self.result_ttl
+        with self._lock:
+            finished = sorted((job for job in self._jobs.values() if job.finished is not None),
+                              key=lambda job: job.finished)
+            expired = sum(1 for job in finished if job.finished < deadline)
+            evicted = max(expired, len(finished) - self.max_results)
+            for job in finished[:evicted]:
+                del self._jobs[job.id]
+        return evicted
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get number of jobs by status and pool counters.
+
+        Returns:
+            Dict[str, Any]: Job counts by status, result TTL, result cap and pool counters
+        """
+        with self._lock:
+            counts = {job_status: 0 for job_status in JOB_STATUSES}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        return {"jobs": counts, "result_ttl": self.result_ttl, "max_results": self.max_results,
+                "pool": self._pool.stats()}
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop job workers.
+
+        Args:
+            wait (bool): Wait for running jobs to finish
+        """
+        self._pool.shutdown(wait=wait)
+
+
+# Shared by all requests of a server process, configured at startup
+_job_manager = JobManager()
+
+
+def configure_job_manager(workers: int = DEFAULT_JOB_WORKERS, max_queued: int = DEFAULT_MAX_QUEUED,
+                          result_ttl: float = DEFAULT_RESULT_TTL, directory: Optional[str] = None,
+                          max_results: int = DEFAULT_MAX_RESULTS) -> None:
+    """
+    Replace the shared job manager.
+
+    Args:
+        workers (int): Number of jobs running at once
+        max_queued (int): Number of jobs allowed to wait for a free worker
+        result_ttl (float): Seconds to keep finished jobs
+        directory (Optional[str]): Directory for stored uploads, system temp directory if None
+        max_results (int): Number of finished jobs kept, the oldest are evicted first
+    """
+    global _job_manager
+    manager = JobManager(workers, max_queued, result_ttl, directory, max_results)
+    _job_manager.shutdown(wait=False)
+    _job_manager = manager
+
+
+def get_job_manager() -> JobManager:
+    """
+    Get the shared job manager.
+
+    Returns:
+        JobManager: Job manager used by API endpoints
+    """
+    return _job_manager
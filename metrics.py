@@ -0,0 +1,156 @@
+"""Cost of duplicate requests: wasted time and bytes and latency percentiles per group."""
+
+import math
+from typing import Dict, Any, List, Mapping, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # Metrics are computed in pure Python without NumPy
+    np = None
+
+# Columns of Charles exports the metrics are computed from
+DURATION_FIELD: str = 'Duration (ms)'
+LATENCY_FIELD: str = 'Latency (ms)'
+REQUEST_BYTES_FIELD: str = 'Request Body Size (bytes)'
+RESPONSE_BYTES_FIELD: str = 'Response Body Size (bytes)'
+METRIC_FIELDS: Tuple[str, ...] = (DURATION_FIELD, LATENCY_FIELD, REQUEST_BYTES_FIELD, RESPONSE_BYTES_FIELD)
+
+# Latency percentiles reported
+PERCENTILES: Tuple[int, ...] = (50, 95, 99)
+
+
+def _number(value: Optional[str]) -> float:
+    """Parse a numeric cell, NaN if it is empty or not a number."""
+    if not value:
+        return math.nan
+    try:
+        return float(value)
+    except ValueError:
+        return math.nan
+
+
+def _columns(groups: Mapping[str, Sequence[Mapping[str, Any]]]) -> Dict[str, List[float]]:
+    """Read METRIC_FIELDS of all rows of all groups, group after group."""
+    columns: Dict[str, List[float]] = {field: [] for field in METRIC_FIELDS}
+    for rows in groups.values():
+        for field, values in columns.items():
+            values.extend(_number(row.get(field)) for row in rows)
+    return columns
+
+
+def _rounded(value: float) -> Optional[float]:
+    return None if math.isnan(value) else round(value, 3)
+
+
+def _percentiles(values: Sequence[float]) -> Dict[str, Optional[float]]:
+    """Linearly interpolated percentiles of sorted values without NaN, as numpy.percentile."""
+    result: Dict[str, Optional[float]] = {}
+    for q in PERCENTILES:
+        if not values:
+            result[f"p{q}"] = None
+            continue
+        position = q / 100 * (len(values) - 1)
+        low = int(position)
+        high = min(low + 1, len(values) - 1)
+        result[f"p{q}"] = _rounded(values[low] + (values[high] - values[low]) * (position - low))
+    return result
+
+
+def _summary(requests: int, wasted_duration: float, wasted_bytes: float,
+             latency: Dict[str, Optional[float]]) -> Dict[str, Any]:
+    return {
+        "requests": requests,
+        "wasted_duration_ms": round(wasted_duration, 3),
+        "wasted_bytes": int(wasted_bytes),
+        "latency_ms": latency
+    }
+
+
+def _metrics_numpy(groups: Mapping[str, Sequence[Mapping[str, Any]]]) -> Dict[str, Any]:
+    """Compute metrics with vectorized group-by operations over flat arrays of all rows."""
+    keys = list(groups)
+    sizes = np.fromiter((len(rows) for rows in groups.values()), dtype=np.int64, count=len(keys))
+    columns = {field: np.asarray(values, dtype=np.float64) for field, values in _columns(groups).items()}
+    group_ids = np.repeat(np.arange(len(keys)), sizes)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+
+    # Every request of a group but the first is wasted; missing values count as 0
+    wasted = np.ones(len(group_ids), dtype=bool)
+    wasted[starts] = False
+    duration = np.nan_to_num(columns[DURATION_FIELD])
+    transferred = np.nan_to_num(columns[REQUEST_BYTES_FIELD]) + np.nan_to_num(columns[RESPONSE_BYTES_FIELD])
+    wasted_duration = np.bincount(group_ids[wasted], weights=duration[wasted], minlength=len(keys))
+    wasted_bytes = np.bincount(group_ids[wasted], weights=transferred[wasted], minlength=len(keys))
+
+    # Sort latencies within groups, missing ones last, then interpolate at per-group positions
+    latency = columns[LATENCY_FIELD]
+    known = ~np.isnan(latency)
+    order = np.lexsort((latency, group_ids))
+    ordered = latency[order]
+    counts = np.bincount(group_ids[known], minlength=len(keys))
+    percentiles = {}
+    for q in PERCENTILES:
+        position = q / 100 * np.maximum(counts - 1, 0)
+        low = np.floor(position).astype(np.int64)
+        high = np.minimum(low + 1, np.maximum(counts - 1, 0))
+        low_values = ordered[np.minimum(starts + low, len(ordered) - 1)]
+        high_values = ordered[np.minimum(starts + high, len(ordered) - 1)]
+        percentiles[q] = np.where(counts > 0, low_values + (high_values - low_values) * (position - low), np.nan)
+
+    result_groups = {
+        key: _summary(int(sizes[i]), float(wasted_duration[i]), float(wasted_bytes[i]),
+                      {f"p{q}": _rounded(float(percentiles[q][i])) for q in PERCENTILES})
+        for i, key in enumerate(keys)
+    }
+    overall = _summary(int(sizes.sum()), float(wasted_duration.sum()), float(wasted_bytes.sum()),
+                       _percentiles(np.sort(latency[known]).tolist()))
+    return {"overall": overall, "groups": result_groups}
+
+
+def _metrics_python(groups: Mapping[str, Sequence[Mapping[str, Any]]]) -> Dict[str, Any]:
+    """Compute the same metrics as _metrics_numpy group by group."""
+    result_groups = {}
+    all_latency: List[float] = []
+    totals = [0, 0.0, 0.0]
+    for key, rows in groups.items():
+        wasted_duration = 0.0
+        wasted_bytes = 0.0
+        for row in rows[1:]:
+            values = [_number(row.get(field)) for field in (DURATION_FIELD, REQUEST_BYTES_FIELD,
+                                                            RESPONSE_BYTES_FIELD)]
+            duration, request_bytes, response_bytes = [0.0 if math.isnan(v) else v for v in values]
+            wasted_duration += duration
+            wasted_bytes += request_bytes + response_bytes
+        latency = sorted(value for value in (_number(row.get(LATENCY_FIELD)) for row in rows)
+                         if not math.isnan(value))
+        all_latency.extend(latency)
+        result_groups[key] = _summary(len(rows), wasted_duration, wasted_bytes, _percentiles(latency))
+        totals[0] += len(rows)
+        totals[1] += wasted_duration
+        totals[2] += wasted_bytes
+    overall = _summary(totals[0], totals[1], totals[2], _percentiles(sorted(all_latency)))
+    return {"overall": overall, "groups": result_groups}
+
+
+def duplicate_metrics(groups: Mapping[str, Sequence[Mapping[str, Any]]]) -> Dict[str, Any]:
+    """
+    Compute the cost of duplicate requests per group and over all groups.
+
+    The first request of a group is taken as the one needed, the others as
+    wasted: their durations and request and response body sizes are
+    summed. Latency percentiles cover every request of a group. Empty or
+    non-numeric cells, e.g. of failed requests, are left out of percentiles
+    and count as 0 in sums. Uses NumPy when it is installed.
+
+    Args:
+        groups (Mapping[str, Sequence[Mapping[str, Any]]]): Duplicate groups
+            with rows holding METRIC_FIELDS, e.g. read with full rows
+
+    Returns:
+        Dict[str, Any]: 'overall' and per key 'groups' summaries with the
+        number of requests, wasted_duration_ms, wasted_bytes and latency_ms
+        percentiles, None where no latency is known
+    """
+    if np is None or not groups:
+        return _metrics_python(groups)
+    return _metrics_numpy(groups)
@@ -1,14 +1,113 @@
 """Data model for processing CSV files and finding duplicates."""
 
+import collections.abc
 import csv
+import functools
+import hashlib
+import io
+import re
+import threading
 import urllib.parse
-from typing import List, Dict, Any, TextIO, Set
-from collections import defaultdict
+from typing import (List, Dict, Any, TextIO, BinaryIO, Set, Iterable, Iterator, Mapping, Tuple, Optional, Callable,
+                    Sequence)
+from collections import defaultdict, OrderedDict
+from operator import itemgetter
+
+from templates import UrlTemplater, get_templater
 
 
 # Required fields for CSV processing
 REQUIRED_FIELDS: Set[str] = {'URL', 'Method', 'Response Code', 'Status'}
 
+# Default number of normalized URLs kept in memory
+DEFAULT_URL_CACHE_SIZE: int = 65536
+
+# Size of chunks read from binary streams such as uploads
+STREAM_CHUNK_SIZE: int = 1024 * 1024
+
+# Comparison key modes: full key strings or fixed-width blake2b digests
+KEY_MODES: Tuple[str, ...] = ('string', 'hash')
+
+# Supported digest sizes in bytes for hashed keys (64 and 128 bits)
+DIGEST_SIZES: Tuple[int, ...] = (8, 16)
+
+# Size in bytes of the independent digest kept per group to verify hashed keys
+CHECK_DIGEST_SIZE: int = 16
+
+# Fields kept by compact rows: everything used for comparison and reporting
+REPORT_FIELDS: Tuple[str, ...] = ('URL', 'Method', 'Response Code', 'Status', 'Request Start Time')
+
+
+class LogRow(collections.abc.Mapping):
+    """
+    Compact read-only row.
+    
+    Stores a tuple of values plus a column mapping shared by all rows of the
+    same file, instead of a dictionary per row. Behaves like a dictionary
+    keyed by column name, so it can be used wherever CSV rows were used.
+    """
+
+    __slots__ = ('_values', '_columns')
+
+    def __init__(self, values: Tuple[Optional[str], ...], columns: Dict[str, int]) -> None:
+        self._values = values
+        self._columns = columns
+
+    def __getitem__(self, key: str) -> Optional[str]:
+        return self._values[self._columns[key]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._columns)
+
+    def __len__(self) -> int:
+        return len(self._columns)
+
+    def __repr__(self) -> str:
+        return f"LogRow({dict(self)!r})"
+
+    def __reduce__(self):
+        return (LogRow, (self._values, self._columns))
+
+    def to_dict(self) -> Dict[str, Optional[str]]:
+        """
+        Convert row to a plain dictionary.
+        
+        Returns:
+            Dict[str, Optional[str]]: Row dictionary
+        """
+        return {name: self._values[i] for name, i in self._columns.items()}
+
+
+def tag_rows(rows: Iterable[Mapping[str, Any]], field: str, value: str) -> Iterator[Mapping[str, Any]]:
+    """
+    Add a column with the same value to every row, e.g. the source file.
+    
+    LogRow values get the tag in front, so one extended column mapping is
+    shared by all rows that shared a mapping before; the new column is
+    still listed last.
+    
+    Args:
+        rows (Iterable[Mapping[str, Any]]): Rows to tag
+        field (str): Name of the added column
+        value (str): Value of the added column
+        
+    Yields:
+        Mapping[str, Any]: Tagged row
+    """
+    columns: Optional[Dict[str, int]] = None
+    extended: Dict[str, int] = {}
+    for row in rows:
+        if isinstance(row, LogRow):
+            if row._columns is not columns:
+                columns = row._columns
+                extended = {name: i + 1 for name, i in columns.items()}
+                extended[field] = 0
+            yield LogRow((value,) + row._values, extended)
+        else:
+            tagged = dict(row)
+            tagged[field] = value
+            yield tagged
+
 
 def read_csv(file_path: str, skip_header: bool = True) -> List[Dict[str, Any]]:
     """
@@ -63,6 +162,320 @@ def _read_csv_file(file_obj: TextIO, skip_header: bool, required_fields: Set[str
     Returns:
         List[Dict[str, Any]]: List of row dictionaries
     """
+    return list(_iter_csv_file(file_obj, skip_header, required_fields))
+
+
+def iter_csv(file_path: str, skip_header: bool = True, full_rows: bool = False) -> Iterator[LogRow]:
+    """
+    Lazily read CSV file row by row.
+    
+    Unlike read_csv, rows are yielded as they are parsed, so the whole
+    file is never held in memory.
+    
+    Args:
+        file_path (str): Path to CSV file
+        skip_header (bool): Whether to skip header row
+        full_rows (bool): Keep all columns instead of only REPORT_FIELDS
+        
+    Yields:
+        LogRow: Compact row
+        
+    Raises:
+        ValueError: If file reading fails or required fields are missing
+    """
+    try:
+        with open(file_path, 'r', newline='', encoding='utf-8') as file:
+            yield from _iter_log_rows(file, skip_header, full_rows, REQUIRED_FIELDS)
+    except FileNotFoundError:
+        raise ValueError(f"File not found: {file_path}")
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError(f"Error reading file: {str(e)}")
+
+
+def iter_csv_from_string(file_buffer: TextIO, skip_header: bool = True,
+                         full_rows: bool = False) -> Iterator[LogRow]:
+    """
+    Lazily read CSV data from a text buffer row by row.
+    
+    Args:
+        file_buffer (TextIO): Text buffer with CSV data
+        skip_header (bool): Whether to skip header row
+        full_rows (bool): Keep all columns instead of only REPORT_FIELDS
+        
+    Yields:
+        LogRow: Compact row
+        
+    Raises:
+        ValueError: If required fields are missing
+    """
+    return _iter_log_rows(file_buffer, skip_header, full_rows, REQUIRED_FIELDS)
+
+
+def iter_csv_stream(stream: BinaryIO, skip_header: bool = True, full_rows: bool = False,
+                    chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[LogRow]:
+    """
+    Lazily read CSV data from a binary stream, e.g. an uploaded file.
+    
+    The stream is read and decoded chunk by chunk, so neither the raw bytes
+    nor the decoded text of the whole stream are ever held in memory.
+    
+    Args:
+        stream (BinaryIO): Binary stream with UTF-8 CSV data
+        skip_header (bool): Whether to skip header row
+        full_rows (bool): Keep all columns instead of only REPORT_FIELDS
+        chunk_size (int): Number of bytes to read at once
+        
+    Yields:
+        LogRow: Compact row
+        
+    Raises:
+        ValueError: If data is not valid UTF-8 or required fields are missing
+    """
+    parser = CsvRowParser(skip_header, full_rows)
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+def _last_record_end(data: bytes) -> int:
+    """
+    Find end of the last complete CSV record in data.
+    
+    A newline ends a record only outside of a quoted field. Escaped quotes
+    inside quoted fields are doubled, so a newline is outside of quotes when
+    the number of quote characters before it is even.
+    
+    Args:
+        data (bytes): Data starting at a record boundary
+        
+    Returns:
+        int: Position right after the last complete record, 0 if there is none
+    """
+    newline = data.rfind(b'\n')
+    if newline < 0:
+        return 0
+    quotes = data.count(b'"', 0, newline)
+    while quotes % 2:
+        previous = data.rfind(b'\n', 0, newline)
+        if previous < 0:
+            return 0
+        quotes -= data.count(b'"', previous, newline)
+        newline = previous
+    return newline + 1
+
+
+class CsvRowParser:
+    """
+    Incremental CSV parser fed with raw bytes.
+    
+    Data may be split anywhere, even inside a multi-byte character or a
+    quoted field: only complete records are decoded and parsed, the rest
+    waits for the next chunk.
+    """
+
+    def __init__(self, skip_header: bool = True, full_rows: bool = False) -> None:
+        """
+        Create a parser positioned at the start of a CSV file.
+        
+        Args:
+            skip_header (bool): Whether to skip header row
+            full_rows (bool): Keep all columns instead of only REPORT_FIELDS
+        """
+        self.header: Optional[List[str]] = None
+        self.rows_parsed: int = 0
+        self.bytes_parsed: int = 0
+        self._full_rows = full_rows
+        self._skip = skip_header
+        self._make_row: Optional[Callable[[List[str]], LogRow]] = None
+        self._missing = False
+        self._pending = b''
+
+    def feed(self, data: bytes) -> List[LogRow]:
+        """
+        Parse next chunk of data.
+        
+        Args:
+            data (bytes): Next chunk of raw CSV data
+            
+        Returns:
+            List[LogRow]: Rows of records completed by this chunk
+            
+        Raises:
+            ValueError: If data is not valid UTF-8 or required fields are missing
+        """
+        buffer = self._pending + data if self._pending else data
+        end = _last_record_end(buffer)
+        self._pending = buffer[end:]
+        return self._parse(buffer[:end]) if end else []
+
+    def close(self) -> List[LogRow]:
+        """
+        Parse remaining data, e.g. a last record without trailing newline.
+        
+        Returns:
+            List[LogRow]: Remaining rows
+            
+        Raises:
+            ValueError: If data is not valid UTF-8 or required fields are missing
+        """
+        data, self._pending = self._pending, b''
+        return self._parse(data) if data else []
+
+    @property
+    def pending_bytes(self) -> int:
+        """Number of buffered bytes of an incomplete record."""
+        return len(self._pending)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The row factory is a closure; it is rebuilt from the header instead of pickled
+        state = self.__dict__.copy()
+        state['_make_row'] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        if self.header is not None:
+            self._make_row = _row_factory(self.header, self._full_rows)
+
+    def _parse(self, data: bytes) -> List[LogRow]:
+        """
+        Parse complete records.
+        
+        Args:
+            data (bytes): Data containing complete records only
+            
+        Returns:
+            List[LogRow]: Parsed rows
+        """
+        try:
+            text = data.decode('utf-8')
+        except UnicodeDecodeError as e:
+            raise ValueError(f"Error reading file: {str(e)}")
+        self.bytes_parsed += len(data)
+
+        rows: List[LogRow] = []
+        for values in csv.reader(io.StringIO(text, newline='')):
+            if self._make_row is None:
+                self.header = values
+                self._make_row = _row_factory(values, self._full_rows)
+                self._missing = not REQUIRED_FIELDS.issubset(values)
+                continue
+            if not values:
+                continue
+            if self._skip:
+                # Same semantics as csv.DictReader based reading
+                self._skip = False
+                continue
+
+            self.rows_parsed += 1
+            # Check for required fields
+            if self._missing:
+                raise ValueError(f"Row {self.rows_parsed}: Missing required fields")
+
+            rows.append(self._make_row(values))
+        return rows
+
+
+def _iter_log_rows(file_obj: TextIO, skip_header: bool, full_rows: bool,
+                   required_fields: Set[str], header: Optional[List[str]] = None) -> Iterator[LogRow]:
+    """
+    Internal generator reading compact rows from file object.
+    
+    Only the header is turned into a column mapping; every data row is kept
+    as a plain tuple of values shared with that mapping.
+    
+    Args:
+        file_obj (TextIO): File object to read from
+        skip_header (bool): Whether to skip header row
+        full_rows (bool): Keep all columns instead of only REPORT_FIELDS
+        required_fields (Set[str]): Set of required fields
+        header (Optional[List[str]]): Header of the file when file_obj starts
+            in the middle of it, otherwise read from file_obj
+        
+    Yields:
+        LogRow: Compact row
+    """
+    csv_reader = csv.reader(file_obj)
+    if header is None:
+        header = next(csv_reader, None)
+        if header is None:
+            return  # Empty file
+
+    make_row = _row_factory(header, full_rows)
+    missing = not required_fields.issubset(header)
+
+    # Skip header if required (same semantics as csv.DictReader based reading)
+    skip = skip_header
+    idx = 0
+    for values in csv_reader:
+        if not values:
+            continue
+        if skip:
+            skip = False
+            continue
+
+        idx += 1
+        # Check for required fields
+        if missing:
+            raise ValueError(f"Row {idx}: Missing required fields")
+
+        yield make_row(values)
+
+
+def _row_factory(header: List[str], full_rows: bool) -> Callable[[List[str]], LogRow]:
+    """
+    Build a function turning raw CSV values into LogRow for given header.
+    
+    Args:
+        header (List[str]): CSV header
+        full_rows (bool): Keep all columns instead of only REPORT_FIELDS
+        
+    Returns:
+        Callable[[List[str]], LogRow]: Row factory
+    """
+    # Later duplicates of a column name win, as with csv.DictReader
+    positions = {name: i for i, name in enumerate(header)}
+
+    if full_rows:
+        width = len(header)
+
+        def make_full_row(values: List[str]) -> LogRow:
+            if len(values) < width:
+                values = values + [None] * (width - len(values))
+            return LogRow(tuple(values), positions)
+
+        return make_full_row
+
+    names = [name for name in REPORT_FIELDS if name in positions]
+    columns = {name: i for i, name in enumerate(names)}
+    picks = [positions[name] for name in names]
+    width = max(picks) + 1 if picks else 0
+
+    def make_compact_row(values: List[str]) -> LogRow:
+        if len(values) < width:
+            values = values + [None] * (width - len(values))
+        return LogRow(tuple([values[i] for i in picks]), columns)
+
+    return make_compact_row
+
+
+def _iter_csv_file(file_obj: TextIO, skip_header: bool, required_fields: Set[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Internal generator reading CSV rows from file object.
+    
+    Args:
+        file_obj (TextIO): File object to read from
+        skip_header (bool): Whether to skip header row
+        required_fields (Set[str]): Set of required fields
+        
+    Yields:
+        Dict[str, Any]: Row dictionary
+    """
     csv_reader = csv.DictReader(file_obj)
     
     # Skip header if required
@@ -70,9 +483,8 @@ def _read_csv_file(file_obj: TextIO, skip_header: bool, required_fields: Set[str
         try:
             next(csv_reader)
         except StopIteration:
-            return []  # Empty file
+            return  # Empty file
 
-    rows: List[Dict[str, Any]] = []
     for idx, row in enumerate(csv_reader, 1):
         if not row:
             continue
@@ -81,15 +493,178 @@ def _read_csv_file(file_obj: TextIO, skip_header: bool, required_fields: Set[str
         if not all(field in row for field in required_fields):
             raise ValueError(f"Row {idx}: Missing required fields")
             
-        rows.append(row)
+        yield row
+
+
+class LRUCache:
+    """
+    Thread-safe bounded cache with least-recently-used eviction.
+    
+    Keeps hit, miss and eviction counters so the cache can be sized from
+    real workloads. A single instance can be shared between threads, e.g.
+    between API requests served by one worker.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self._maxsize = max(0, maxsize)
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key: Any, compute: Callable[[Any], Any]) -> Any:
+        """
+        Get cached value for key, computing and storing it on a miss.
+        
+        Args:
+            key (Any): Cache key, also passed to compute
+            compute (Callable[[Any], Any]): Function computing the value
+            
+        Returns:
+            Any: Cached or freshly computed value
+        """
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._data.move_to_end(key)
+                return value
+
+        # Compute outside of the lock so slow values do not block other threads
+        value = compute(key)
+        self.put(key, value)
+        return value
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """
+        Get cached value for key.
+        
+        Args:
+            key (Any): Cache key
+            default (Any): Value returned on a miss
+            
+        Returns:
+            Any: Cached value or default
+        """
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key: Any, value: Any) -> None:
+        """
+        Store value for key, evicting least recently used entries if full.
         
-    return rows
+        Args:
+            key (Any): Cache key
+            value (Any): Value to store
+        """
+        with self._lock:
+            if self._maxsize == 0:
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self._evict()
+
+    def pop(self, key: Any, default: Any = None) -> Any:
+        """
+        Remove key from cache.
+        
+        Args:
+            key (Any): Cache key
+            default (Any): Value returned if key is not cached
+            
+        Returns:
+            Any: Removed value or default
+        """
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def resize(self, maxsize: int) -> None:
+        """
+        Change cache capacity, evicting entries if it shrinks.
+        
+        Args:
+            maxsize (int): New maximum number of entries, 0 disables caching
+        """
+        with self._lock:
+            self._maxsize = max(0, maxsize)
+            self._evict()
+
+    def clear(self) -> None:
+        """Remove all entries and reset counters."""
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters.
+        
+        Returns:
+            Dict[str, Any]: Size, capacity, hits, misses, evictions and hit rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self._maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _evict(self) -> None:
+        """Drop least recently used entries above capacity; caller holds the lock."""
+        while len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+
+# Normalized URLs shared by all analyses running in this process
+_url_cache = LRUCache(DEFAULT_URL_CACHE_SIZE)
+
+
+def configure_url_cache(maxsize: int) -> None:
+    """
+    Set capacity of the URL normalization cache.
+    
+    Args:
+        maxsize (int): Maximum number of cached URLs, 0 disables caching
+    """
+    _url_cache.resize(maxsize)
+
+
+def url_cache_stats() -> Dict[str, Any]:
+    """
+    Get URL normalization cache counters.
+    
+    Returns:
+        Dict[str, Any]: Size, capacity, hits, misses, evictions and hit rate
+    """
+    return _url_cache.stats()
 
 
 def _normalize_url_for_comparison(url: str) -> str:
     """
     Normalize URL for comparison, including ordering query parameters.
     
+    Reference implementation based on urllib; comparison keys use the
+    faster _canonicalize_url, which produces identical results.
+    
     Args:
         url (str): URL to normalize
         
@@ -126,18 +701,121 @@ def _normalize_url_for_comparison(url: str) -> str:
         return url
 
 
-def _create_comparison_key(row: Dict[str, Any]) -> str:
+# Query keys and values made only of characters that quote_plus() never
+# escapes come out of the parse_qs()/urlencode() round-trip unchanged
+_PLAIN_QUERY_PART_RE = re.compile(r'[A-Za-z0-9_.~-]*\Z')
+
+# URL parts before the query that urlparse()/urlunparse() return unchanged:
+# lowercase scheme, non-empty netloc without IPv6 brackets, a path starting
+# with '/' if any, no path params
+_PLAIN_URL_PREFIX_RE = re.compile(r'[a-z][a-z0-9+.-]*://[^/?#\[\]\s;]+(?:/[^?#\s;]*)?\Z')
+
+_by_name = itemgetter(0)
+_by_pair = itemgetter(1)
+
+
+@functools.lru_cache(maxsize=DEFAULT_URL_CACHE_SIZE)
+def _canonical_query_pair(part: str) -> Tuple[str, str]:
+    """
+    Re-encode one 'name=value' query part exactly like parse_qs() followed by urlencode().
+    
+    Query parts repeat across URLs far more often than whole URLs do, so
+    results are memoized.
+    
+    Args:
+        part (str): Non-empty raw query part
+        
+    Returns:
+        Tuple[str, str]: Decoded name used for sorting, re-encoded 'name=value'
+    """
+    name, _, value = part.partition('=')
+    if _PLAIN_QUERY_PART_RE.match(name):
+        decoded_name = name
+    else:
+        decoded_name = urllib.parse.unquote(name.replace('+', ' '))
+        name = urllib.parse.quote_plus(decoded_name)
+    if not _PLAIN_QUERY_PART_RE.match(value):
+        value = urllib.parse.quote_plus(urllib.parse.unquote(value.replace('+', ' ')))
+    return decoded_name, name + '=' + value
+
+
+def _canonicalize_url(url: str) -> str:
+    """
+    Fast equivalent of _normalize_url_for_comparison.
+    
+    Splits the URL on '?', '&' and '#' directly instead of going through
+    urlparse/parse_qs/urlencode/urlunparse. URLs without a query, or with a
+    plain query that is already ordered, are returned as is; only query
+    parts containing characters that urlencode escapes are re-encoded.
+    Anything unusual (uppercase scheme, path params, control characters,
+    non-ASCII text) falls back to the urllib implementation, so the result
+    is always identical to _normalize_url_for_comparison.
+    
+    Args:
+        url (str): URL to normalize
+        
+    Returns:
+        str: Normalized URL with ordered query parameters
+    """
+    query_start = url.find('?')
+    if query_start < 0:
+        return url
+
+    if 0 <= url.find('#', 0, query_start):
+        # '?' belongs to the fragment, there is no query
+        return url
+
+    fragment_start = url.find('#', query_start)
+    if fragment_start < 0:
+        query = url[query_start + 1:]
+        fragment = None
+    else:
+        query = url[query_start + 1:fragment_start]
+        fragment = url[fragment_start + 1:]
+
+    if not query:
+        return url
+
+    if not (url.isascii()
+            and '\t' not in url and '\r' not in url and '\n' not in url
+            and _PLAIN_URL_PREFIX_RE.match(url, 0, query_start)):
+        return _normalize_url_for_comparison(url)
+
+    pairs = [_canonical_query_pair(part) for part in query.split('&') if part]
+
+    # Stable sort on decoded names keeps values of repeated parameters in
+    # original order, exactly like grouping them with parse_qs before sorting
+    pairs.sort(key=_by_name)
+    normalized_query = '&'.join(map(_by_pair, pairs))
+    if normalized_query == query and fragment != '':
+        return url
+
+    normalized_url = url[:query_start]
+    if normalized_query:
+        normalized_url += '?' + normalized_query
+    if fragment:
+        normalized_url += '#' + fragment
+    return normalized_url
+
+
+def _create_comparison_key(row: Dict[str, Any], templater: Optional[UrlTemplater] = None) -> str:
     """
     Create key for comparing records.
     
     Args:
         row (Dict[str, Any]): Dictionary with row data
+        templater (Optional[UrlTemplater]): Replace IDs in the URL path with
+            placeholders, so requests differing only by IDs share a key
         
     Returns:
         str: Key for comparing records
     """
-    # Normalize URL for exact comparison with query parameters
-    normalized_url = _normalize_url_for_comparison(row['URL'])
+    if templater is None:
+        # Normalize URL for exact comparison with query parameters
+        normalized_url = _url_cache.get_or_compute(row['URL'], _canonicalize_url)
+    else:
+        # Templater normalizes the same way and keeps its own cache
+        normalized_url = templater.template(row['URL'])
     
     # Create key from all critical fields
     key_parts = [
@@ -191,4 +869,446 @@ def get_stats(rows: List[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
         code_counts[code] += 1
         method_counts[method] += 1
         
-    return {'codes': dict(code_counts), 'methods': dict(method_counts)}
\ No newline at end of file
+    return {'codes': dict(code_counts), 'methods': dict(method_counts)}
+
+
+def count_url_variants(rows: Iterable[Mapping[str, Any]]) -> Dict[str, int]:
+    """
+    Count normalized URLs of rows, e.g. of a template mode group.
+    
+    Args:
+        rows (Iterable[Mapping[str, Any]]): Rows of a group
+        
+    Returns:
+        Dict[str, int]: Count per normalized URL, in order of first occurrence
+    """
+    # Count raw URLs first, so every distinct URL is normalized once
+    raw: Dict[str, int] = {}
+    for row in rows:
+        url = row['URL']
+        raw[url] = raw.get(url, 0) + 1
+    return merge_url_variants(raw)
+
+
+def merge_url_variants(raw: Mapping[str, int]) -> Dict[str, int]:
+    """
+    Merge counts of raw URLs into counts per normalized URL.
+    
+    Args:
+        raw (Mapping[str, int]): Count per raw URL, in order of first occurrence
+        
+    Returns:
+        Dict[str, int]: Count per normalized URL, in order of first occurrence
+    """
+    counts: Dict[str, int] = {}
+    for url, count in raw.items():
+        url = _canonicalize_url(url)
+        counts[url] = counts.get(url, 0) + count
+    return counts
+
+
+def _format_key(key: Any) -> str:
+    """
+    Convert internal group key to a printable, JSON-compatible string.
+    
+    Args:
+        key (Any): Comparison key string or digest bytes
+        
+    Returns:
+        str: Key string or hex digest
+    """
+    return key.hex() if isinstance(key, bytes) else key
+
+
+class DuplicateFinder:
+    """
+    Single-pass duplicate detector.
+    
+    Rows are consumed one at a time and the comparison key of each row is
+    computed exactly once. Counts, duplicate groups and statistics are all
+    built in the same pass, so the caller never needs to keep the full list
+    of rows around: only the first row of every distinct key and the rows of
+    duplicate groups are retained.
+    
+    In 'hash' key mode groups are keyed by a blake2b digest of the comparison
+    key, so the group table does not grow with URL length. Collision
+    verification keeps a second, independent SHA-256 digest of each group's
+    key instead of the key itself, so a collision goes unnoticed only if
+    both digests collide. Groups still list all their rows, since results
+    report every duplicate row, so memory is one or two digests per distinct
+    request plus the rows kept: the first row of every request and all rows
+    of duplicate groups.
+    
+    With row_numbers the 1-based position of every row among the added rows
+    is recorded, so groups can be reported by row number instead of content.
+    
+    In template mode URLs are keyed by their template, see UrlTemplater, so
+    groups collect requests that differ only by IDs in the path, and results
+    count the concrete URLs of every group.
+    """
+
+    def __init__(self, key_mode: str = 'string', digest_size: int = 16,
+                 verify_collisions: bool = False, row_numbers: bool = False,
+                 template: bool = False, template_patterns: Sequence[str] = ()) -> None:
+        """
+        Create an empty finder.
+        
+        Args:
+            key_mode (str): 'string' to group by full comparison keys, 'hash'
+                to group by fixed-width digests of them
+            digest_size (int): Digest size in bytes for 'hash' mode, see DIGEST_SIZES
+            verify_collisions (bool): In 'hash' mode, compare full keys of rows
+                sharing a digest with the first row of the group
+            row_numbers (bool): Record row numbers of every group
+            template (bool): Key URLs by their template instead of exactly
+            template_patterns (Sequence[str]): Extra 'name=regex' patterns for
+                path segments replaced in template mode
+            
+        Raises:
+            ValueError: If key mode, digest size or a template pattern is not supported
+        """
+        if key_mode not in KEY_MODES:
+            raise ValueError(f"Unknown key mode: {key_mode}")
+        if digest_size not in DIGEST_SIZES:
+            raise ValueError(f"Unsupported digest size: {digest_size}")
+
+        self.total: int = 0
+        self._hashed = key_mode == 'hash'
+        self._digest_size = digest_size
+        self._verify_collisions = verify_collisions
+        self._groups: Dict[Any, List[Mapping[str, Any]]] = {}
+        # Check digests of the first row of every group when verifying collisions
+        self._checks: Dict[Any, bytes] = {}
+        self._code_counts: Dict[str, int] = defaultdict(int)
+        self._method_counts: Dict[str, int] = defaultdict(int)
+        self._numbers: Optional[Dict[Any, List[int]]] = {} if row_numbers else None
+        self._templater = get_templater(tuple(template_patterns), _canonicalize_url) if template else None
+
+    def add(self, row: Mapping[str, Any]) -> Any:
+        """
+        Add a single row.
+        
+        Args:
+            row (Mapping[str, Any]): Row data, e.g. LogRow
+            
+        Returns:
+            Any: Group key of the row, see key()
+            
+        Raises:
+            ValueError: If collision verification finds two different keys
+                with the same digest
+        """
+        self.total += 1
+        key, check = self.verified_key(row)
+        self.add_keyed(key, row, self.total, check)
+        self._code_counts[row.get('Response Code', 'No code')] += 1
+        self._method_counts[row.get('Method', 'No method')] += 1
+        return key
+
+    def count(self, row: Mapping[str, Any]) -> int:
+        """
+        Count a row in totals and statistics without adding it to a group.
+        
+        Args:
+            row (Mapping[str, Any]): Row data
+            
+        Returns:
+            int: Row number of the row among the counted rows, starting at 1
+        """
+        self.total += 1
+        self._code_counts[row.get('Response Code', 'No code')] += 1
+        self._method_counts[row.get('Method', 'No method')] += 1
+        return self.total
+
+    def key(self, row: Mapping[str, Any]) -> Any:
+        """
+        Get group key of a row.
+        
+        Args:
+            row (Mapping[str, Any]): Row data
+            
+        Returns:
+            Any: Comparison key string, or its digest bytes in 'hash' mode
+        """
+        key = _create_comparison_key(row, self._templater)
+        if self._hashed:
+            return hashlib.blake2b(key.encode('utf-8'), digest_size=self._digest_size).digest()
+        return key
+
+    def verified_key(self, row: Mapping[str, Any]) -> Tuple[Any, Optional[bytes]]:
+        """
+        Get group key of a row and the digest checking it for collisions.
+        
+        The comparison key is built once for both.
+        
+        Args:
+            row (Mapping[str, Any]): Row data
+            
+        Returns:
+            Tuple[Any, Optional[bytes]]: Group key, see key(), and its check
+            digest when verifying collisions in 'hash' mode, None otherwise
+        """
+        key = _create_comparison_key(row, self._templater)
+        if not self._hashed:
+            return key, None
+        data = key.encode('utf-8')
+        digest = hashlib.blake2b(data, digest_size=self._digest_size).digest()
+        if not self._verify_collisions:
+            return digest, None
+        return digest, hashlib.sha256(data).digest()[:CHECK_DIGEST_SIZE]
+
+    def key_text(self, row: Mapping[str, Any]) -> str:
+        """
+        Get comparison key string of a row, the digest input in 'hash' mode.
+        
+        Args:
+            row (Mapping[str, Any]): Row data
+            
+        Returns:
+            str: Comparison key with the URL normalized, or templated in template mode
+        """
+        return _create_comparison_key(row, self._templater)
+
+    @property
+    def template(self) -> bool:
+        """Whether URLs are keyed by their template."""
+        return self._templater is not None
+
+    def add_keyed(self, key: Any, row: Mapping[str, Any], number: int = 0,
+                  check: Optional[bytes] = None) -> None:
+        """
+        Add row to the group with given key without counting it in totals or statistics.
+        
+        Args:
+            key (Any): Group key from key() or verified_key()
+            row (Mapping[str, Any]): Row data
+            number (int): Row number recorded when tracking row numbers
+            check (Optional[bytes]): Check digest from verified_key(), computed
+                from the row if needed and not given
+            
+        Raises:
+            ValueError: If collision verification finds two different keys
+                with the same digest
+        """
+        if self._hashed and self._verify_collisions:
+            if check is None:
+                check = self.verified_key(row)[1]
+            self._check_collision(key, check, row)
+        group = self._groups.get(key)
+        if group is None:
+            self._groups[key] = [row]
+        else:
+            group.append(row)
+
+        if self._numbers is not None:
+            numbers = self._numbers.get(key)
+            if numbers is None:
+                self._numbers[key] = [number]
+            else:
+                numbers.append(number)
+
+    def _check_collision(self, key: Any, check: bytes, row: Mapping[str, Any]) -> None:
+        """
+        Make sure a row sharing the digest of a group really has the same comparison key.
+        
+        The check digest of the first row of a group is kept for the group.
+        
+        Args:
+            key (Any): Digest of the group
+            check (bytes): Check digest of the row's comparison key
+            row (Mapping[str, Any]): Row added to the group, named in the error
+            
+        Raises:
+            ValueError: If check digests differ
+        """
+        expected = self._checks.setdefault(key, check)
+        if expected != check:
+            raise ValueError(f"Hash collision for key {self.key_text(row)}, use a larger digest size")
+
+    def update(self, rows: Iterable[Mapping[str, Any]]) -> 'DuplicateFinder':
+        """
+        Add rows from any iterable, e.g. a lazy CSV reader.
+        
+        Args:
+            rows (Iterable[Mapping[str, Any]]): Rows to add
+            
+        Returns:
+            DuplicateFinder: self, to allow chaining
+        """
+        add = self.add
+        for row in rows:
+            add(row)
+        return self
+
+    def sort_groups(self, order: Callable[[Any], Any]) -> None:
+        """
+        Reorder groups, e.g. for rows added with add_keyed out of input order.
+        
+        Args:
+            order (Callable[[Any], Any]): Sort key of a group, called with the group key
+        """
+        keys = sorted(self._groups, key=order)
+        self._groups = {key: self._groups[key] for key in keys}
+        if self._numbers is not None:
+            self._numbers = {key: self._numbers[key] for key in keys}
+
+    def merge(self, other: 'DuplicateFinder') -> 'DuplicateFinder':
+        """
+        Merge results of a finder that processed rows following these ones.
+        
+        Groups keep the order of first occurrence and row numbers of the other
+        finder are shifted past these rows, as long as finders are merged in
+        the order of the input they processed.
+        
+        Args:
+            other (DuplicateFinder): Finder with the same key options
+            
+        Returns:
+            DuplicateFinder: self, to allow chaining
+            
+        Raises:
+            ValueError: If collision verification finds two different keys
+                with the same digest
+        """
+        offset = self.total
+        self.total += other.total
+
+        groups = self._groups
+        verify = self._hashed and self._verify_collisions
+        for key, rows in other._groups.items():
+            if verify:
+                self._check_collision(key, other._checks[key], rows[0])
+            group = groups.get(key)
+            if group is None:
+                # Copy, so that merging more finders never changes the other finder
+                groups[key] = list(rows)
+            else:
+                group.extend(rows)
+
+        if self._numbers is not None and other._numbers is not None:
+            for key, numbers in other._numbers.items():
+                shifted = [number + offset for number in numbers]
+                own = self._numbers.get(key)
+                if own is None:
+                    self._numbers[key] = shifted
+                else:
+                    own.extend(shifted)
+
+        for code, count in other._code_counts.items():
+            self._code_counts[code] += count
+        for method, count in other._method_counts.items():
+            self._method_counts[method] += count
+        return self
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Get duplicate keys and their counts, same as find_duplicates.
+        
+        In 'hash' mode keys are hex digests.
+        
+        Returns:
+            Dict[str, int]: Dictionary with duplicate keys and their counts
+        """
+        return {_format_key(k): len(v) for k, v in self._groups.items() if len(v) > 1}
+
+    def group(self, key: Any) -> List[Mapping[str, Any]]:
+        """
+        Get rows of one group, duplicate or not.
+        
+        Args:
+            key (Any): Group key as returned by add() or key()
+            
+        Returns:
+            List[Mapping[str, Any]]: Rows of the group in order of addition,
+            empty if no row has the key
+        """
+        return self._groups.get(key, [])
+
+    def iter_groups(self) -> Iterator[Tuple[Any, List[Mapping[str, Any]]]]:
+        """
+        Iterate over all groups, duplicate or not, in order of first occurrence.
+        
+        Yields:
+            Tuple[Any, List[Mapping[str, Any]]]: Group key as returned by key(),
+            and rows of the group
+        """
+        return iter(self._groups.items())
+
+    def groups(self) -> Dict[str, List[Mapping[str, Any]]]:
+        """
+        Get duplicate rows grouped by key, in order of first occurrence.
+        
+        Returns:
+            Dict[str, List[Mapping[str, Any]]]: Dictionary with duplicate entries
+        """
+        return {_format_key(k): v for k, v in self._groups.items() if len(v) > 1}
+
+    def row_numbers(self) -> Dict[str, List[int]]:
+        """
+        Get row numbers of duplicate groups, in the same order as groups().
+        
+        Returns:
+            Dict[str, List[int]]: Dictionary with row numbers of duplicate entries
+            
+        Raises:
+            ValueError: If row numbers are not tracked
+        """
+        if self._numbers is None:
+            raise ValueError("Row numbers are not tracked, create the finder with row_numbers=True")
+        return {_format_key(k): self._numbers[k] for k, v in self._groups.items() if len(v) > 1}
+
+    def variants(self) -> Dict[str, Dict[str, int]]:
+        """
+        Count concrete URLs of duplicate groups, in the same order as groups().
+        
+        Returns:
+            Dict[str, Dict[str, int]]: Count per normalized URL of every group,
+            in order of first occurrence
+        """
+        return {_format_key(key): count_url_variants(rows) for key, rows in self._groups.items() if len(rows) > 1}
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Get statistics on response codes and methods, same as get_stats.
+        
+        Returns:
+            Dict[str, Dict[str, int]]: Dictionary with counts of codes and methods
+        """
+        return {'codes': dict(self._code_counts), 'methods': dict(self._method_counts)}
+
+    def result(self) -> Dict[str, Any]:
+        """
+        Get full processing results.
+        
+        Returns:
+            Dict[str, Any]: Total rows, duplicates count, duplicate groups and
+            statistics, plus row numbers of duplicate groups when tracked and
+            URL variants of groups in template mode
+        """
+        duplicates = self.groups()
+        result = {
+            "total_rows": self.total,
+            "duplicates_count": sum(len(v) - 1 for v in duplicates.values()),
+            "duplicates": duplicates,
+            "statistics": self.stats(),
+            "duplicate_groups": len(duplicates)
+        }
+        if self._numbers is not None:
+            result["row_numbers"] = self.row_numbers()
+        if self._templater is not None:
+            result["variants"] = self.variants()
+        return result
+
+
+def analyze_rows(rows: Iterable[Mapping[str, Any]], **options: Any) -> Dict[str, Any]:
+    """
+    Find duplicates and collect statistics in a single pass over rows.
+    
+    Args:
+        rows (Iterable[Mapping[str, Any]]): Rows to analyze, e.g. from iter_csv
+        **options: Key options passed to DuplicateFinder
+        
+    Returns:
+        Dict[str, Any]: Processing results, see DuplicateFinder.result
+    """
+    return DuplicateFinder(**options).update(rows).result()
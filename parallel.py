@@ -0,0 +1,214 @@
+"""Multi-process duplicate detection for large CSV files."""
+
+import csv
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Tuple, Optional, BinaryIO
+
+from model import DuplicateFinder, REQUIRED_FIELDS, _iter_log_rows
+from signature_index import SignatureIndex, indexed_result
+
+# Size of blocks read while looking for record boundaries
+SCAN_BLOCK_SIZE: int = 1024 * 1024
+
+# Number of chunks per worker, more chunks balance uneven chunks better
+CHUNKS_PER_WORKER: int = 4
+
+
+class _ByteRange(io.RawIOBase):
+    """Read-only view of a byte range of an open binary file."""
+
+    def __init__(self, file_obj: BinaryIO, start: int, end: int) -> None:
+        super().__init__()
+        file_obj.seek(start)
+        self._file = file_obj
+        self._remaining = end - start
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        data = self._file.read(size)
+        buffer[:len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+
+def _find_record_end(data: bytes, start: int, quoted: bool) -> int:
+    """
+    Find end of the first CSV record ending at or after start.
+
+    A newline ends a record only outside of a quoted field. Escaped quotes
+    inside quoted fields are doubled, so the number of quote characters
+    before a position tells whether it is inside a quoted field.
+
+    Args:
+        data (bytes): Data block
+        start (int): Position in block to search from
+        quoted (bool): Whether position 0 of the block is inside a quoted field
+
+    Returns:
+        int: Position right after the record's newline, or -1 if not in block
+    """
+    newline = data.find(b'\n', start)
+    while newline >= 0:
+        if (data.count(b'"', 0, newline) % 2 == 1) == quoted:
+            return newline + 1
+        newline = data.find(b'\n', newline + 1)
+    return -1
+
+
+def split_csv(file_path: str, parts: int) -> Tuple[Optional[List[str]], List[Tuple[int, int]]]:
+    """
+    Split CSV file into byte ranges that start and end on record boundaries.
+
+    The file is scanned once sequentially to track quoting, so newlines
+    inside quoted fields never become split points.
+
+    Args:
+        file_path (str): Path to CSV file
+        parts (int): Desired number of ranges
+
+    Returns:
+        Tuple[Optional[List[str]], List[Tuple[int, int]]]: Header (None for
+        an empty file) and (start, end) byte ranges covering all data rows
+    """
+    size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as file:
+        # Targets are filled in once the end of the header is known
+        targets: List[int] = []
+        boundaries: List[int] = []
+        header: Optional[List[str]] = None
+        header_bytes = b''
+
+        block_start = 0
+        quoted = False
+        while True:
+            block = file.read(SCAN_BLOCK_SIZE)
+            if not block:
+                break
+
+            search_from = 0
+            if header is None:
+                end = _find_record_end(block, 0, quoted)
+                if end < 0:
+                    header_bytes += block
+                    quoted = (quoted + block.count(b'"')) % 2 == 1
+                    block_start += len(block)
+                    continue
+                header_bytes += block[:end]
+                header = next(csv.reader(io.StringIO(header_bytes.decode('utf-8'), newline='')))
+                data_start = block_start + end
+                boundaries.append(data_start)
+                step = (size - data_start) / max(parts, 1)
+                targets = [int(data_start + step * i) for i in range(parts - 1, 0, -1)]
+                search_from = end
+
+            while targets:
+                target = max(targets[-1] - block_start, search_from)
+                if target >= len(block):
+                    break
+                # Quoting state at the start of the block decides parity
+                end = _find_record_end(block, target, quoted)
+                if end < 0:
+                    break
+                targets.pop()
+                if end + block_start > boundaries[-1]:
+                    boundaries.append(end + block_start)
+                search_from = end
+
+            quoted = (quoted + block.count(b'"')) % 2 == 1
+            block_start += len(block)
+
+    if header is None:
+        if header_bytes.strip():
+            header = next(csv.reader(io.StringIO(header_bytes.decode('utf-8'), newline='')))
+        return header, []
+
+    if boundaries[-1] < size:
+        boundaries.append(size)
+    return header, list(zip(boundaries, boundaries[1:]))
+
+
+def _analyze_range(file_path: str, start: int, end: int, header: List[str], skip_header: bool,
+                   full_rows: bool, options: Dict[str, Any]) -> DuplicateFinder:
+    """
+    Worker: find duplicates in one byte range of a CSV file.
+
+    Args:
+        file_path (str): Path to CSV file
+        start (int): First byte of the range
+        end (int): End of the range
+        header (List[str]): CSV header
+        skip_header (bool): Skip the first data row, set for the first range only
+        full_rows (bool): Keep all columns instead of only REPORT_FIELDS
+        options (Dict[str, Any]): Key options for DuplicateFinder
+
+    Returns:
+        DuplicateFinder: Partial results for the range
+    """
+    with open(file_path, 'rb') as file:
+        text = io.TextIOWrapper(io.BufferedReader(_ByteRange(file, start, end)),
+                                encoding='utf-8', newline='')
+        rows = _iter_log_rows(text, skip_header, full_rows, REQUIRED_FIELDS, header=header)
+        return DuplicateFinder(**options).update(rows)
+
+
+def analyze_csv_parallel(file_path: str, workers: int, skip_header: bool = True,
+                         full_rows: bool = False, index: Optional[SignatureIndex] = None,
+                         update_index: bool = True, **options: Any) -> Dict[str, Any]:
+    """
+    Find duplicates in a CSV file using several processes.
+
+    The file is split at record boundaries, every range is parsed and keyed
+    in a process pool, and partial results are merged in file order. The
+    result is identical to analyze_rows over the whole file, including the
+    order of groups by first occurrence.
+
+    Args:
+        file_path (str): Path to CSV file
+        workers (int): Number of worker processes
+        skip_header (bool): Whether to skip header row
+        full_rows (bool): Keep all columns instead of only REPORT_FIELDS
+        index (Optional[SignatureIndex]): Index to record the requests in,
+            adding their history from earlier runs to the results
+        update_index (bool): Add the requests to the index; False only looks up their history
+        **options: Key options passed to DuplicateFinder
+
+    Returns:
+        Dict[str, Any]: Processing results, see DuplicateFinder.result
+
+    Raises:
+        ValueError: If file reading fails or required fields are missing
+    """
+    try:
+        header, ranges = split_csv(file_path, max(1, workers) * CHUNKS_PER_WORKER)
+    except FileNotFoundError:
+        raise ValueError(f"File not found: {file_path}")
+    except Exception as e:
+        raise ValueError(f"Error reading file: {str(e)}")
+
+    finder = DuplicateFinder(**options)
+    if not ranges:
+        return indexed_result(finder, index, update_index)
+
+    count = len(ranges)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        partials = executor.map(
+            _analyze_range,
+            [file_path] * count,
+            [start for start, _ in ranges],
+            [end for _, end in ranges],
+            [header] * count,
+            [skip_header] + [False] * (count - 1),
+            [full_rows] * count,
+            [options] * count
+        )
+        for partial in partials:
+            finder.merge(partial)
+
+    return indexed_result(finder, index, update_index)
@@ -0,0 +1,208 @@
+"""Bounded executor for running CPU-bound analysis off the event loop."""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Dict, Any, Callable, Optional, Tuple
+
+from model import configure_url_cache, DEFAULT_URL_CACHE_SIZE
+
+POOL_KINDS: Tuple[str, ...] = ('thread', 'process')
+
+# Number of analyses running at once by default
+DEFAULT_POOL_WORKERS: int = os.cpu_count() or 1
+
+# Number of analyses allowed to wait for a free worker by default
+DEFAULT_MAX_PENDING: int = 4
+
+
+class PoolSaturatedError(RuntimeError):
+    """Raised when the analysis pool has no free slot for another task."""
+
+
+class AnalysisPool:
+    """
+    Thread or process pool with a bound on running plus waiting tasks.
+
+    Tasks beyond workers + max_pending are rejected right away instead of
+    queueing without limit, so callers can answer with a busy status. A slot
+    can be reserved before the input of a task is prepared, so input is not
+    stored only for the task to be rejected.
+    """
+
+    def __init__(self, kind: str = 'thread', workers: int = DEFAULT_POOL_WORKERS,
+                 max_pending: int = DEFAULT_MAX_PENDING,
+                 url_cache_size: int = DEFAULT_URL_CACHE_SIZE) -> None:
+        if kind not in POOL_KINDS:
+            raise ValueError(f"Invalid pool kind: {kind}, expected one of {', '.join(POOL_KINDS)}")
+        if workers < 1:
+            raise ValueError("Pool workers must be positive")
+        if max_pending < 0:
+            raise ValueError("Pool max pending must not be negative")
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self._url_cache_size = url_cache_size
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == 'process':
+                # Worker processes have their own URL cache, sized like the parent's
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    initializer=configure_url_cache,
+                    initargs=(self._url_cache_size,)
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix="analysis")
+        return self._executor
+
+    def submit(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """
+        Submit a task unless the pool is saturated.
+
+        Args:
+            func (Callable[..., Any]): Function to run, must be picklable for process pools
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Future: Future of the task result
+
+        Raises:
+            PoolSaturatedError: If workers + max_pending tasks are already submitted
+        """
+        self.reserve()
+        return self.submit_reserved(func, *args, **kwargs)
+
+    def reserve(self) -> None:
+        """
+        Take a slot for a task submitted later with submit_reserved.
+
+        A slot that will not be used must be given back with release.
+
+        Raises:
+            PoolSaturatedError: If workers + max_pending tasks are already submitted or reserved
+        """
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_pending:
+                self.rejected += 1
+                raise PoolSaturatedError("Analysis pool is saturated")
+            self._in_flight += 1
+
+    def release(self) -> None:
+        """Give back a slot taken by reserve without submitting a task."""
+        with self._lock:
+            self._in_flight -= 1
+
+    def submit_reserved(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """
+        Submit a task in a slot taken by reserve; the slot is given back if submission fails.
+
+        Args:
+            func (Callable[..., Any]): Function to run, must be picklable for process pools
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Future: Future of the task result
+        """
+        try:
+            with self._lock:
+                future = self._get_executor().submit(func, *args, **kwargs)
+        except BaseException:
+            self.release()
+            raise
+        future.add_done_callback(self._task_done)
+        return future
+
+    def _task_done(self, _: Future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self.completed += 1
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run a task in the pool and await its result without blocking the event loop.
+
+        Args:
+            func (Callable[..., Any]): Function to run
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Any: Result of func
+
+        Raises:
+            PoolSaturatedError: If the pool is saturated
+        """
+        return await asyncio.wrap_future(self.submit(func, *args, **kwargs))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool configuration and counters.
+
+        Returns:
+            Dict[str, Any]: Kind, workers, max pending, tasks in flight,
+            completed and rejected tasks
+        """
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "in_flight": self._in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop worker threads or processes.
+
+        Args:
+            wait (bool): Wait for running tasks to finish
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+# Shared by all requests of a server process, configured at startup
+_analysis_pool = AnalysisPool()
+
+
+def configure_analysis_pool(kind: str = 'thread', workers: int = DEFAULT_POOL_WORKERS,
+                            max_pending: int = DEFAULT_MAX_PENDING,
+                            url_cache_size: int = DEFAULT_URL_CACHE_SIZE) -> None:
+    """
+    Replace the shared analysis pool.
+
+    Args:
+        kind (str): 'thread' or 'process'
+        workers (int): Number of analyses running at once
+        max_pending (int): Number of analyses allowed to wait for a free worker
+        url_cache_size (int): URL cache size of worker processes
+    """
+    global _analysis_pool
+    pool = AnalysisPool(kind, workers, max_pending, url_cache_size)
+    _analysis_pool.shutdown(wait=False)
+    _analysis_pool = pool
+
+
+def get_analysis_pool() -> AnalysisPool:
+    """
+    Get the shared analysis pool.
+
+    Returns:
+        AnalysisPool: Pool used by API endpoints
+    """
+    return _analysis_pool
@@ -0,0 +1,589 @@
+"""Streaming readers of capture formats: CSV, JSON Lines, HAR and Charles JSON sessions."""
+
+import bz2
+import codecs
+import gzip
+import io
+import json
+import lzma
+import urllib.parse
+from typing import Dict, Any, BinaryIO, Callable, Iterator, List, Optional, Tuple
+
+from model import (LogRow, REPORT_FIELDS, REQUIRED_FIELDS, STREAM_CHUNK_SIZE, iter_csv, iter_csv_stream,
+                   _row_factory)
+from scanner import iter_csv_mmap
+
+# Bytes looked at to detect the format of a capture
+SNIFF_SIZE: int = 64 * 1024
+
+# Largest JSON entry read at once; larger ones are taken for broken data
+MAX_ENTRY_SIZE: int = 64 * 1024 * 1024
+
+# Columns of rows read from HAR and Charles JSON entries, named as in Charles CSV exports
+ENTRY_COLUMNS: Tuple[str, ...] = (
+    'URL', 'Status', 'Response Code', 'Protocol', 'Method', 'Content-Type', 'Client Address',
+    'Remote Address', 'Exception', 'Request Start Time', 'Duration (ms)', 'Latency (ms)',
+    'Request Header Size (bytes)', 'Request Body Size (bytes)', 'Response Header Size (bytes)',
+    'Response Body Size (bytes)'
+)
+
+# Compression formats by their magic bytes, with the file extensions they add
+COMPRESSIONS: Dict[str, Tuple[bytes, str]] = {
+    'gzip': (b'\x1f\x8b', '.gz'),
+    'bzip2': (b'BZh', '.bz2'),
+    'xz': (b'\xfd7zXZ\x00', '.xz')
+}
+
+Reader = Callable[[BinaryIO, bool, bool], Iterator[LogRow]]
+
+# Format name -> file extensions, content test on the first bytes, reader; tested in order
+_READERS: Dict[str, Tuple[Tuple[str, ...], Callable[[bytes], bool], Reader]] = {}
+
+_WHITESPACE = ' \t\r\n'
+_decoder = json.JSONDecoder()
+
+
+def register_reader(name: str, extensions: Tuple[str, ...],
+                    detect: Callable[[bytes], bool]) -> Callable[[Reader], Reader]:
+    """
+    Register a reader of a capture format, as a decorator.
+
+    Formats are detected by testing the first bytes of a capture with the
+    detect function of every reader in order of registration.
+
+    Args:
+        name (str): Format name
+        extensions (Tuple[str, ...]): Lower-case file extensions of the format
+        detect (Callable[[bytes], bool]): Whether the first bytes of a capture,
+            at most SNIFF_SIZE of them, are in this format
+
+    Returns:
+        Callable[[Reader], Reader]: Decorator registering a function that reads
+        LogRow rows from a binary stream, given skip_header and full_rows
+    """
+    def decorator(reader: Reader) -> Reader:
+        _READERS[name] = (extensions, detect, reader)
+        return reader
+    return decorator
+
+
+def reader_formats() -> Tuple[str, ...]:
+    """
+    Get names of the supported formats.
+
+    Returns:
+        Tuple[str, ...]: Format names in order of detection
+    """
+    return tuple(_READERS)
+
+
+def capture_extensions() -> Tuple[str, ...]:
+    """
+    Get file extensions of all supported formats, plain and compressed.
+
+    Returns:
+        Tuple[str, ...]: Lower-case extensions such as '.csv' and '.csv.gz'
+    """
+    plain = [extension for extensions, _, _ in _READERS.values() for extension in extensions]
+    return tuple(plain + [extension + suffix for _, suffix in COMPRESSIONS.values() for extension in plain])
+
+
+def detect_compression(stream: BinaryIO) -> Optional[str]:
+    """
+    Detect the compression of data from its magic bytes.
+
+    The stream is left at the position it was at.
+
+    Args:
+        stream (BinaryIO): Seekable binary stream
+
+    Returns:
+        Optional[str]: Compression name, see COMPRESSIONS, or None for plain data
+    """
+    start = stream.tell()
+    head = stream.read(8)
+    stream.seek(start)
+    for name, (magic, _) in COMPRESSIONS.items():
+        if head.startswith(magic):
+            return name
+    return None
+
+
+class _DecompressedStream(io.RawIOBase):
+    """Decompressed view of a compressed stream, reporting broken data as ValueError."""
+
+    def __init__(self, file_obj: BinaryIO, compression: str) -> None:
+        super().__init__()
+        if compression == 'gzip':
+            self._file: BinaryIO = gzip.GzipFile(fileobj=file_obj, mode='rb')
+        elif compression == 'bzip2':
+            self._file = bz2.BZ2File(file_obj)
+        else:
+            self._file = lzma.LZMAFile(file_obj)
+        self._compression = compression
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        try:
+            return self._file.readinto(buffer)
+        except (OSError, EOFError, lzma.LZMAError) as e:
+            raise ValueError(f"Error decompressing {self._compression} data: {str(e) or 'data is truncated'}")
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        # Seeking back decompresses again from the start, only done to detect the format
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+
+def decompressed(stream: BinaryIO) -> BinaryIO:
+    """
+    Get a stream of decompressed data if data is compressed.
+
+    Data is decompressed chunk by chunk as it is read, never as a whole.
+
+    Args:
+        stream (BinaryIO): Seekable binary stream, plain or compressed
+
+    Returns:
+        BinaryIO: stream itself for plain data, otherwise a decompressing
+        stream reading from it
+    """
+    compression = detect_compression(stream)
+    if compression is None:
+        return stream
+    return io.BufferedReader(_DecompressedStream(stream, compression), STREAM_CHUNK_SIZE)
+
+
+def detect_format(stream: BinaryIO) -> str:
+    """
+    Detect the format of a capture from its first bytes.
+
+    The stream is left at the position it was at.
+
+    Args:
+        stream (BinaryIO): Seekable binary stream
+
+    Returns:
+        str: Format name, 'csv' when no other format matches
+    """
+    start = stream.tell()
+    head = stream.read(SNIFF_SIZE)
+    stream.seek(start)
+    for name, (_, detect, _) in _READERS.items():
+        if detect(head):
+            return name
+    return 'csv'
+
+
+def detect_file_format(file_path: str) -> Tuple[str, Optional[str]]:
+    """
+    Detect the format and compression of a capture file from its first bytes.
+
+    Args:
+        file_path (str): Path to capture file
+
+    Returns:
+        Tuple[str, Optional[str]]: Format name of the decompressed data and
+        compression name, None for plain files
+
+    Raises:
+        ValueError: If the file does not exist or cannot be decompressed
+    """
+    try:
+        with open(file_path, 'rb') as file:
+            compression = detect_compression(file)
+            return detect_format(decompressed(file)), compression
+    except FileNotFoundError:
+        raise ValueError(f"File not found: {file_path}")
+
+
+def iter_rows_stream(stream: BinaryIO, skip_header: bool = True, full_rows: bool = False,
+                     format_name: Optional[str] = None) -> Iterator[LogRow]:
+    """
+    Lazily read rows of a capture in any supported format from a binary stream.
+
+    Compressed data is decompressed while it is parsed.
+
+    Args:
+        stream (BinaryIO): Seekable binary stream, e.g. an uploaded file
+        skip_header (bool): Whether to skip header row of CSV data
+        full_rows (bool): Keep all columns instead of only REPORT_FIELDS
+        format_name (Optional[str]): Format name, detected from the data if None
+
+    Returns:
+        Iterator[LogRow]: Compact rows
+
+    Raises:
+        ValueError: If the format is unknown
+    """
+    stream = decompressed(stream)
+    if format_name is None:
+        format_name = detect_format(stream)
+    if format_name not in _READERS:
+        raise ValueError(f"Unknown capture format: {format_name}")
+    return _READERS[format_name][2](stream, skip_header, full_rows)
+
+
+def iter_rows(file_path: str, skip_header: bool = True, full_rows: bool = False,
+              format_name: Optional[str] = None) -> Iterator[LogRow]:
+    """
+    Lazily read rows of a capture file in any supported format.
+
+    Compact rows of plain CSV files are read through a memory map by
+    iter_csv_mmap, full rows by iter_csv; other formats and compressed files
+    are parsed incrementally, so the whole file is never held in memory nor
+    decompressed to disk.
+
+    Args:
+        file_path (str): Path to capture file
+        skip_header (bool): Whether to skip header row of CSV files
+        full_rows (bool): Keep all columns instead of only REPORT_FIELDS
+        format_name (Optional[str]): Format name, detected from the data if None
+
+    Yields:
+        LogRow: Compact row
+
+    Raises:
+        ValueError: If file reading fails, the format is unknown or required fields are missing
+    """
+    try:
+        with open(file_path, 'rb') as file:
+            stream = decompressed(file)
+            if format_name is None:
+                format_name = detect_format(stream)
+            if format_name != 'csv' or stream is not file:
+                yield from iter_rows_stream(stream, skip_header, full_rows, format_name)
+                return
+    except FileNotFoundError:
+        raise ValueError(f"File not found: {file_path}")
+    if full_rows:
+        yield from iter_csv(file_path, skip_header, full_rows)
+    else:
+        yield from iter_csv_mmap(file_path, skip_header)
+
+
+class _JsonBuffer:
+    """Text of a binary JSON stream, decoded chunk by chunk as the parser moves on."""
+
+    def __init__(self, stream: BinaryIO, chunk_size: int = STREAM_CHUNK_SIZE) -> None:
+        self._stream = stream
+        self._chunk_size = chunk_size
+        # utf-8-sig drops a byte order mark some tools write
+        self._decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        self._eof = False
+        self.text = ''
+        self.pos = 0
+
+    def fill(self, size: int) -> bool:
+        """Read at least size more bytes unless the stream ends, return False at the end."""
+        if self._eof:
+            return False
+        # Drop text already parsed, so only the current entry is kept
+        self.text = self.text[self.pos:]
+        self.pos = 0
+        data = self._stream.read(size)
+        try:
+            self.text += self._decoder.decode(data, final=not data)
+        except UnicodeDecodeError as e:
+            raise ValueError(f"Error reading file: {str(e)}")
+        self._eof = not data
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and get the next character, '' at the end of the stream."""
+        while True:
+            text, pos = self.text, self.pos
+            while pos < len(text) and text[pos] in _WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < len(text):
+                return text[pos]
+            if not self.fill(self._chunk_size):
+                return ''
+
+    def expect(self, char: str) -> None:
+        """Consume the next character, which must be char."""
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Invalid JSON: expected {char!r}, found {found or 'end of data'!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode the next JSON value, reading more data until it is complete."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+                # A number cut at the end of the text may continue in the next chunk
+                if not (end == len(self.text) or self.text[end] in '.eE') or not self.fill(self._chunk_size):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                pending = len(self.text) - self.pos
+                if pending > MAX_ENTRY_SIZE:
+                    raise ValueError(f"Invalid JSON or entry over {MAX_ENTRY_SIZE} bytes: {str(e)}")
+                # Read as much again as is pending, so large entries are decoded in few attempts
+                if not self.fill(max(self._chunk_size, pending)):
+                    raise ValueError(f"Invalid JSON: {str(e)}")
+
+
+def iter_json_array(stream: BinaryIO, path: Tuple[str, ...] = (),
+                    chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Lazily decode the items of a JSON array, one at a time.
+
+    Only the item being decoded is held in memory. Values of other keys met
+    on the way to the array are decoded and dropped.
+
+    Args:
+        stream (BinaryIO): Binary stream with a UTF-8 JSON document
+        path (Tuple[str, ...]): Keys of nested objects leading to the array,
+            e.g. ('log', 'entries'); empty if the document is the array
+        chunk_size (int): Number of bytes to read at once
+
+    Yields:
+        Any: Decoded item
+
+    Raises:
+        ValueError: If data is not valid JSON or the array is missing
+    """
+    buffer = _JsonBuffer(stream, chunk_size)
+    for key in path:
+        buffer.expect('{')
+        while True:
+            if buffer.peek() == '}':
+                raise ValueError(f"Invalid capture: no '{key}' key")
+            name = buffer.value()
+            buffer.expect(':')
+            if name == key:
+                break
+            buffer.value()
+            if buffer.peek() == ',':
+                buffer.pos += 1
+    buffer.expect('[')
+    if buffer.peek() == ']':
+        return
+    while True:
+        yield buffer.value()
+        if buffer.peek() == ']':
+            return
+        buffer.expect(',')
+
+
+def _text(value: Any) -> str:
+    """Convert a JSON value to a cell as it appears in CSV exports."""
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def _object(value: Any) -> Dict[str, Any]:
+    """Get a nested JSON object, empty if it is missing or not an object."""
+    return value if isinstance(value, dict) else {}
+
+
+def _size(value: Any) -> str:
+    """Convert a HAR size or timing to a cell, where -1 means unknown."""
+    return '' if value is None or value == -1 else _text(value)
+
+
+def _har_values(entry: Dict[str, Any]) -> List[str]:
+    """Get ENTRY_COLUMNS values of a HAR entry."""
+    request = _object(entry.get('request'))
+    response = _object(entry.get('response'))
+    url = _text(request.get('url'))
+    code = response.get('status') or 0
+    error = _text(entry.get('_error') or response.get('_error'))
+    return [
+        url,
+        'COMPLETE' if code and not error else 'FAILED',
+        str(code) if code else '',
+        urllib.parse.urlsplit(url).scheme,
+        _text(request.get('method')),
+        _text(_object(response.get('content')).get('mimeType')),
+        '',
+        _text(entry.get('serverIPAddress')),
+        error,
+        _text(entry.get('startedDateTime')),
+        _text(entry.get('time')),
+        _size(_object(entry.get('timings')).get('wait')),
+        _size(request.get('headersSize')),
+        _size(request.get('bodySize')),
+        _size(response.get('headersSize')),
+        _size(response.get('bodySize'))
+    ]
+
+
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def _charles_url(entry: Dict[str, Any]) -> str:
+    """Build the URL of a Charles JSON entry as Charles writes it in CSV exports."""
+    scheme = _text(entry.get('scheme')) or 'http'
+    host = _text(entry.get('host'))
+    port = entry.get('actualPort') or entry.get('port')
+    url = f"{scheme}://{host}"
+    if port and port != _DEFAULT_PORTS.get(scheme):
+        url += f":{port}"
+    url += _text(entry.get('path'))
+    if entry.get('query'):
+        url += '?' + _text(entry['query'])
+    return url
+
+
+def _charles_values(entry: Dict[str, Any]) -> List[str]:
+    """Get ENTRY_COLUMNS values of a Charles JSON session entry."""
+    request = _object(entry.get('request'))
+    response = _object(entry.get('response'))
+    request_sizes = _object(request.get('sizes'))
+    response_sizes = _object(response.get('sizes'))
+    content_type = _text(response.get('mimeType'))
+    if content_type and response.get('charset'):
+        content_type += f"; charset={response['charset']}"
+    return [
+        _charles_url(entry),
+        _text(entry.get('status')),
+        _text(response.get('status')),
+        _text(entry.get('scheme')),
+        _text(entry.get('method')),
+        content_type,
+        _text(entry.get('clientAddress')),
+        _text(entry.get('remoteAddress')),
+        _text(entry.get('errorMessage')),
+        _text(_object(entry.get('times')).get('start')),
+        _text(_object(entry.get('durations')).get('total')),
+        _text(_object(entry.get('durations')).get('latency')),
+        _text(request_sizes.get('headers')),
+        _text(request_sizes.get('body')),
+        _text(response_sizes.get('headers')),
+        _text(response_sizes.get('body'))
+    ]
+
+
+def _iter_entries(entries: Iterator[Any], values: Callable[[Dict[str, Any]], List[str]],
+                  full_rows: bool) -> Iterator[LogRow]:
+    """Turn decoded entries into rows with ENTRY_COLUMNS."""
+    make_row = _row_factory(list(ENTRY_COLUMNS), full_rows)
+    for number, entry in enumerate(entries, 1):
+        if not isinstance(entry, dict):
+            raise ValueError(f"Row {number}: Entry is not an object")
+        yield make_row(values(entry))
+
+
+def _first_line(head: bytes) -> Any:
+    """Decode the first line of data as JSON, None if it is not a complete value."""
+    line = head.lstrip(codecs.BOM_UTF8 + b' \t\r\n').split(b'\n', 1)[0]
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+def _is_jsonl(head: bytes) -> bool:
+    first = _first_line(head)
+    return isinstance(first, dict) and 'log' not in first
+
+
+def _is_har(head: bytes) -> bool:
+    return head.lstrip(codecs.BOM_UTF8 + b' \t\r\n').startswith(b'{') and not _is_jsonl(head)
+
+
+def _is_charles_json(head: bytes) -> bool:
+    return head.lstrip(codecs.BOM_UTF8 + b' \t\r\n').startswith(b'[')
+
+
+@register_reader('jsonl', ('.jsonl', '.ndjson'), _is_jsonl)
+def read_jsonl(stream: BinaryIO, skip_header: bool = True, full_rows: bool = False) -> Iterator[LogRow]:
+    """
+    Read JSON Lines with one row object per line, keyed by CSV column names.
+
+    Args:
+        stream (BinaryIO): Binary stream with UTF-8 JSON Lines
+        skip_header (bool): Unused, JSON Lines have no header row
+        full_rows (bool): Keep all keys instead of only REPORT_FIELDS
+
+    Yields:
+        LogRow: Compact row
+
+    Raises:
+        ValueError: If a line is not a JSON object or required fields are missing
+    """
+    # Column mappings by key order, so rows with the same keys share one
+    columns: Dict[Tuple[str, ...], Dict[str, int]] = {}
+    compact = {name: i for i, name in enumerate(REPORT_FIELDS)}
+    number = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            row = json.loads(line.decode('utf-8-sig' if number == 1 else 'utf-8'))
+        except (UnicodeDecodeError, ValueError) as e:
+            raise ValueError(f"Row {number}: Invalid JSON: {str(e)}")
+        if not isinstance(row, dict):
+            raise ValueError(f"Row {number}: Line is not an object")
+        if not REQUIRED_FIELDS.issubset(row):
+            raise ValueError(f"Row {number}: Missing required fields")
+        if full_rows:
+            keys = tuple(row)
+            mapping = columns.get(keys)
+            if mapping is None:
+                mapping = columns[keys] = {name: i for i, name in enumerate(keys)}
+            yield LogRow(tuple(_text(value) for value in row.values()), mapping)
+        else:
+            yield LogRow(tuple(_text(row[name]) if name in row else None for name in REPORT_FIELDS), compact)
+
+
+@register_reader('har', ('.har',), _is_har)
+def read_har(stream: BinaryIO, skip_header: bool = True, full_rows: bool = False) -> Iterator[LogRow]:
+    """
+    Read entries of a HAR archive, e.g. exported from Charles or a browser.
+
+    Args:
+        stream (BinaryIO): Binary stream with a UTF-8 HAR document
+        skip_header (bool): Unused, HAR has no header row
+        full_rows (bool): Keep all ENTRY_COLUMNS instead of only REPORT_FIELDS
+
+    Returns:
+        Iterator[LogRow]: Compact rows
+
+    Raises:
+        ValueError: If data is not a valid HAR document
+    """
+    return _iter_entries(iter_json_array(stream, ('log', 'entries')), _har_values, full_rows)
+
+
+@register_reader('chlsj', ('.chlsj',), _is_charles_json)
+def read_charles_json(stream: BinaryIO, skip_header: bool = True, full_rows: bool = False) -> Iterator[LogRow]:
+    """
+    Read entries of a Charles JSON session export.
+
+    Args:
+        stream (BinaryIO): Binary stream with a UTF-8 JSON array of entries
+        skip_header (bool): Unused, JSON sessions have no header row
+        full_rows (bool): Keep all ENTRY_COLUMNS instead of only REPORT_FIELDS
+
+    Returns:
+        Iterator[LogRow]: Compact rows
+
+    Raises:
+        ValueError: If data is not a valid Charles JSON session
+    """
+    return _iter_entries(iter_json_array(stream), _charles_values, full_rows)
+
+
+# CSV comes last: any data not detected as another format is read as CSV
+register_reader('csv', ('.csv',), lambda head: True)(iter_csv_stream)
@@ -0,0 +1,231 @@
+"""Content-addressed cache of processing results for repeated uploads."""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, BinaryIO, Tuple
+
+from model import LRUCache, STREAM_CHUNK_SIZE
+
+# Number of results kept in memory by default
+DEFAULT_MEMORY_ENTRIES: int = 16
+
+# Disk space for cached results by default
+DEFAULT_DISK_LIMIT: int = 1024 ** 3
+
+_ENTRY_SUFFIX = '.json'
+
+
+def hash_stream(stream: BinaryIO, chunk_size: int = STREAM_CHUNK_SIZE) -> str:
+    """
+    Hash stream content chunk by chunk and rewind the stream.
+
+    Args:
+        stream (BinaryIO): Seekable binary stream
+        chunk_size (int): Number of bytes read at a time
+
+    Returns:
+        str: SHA-256 hex digest of the content
+    """
+    digest = hashlib.sha256()
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def result_key(content_digest: str, options: Dict[str, Any]) -> str:
+    """
+    Build cache key from content digest and options that affect the result.
+
+    Args:
+        content_digest (str): Digest of the uploaded content
+        options (Dict[str, Any]): Processing options
+
+    Returns:
+        str: SHA-256 hex digest identifying the result
+    """
+    payload = json.dumps([content_digest, options], sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class _DiskStore:
+    """Directory of JSON results with least recently used eviction above a size cap."""
+
+    def __init__(self, directory: str, limit: int) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.limit = limit
+        self.size = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # Key -> file size, least recently used first
+        self._entries: 'OrderedDict[str, int]' = OrderedDict()
+
+        # Pick up results stored by earlier runs, oldest access first
+        found = []
+        for name in os.listdir(directory):
+            if name.endswith(_ENTRY_SUFFIX):
+                stat = os.stat(os.path.join(directory, name))
+                found.append((stat.st_mtime, name[:-len(_ENTRY_SUFFIX)], stat.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self.size += size
+        with self._lock:
+            self._evict()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + _ENTRY_SUFFIX)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as file:
+                result = json.load(file)
+            # Modification time records last access for the next start
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.size -= self._entries.pop(key, 0)
+            return None
+        return result
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        data = json.dumps(result).encode('utf-8')
+        if len(data) > self.limit:
+            return
+        # Write to a temporary file first so readers never see partial results
+        with tempfile.NamedTemporaryFile(dir=self.directory, suffix='.tmp', delete=False) as file:
+            file.write(data)
+        os.replace(file.name, self._path(key))
+        with self._lock:
+            self.size += len(data) - self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self._evict()
+
+    def _evict(self) -> None:
+        """Remove least recently used results above the size cap; caller holds the lock."""
+        while self.size > self.limit and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self.size -= size
+            self.evictions += 1
+            try:
+                os.unlink(self._path(key))
+            except OSError:
+                pass
+
+
+class ResultCache:
+    """
+    Two-tier result cache: in-memory LRU backed by an optional on-disk store.
+
+    Results found on disk are promoted to memory. Results must be JSON
+    serializable, and are returned from disk as parsed JSON.
+    """
+
+    def __init__(self, memory_entries: int = DEFAULT_MEMORY_ENTRIES, directory: Optional[str] = None,
+                 disk_limit: int = DEFAULT_DISK_LIMIT) -> None:
+        self._memory = LRUCache(memory_entries)
+        self._disk = _DiskStore(directory, disk_limit) if directory else None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Look up a result.
+
+        Args:
+            key (str): Result key, see result_key
+
+        Returns:
+            Tuple[Optional[Dict[str, Any]], Optional[str]]: Result and the tier it
+            was found in ('memory' or 'disk'), or (None, None) on a miss
+        """
+        result = self._memory.get(key)
+        tier = 'memory'
+        if result is None and self._disk is not None:
+            result = self._disk.get(key)
+            tier = 'disk'
+            if result is not None:
+                self._memory.put(key, result)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None, None
+            self.hits += 1
+        return result, tier
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """
+        Store a result in both tiers.
+
+        Args:
+            key (str): Result key, see result_key
+            result (Dict[str, Any]): JSON serializable result
+        """
+        self._memory.put(key, result)
+        if self._disk is not None:
+            self._disk.put(key, result)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dict[str, Any]: Hits, misses, hit rate and counters of both tiers
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats: Dict[str, Any] = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory": self._memory.stats(),
+                "disk": None
+            }
+        if self._disk is not None:
+            stats["disk"] = {
+                "directory": self._disk.directory,
+                "entries": len(self._disk._entries),
+                "size": self._disk.size,
+                "limit": self._disk.limit,
+                "evictions": self._disk.evictions
+            }
+        return stats
+
+
+# Shared by all requests of a server process, configured at startup
+_result_cache = ResultCache()
+
+
+def configure_result_cache(memory_entries: int = DEFAULT_MEMORY_ENTRIES, directory: Optional[str] = None,
+                           disk_limit: int = DEFAULT_DISK_LIMIT) -> None:
+    """
+    Replace the shared result cache.
+
+    Args:
+        memory_entries (int): Number of results kept in memory, 0 disables the memory tier
+        directory (Optional[str]): Directory of the disk tier, None disables it
+        disk_limit (int): Disk space for cached results in bytes
+    """
+    global _result_cache
+    _result_cache = ResultCache(memory_entries, directory, disk_limit)
+
+
+def get_result_cache() -> ResultCache:
+    """
+    Get the shared result cache.
+
+    Returns:
+        ResultCache: Result cache used by API endpoints
+    """
+    return _result_cache
@@ -0,0 +1,201 @@
+"""Client-facing representations of processing results: shapes, NDJSON lines and pages."""
+
+import json
+from typing import Dict, Any, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+
+# Upper bound for groups per page
+MAX_PAGE_SIZE: int = 10000
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """
+    Parse a comma-separated column selector.
+
+    Args:
+        fields (Optional[str]): Column names separated by commas, e.g. 'URL,Method'
+
+    Returns:
+        Optional[List[str]]: Column names in given order, None to keep all columns
+
+    Raises:
+        ValueError: If no column name is given
+    """
+    if fields is None:
+        return None
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    if not names:
+        raise ValueError("No fields selected")
+    return names
+
+
+def _row_dict(row: Mapping[str, Any], fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+    if fields is None:
+        return row.to_dict() if hasattr(row, 'to_dict') else dict(row)
+    return {name: row.get(name) for name in fields}
+
+
+def shape_result(result: Dict[str, Any], compact: bool = False,
+                 fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """
+    Turn processing results into their JSON-ready shape.
+
+    By default every duplicate group lists its rows. The compact shape
+    replaces duplicates with a list of groups holding the key, the count,
+    Request Start Time of the first and last request and the row numbers,
+    which requires results computed with row numbers, plus the URL variants
+    of template mode results and the group's metrics, leaving only overall
+    metrics at the top level. With fields, rows are limited to the chosen
+    columns, and in the compact shape they are only included when fields are
+    given.
+
+    Args:
+        result (Dict[str, Any]): Processing results with rows as mappings
+        compact (bool): Summarize groups instead of listing their rows
+        fields (Optional[Sequence[str]]): Columns to keep in rows, all if None
+
+    Returns:
+        Dict[str, Any]: Results with rows as dictionaries
+
+    Raises:
+        ValueError: If the compact shape is requested without row numbers
+    """
+    if result.get("approximate"):
+        for hitter in result["heavy_hitters"]:
+            hitter["row"] = _row_dict(hitter["row"], fields)
+        return result
+
+    if not compact:
+        result["duplicates"] = {
+            key: [_row_dict(row, fields) for row in rows]
+            for key, rows in result["duplicates"].items()
+        }
+        return result
+
+    if "row_numbers" not in result:
+        raise ValueError("Compact results need row numbers")
+    row_numbers = result.pop("row_numbers")
+    variants = result.pop("variants", None)
+    metrics = result.pop("metrics", None)
+    groups = []
+    for key, rows in result.pop("duplicates").items():
+        group = {
+            "key": key,
+            "count": len(rows),
+            "first_request_time": rows[0].get('Request Start Time'),
+            "last_request_time": rows[-1].get('Request Start Time'),
+            "row_numbers": row_numbers[key]
+        }
+        if variants is not None:
+            group["variants"] = variants[key]
+        if metrics is not None:
+            group["metrics"] = metrics["groups"][key]
+        if fields is not None:
+            group["rows"] = [_row_dict(row, fields) for row in rows]
+        groups.append(group)
+    result["groups"] = groups
+    if metrics is not None:
+        result["metrics"] = {"overall": metrics["overall"]}
+    return result
+
+
+def accepts_ndjson(accept: Optional[str]) -> bool:
+    """
+    Check whether the client asked for NDJSON.
+
+    Args:
+        accept (Optional[str]): Accept header
+
+    Returns:
+        bool: True if application/x-ndjson is among accepted media types
+    """
+    if not accept:
+        return False
+    return any(part.split(';')[0].strip().lower() == NDJSON_MEDIA_TYPE for part in accept.split(','))
+
+
+def _split_items(result: Dict[str, Any]) -> Tuple[str, List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Separate per-group items of a result from its summary.
+
+    Args:
+        result (Dict[str, Any]): Processing results
+
+    Returns:
+        Tuple[str, List[Dict[str, Any]], Dict[str, Any]]: Item type, items in
+        result order and the remaining summary fields
+    """
+    summary = dict(result)
+    if result.get("approximate"):
+        return "heavy_hitter", summary.pop("heavy_hitters"), summary
+    if "groups" in result:
+        return "group", summary.pop("groups"), summary
+    duplicates = summary.pop("duplicates")
+    return "group", [{"key": key, "rows": rows} for key, rows in duplicates.items()], summary
+
+
+def _dumps(value: Dict[str, Any]) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+def iter_ndjson(result: Dict[str, Any]) -> Iterator[bytes]:
+    """
+    Encode results as newline-delimited JSON, one line at a time.
+
+    The first line is the summary with type 'summary', followed by one line
+    per duplicate group (type 'group' with key and rows, or the group summary
+    in the compact shape) or per heavy hitter in approximate mode (type
+    'heavy_hitter'), in result order.
+
+    Args:
+        result (Dict[str, Any]): Processing results with rows as dictionaries
+
+    Yields:
+        bytes: JSON line including the trailing newline
+    """
+    item_type, items, summary = _split_items(result)
+    yield _dumps(dict(summary, type="summary"))
+    for item in items:
+        yield _dumps(dict(item, type=item_type))
+
+
+def paginate(result: Dict[str, Any], limit: Optional[int], cursor: Optional[str]) -> Dict[str, Any]:
+    """
+    Cut one page of groups out of results.
+
+    Pages keep the result shape with only the groups of the page, and add
+    next_cursor, which is None on the last page.
+
+    Args:
+        result (Dict[str, Any]): Processing results
+        limit (Optional[int]): Maximum number of groups, MAX_PAGE_SIZE if None
+        cursor (Optional[str]): next_cursor of the previous page, None for the first page
+
+    Returns:
+        Dict[str, Any]: Page of results
+
+    Raises:
+        ValueError: If limit or cursor is invalid
+    """
+    if limit is None:
+        limit = MAX_PAGE_SIZE
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"Page limit must be between 1 and {MAX_PAGE_SIZE}")
+    try:
+        offset = int(cursor) if cursor else 0
+    except ValueError:
+        offset = -1
+    if offset < 0:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+    _, items, page = _split_items(result)
+    end = offset + limit
+    if result.get("approximate"):
+        page["heavy_hitters"] = items[offset:end]
+    elif "groups" in result:
+        page["groups"] = items[offset:end]
+    else:
+        page["duplicates"] = {item["key"]: item["rows"] for item in items[offset:end]}
+    page["next_cursor"] = str(end) if end < len(items) else None
+    return page
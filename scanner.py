@@ -0,0 +1,179 @@
+"""Memory-mapped CSV scanner reading only the columns of compact rows."""
+
+import csv
+import io
+import mmap
+import os
+from operator import itemgetter
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from model import LogRow, REPORT_FIELDS, REQUIRED_FIELDS, iter_csv
+
+# Bytes of the mapped file split into lines at once
+SCAN_BLOCK_SIZE: int = 4 * 1024 * 1024
+
+# Joins picked fields so they are decoded with one call; control character never seen in captures
+_SEPARATOR = '\x1f'
+
+
+def iter_csv_mmap(file_path: str, skip_header: bool = True) -> Iterator[LogRow]:
+    """
+    Lazily read compact rows of a local CSV file through a memory map.
+
+    Yields the same rows as iter_csv without full_rows, but never decodes
+    or splits the columns that compact rows drop. A line is cut only up to
+    the last REPORT_FIELDS column, with one bytes.split call, and only the
+    picked fields are decoded, all with one call. Lines with quotes in the
+    picked columns go through the csv module, so quoted commas and newlines
+    are handled as before.
+
+    Files that cannot be mapped, such as pipes, are read by iter_csv.
+
+    Args:
+        file_path (str): Path to CSV file
+        skip_header (bool): Whether to skip header row, with the same
+            semantics as iter_csv
+
+    Yields:
+        LogRow: Compact row
+
+    Raises:
+        ValueError: If file reading fails, picked fields are not valid UTF-8
+            or required fields are missing
+    """
+    try:
+        file = open(file_path, 'rb')
+    except FileNotFoundError:
+        raise ValueError(f"File not found: {file_path}")
+    with file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            data = None
+        if data is None:
+            yield from iter_csv(file_path, skip_header)
+            return
+        with data:
+            try:
+                yield from _scan(data, skip_header)
+            except UnicodeDecodeError as e:
+                raise ValueError(f"Error reading file: {str(e)}")
+
+
+def _parse_record(record: bytes) -> List[str]:
+    """Parse one CSV record, which may hold quoted commas and newlines."""
+    return next(csv.reader(io.StringIO(record.decode('utf-8'), newline='')), [])
+
+
+def _record_end(data: mmap.mmap, start: int) -> int:
+    """Find the end of the record starting at start, right after its newline."""
+    quotes = 0
+    while True:
+        newline = data.find(b'\n', start)
+        if newline < 0:
+            return len(data)
+        quotes += data[start:newline].count(b'"')
+        start = newline + 1
+        if quotes % 2 == 0:
+            return start
+
+
+def _projector(header: List[str]) -> Tuple[Dict[str, int], int, Callable[[List[bytes]], LogRow]]:
+    """
+    Build the function turning split fields of a line into a compact row.
+
+    Args:
+        header (List[str]): CSV header
+
+    Returns:
+        Tuple[Dict[str, int], int, Callable[[List[bytes]], LogRow]]: Column
+        mapping of compact rows, number of fields a line is split into, and
+        the row factory taking raw fields
+    """
+    # Later duplicates of a column name win, as with csv.DictReader
+    positions = {name: i for i, name in enumerate(header)}
+    names = [name for name in REPORT_FIELDS if name in positions]
+    columns = {name: i for i, name in enumerate(names)}
+    picks = [positions[name] for name in names]
+    width = max(picks) + 1 if picks else 0
+    pick = itemgetter(*picks) if len(picks) > 1 else (lambda fields: tuple(fields[i] for i in picks))
+    separator = _SEPARATOR.encode('ascii')
+    count = len(picks)
+
+    def make_row(fields: List[bytes]) -> LogRow:
+        if len(fields) < width:
+            # Short lines miss trailing columns, as in iter_csv
+            fields = fields + [None] * (width - len(fields))
+            return LogRow(tuple([raw if raw is None else raw.decode('utf-8') for raw in pick(fields)]), columns)
+        values = separator.join(pick(fields)).decode('utf-8').split(_SEPARATOR)
+        if len(values) != count:
+            values = [raw.decode('utf-8') for raw in pick(fields)]
+        return LogRow(tuple(values), columns)
+
+    return columns, width, make_row
+
+
+def _scan(data: mmap.mmap, skip_header: bool) -> Iterator[LogRow]:
+    """Yield compact rows of mapped CSV data, see iter_csv_mmap."""
+    header_end = _record_end(data, 0)
+    header = _parse_record(data[:header_end])
+    columns, width, make_row = _projector(header)
+    missing = not REQUIRED_FIELDS.issubset(header)
+
+    skip = skip_header
+    number = 0
+    # Lines of a record with quoted newlines, and their number of quotes so far
+    pending: List[bytes] = []
+    quotes = 0
+    size = len(data)
+    start = header_end
+    while start < size:
+        end = data.rfind(b'\n', start, start + SCAN_BLOCK_SIZE) + 1
+        if end <= start:
+            # No newline in the block: a huge line, or the last line without one
+            newline = data.find(b'\n', start)
+            end = size if newline < 0 else newline + 1
+        lines = data[start:end].split(b'\n')
+        if end < size or data[end - 1:end] == b'\n':
+            lines.pop()  # Empty piece after the last newline of the block
+        start = end
+
+        for line in lines:
+            if pending:
+                pending.append(line)
+                quotes += line.count(b'"')
+                if quotes % 2:
+                    continue
+                line = b'\n'.join(pending)
+                pending = []
+            elif b'"' in line:
+                quotes = line.count(b'"')
+                if quotes % 2:
+                    pending = [line]
+                    continue
+            if line.endswith(b'\r'):
+                line = line[:-1]
+            if not line:
+                continue
+            if skip:
+                # Same semantics as csv.DictReader based reading
+                skip = False
+                continue
+
+            number += 1
+            if missing:
+                raise ValueError(f"Row {number}: Missing required fields")
+            fields = line.split(b',', width)
+            # Quotes after the picked columns, e.g. in an exception message, do not matter
+            quote = line.find(b'"')
+            if quote >= 0 and (len(fields) <= width or quote < len(line) - len(fields[width])):
+                fields = [value.encode('utf-8') for value in _parse_record(line)]
+            yield make_row(fields)
+
+    if pending and not skip:
+        number += 1
+        if missing:
+            raise ValueError(f"Row {number}: Missing required fields")
+        yield make_row([value.encode('utf-8') for value in _parse_record(b'\n'.join(pending))])
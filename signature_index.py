@@ -0,0 +1,371 @@
+"""Persistent index of request signatures for duplicate detection across runs."""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Any, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from model import DuplicateFinder, _format_key
+from window import TIME_FIELD, parse_request_time
+
+# Signatures are blake2b digests of comparison keys, same as 'hash' mode keys of this size
+SIGNATURE_SIZE: int = 16
+
+# Template mode signatures are digests of exact mode ones under this personalization
+TEMPLATE_PERSON: bytes = b'template'
+
+# Number of signatures written per transaction
+DEFAULT_BATCH_SIZE: int = 50000
+
+# Page cache of a connection in KiB
+CACHE_SIZE_KB: int = 64 * 1024
+
+# Number of signatures per lookup query, below SQLite's default variable limit
+_LOOKUP_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS signatures (
+    signature BLOB PRIMARY KEY,
+    count INTEGER NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL
+) WITHOUT ROWID
+"""
+
+_UPSERT = """
+INSERT INTO signatures (signature, count, first_seen, last_seen) VALUES (?, ?, ?, ?)
+ON CONFLICT (signature) DO UPDATE SET
+    count = count + excluded.count,
+    first_seen = MIN(first_seen, excluded.first_seen),
+    last_seen = MAX(last_seen, excluded.last_seen)
+"""
+
+
+def signature(comparison_key: str, template: bool = False) -> bytes:
+    """
+    Get the signature stored in the index for a comparison key.
+
+    Template mode keys are counted apart from exact ones: a URL without IDs
+    is its own template, and would otherwise be counted by runs of both modes.
+
+    Args:
+        comparison_key (str): Comparison key of a request
+        template (bool): Whether the key is a template mode key
+
+    Returns:
+        bytes: Digest of SIGNATURE_SIZE bytes
+    """
+    digest = hashlib.blake2b(comparison_key.encode('utf-8'), digest_size=SIGNATURE_SIZE).digest()
+    return _in_mode(digest, template)
+
+
+def parse_signature(key: str, template: bool = False) -> bytes:
+    """
+    Get the signature of a result key.
+
+    Hex digests of SIGNATURE_SIZE bytes, i.e. keys of 'hash' mode results with
+    the default digest size, are digests of comparison keys already. Any
+    other key is taken as a comparison key.
+
+    Args:
+        key (str): Comparison key or hex digest
+        template (bool): Whether the key is a key of template mode results
+
+    Returns:
+        bytes: Signature
+    """
+    if len(key) == SIGNATURE_SIZE * 2:
+        try:
+            return _in_mode(bytes.fromhex(key), template)
+        except ValueError:
+            pass
+    return signature(key, template)
+
+
+def _in_mode(digest: bytes, template: bool) -> bytes:
+    if not template:
+        return digest
+    return hashlib.blake2b(digest, digest_size=SIGNATURE_SIZE, person=TEMPLATE_PERSON).digest()
+
+
+def _group_signature(finder: DuplicateFinder, key: Any, first_row: Mapping[str, Any]) -> bytes:
+    if isinstance(key, str):
+        return signature(key, finder.template)
+    if len(key) == SIGNATURE_SIZE:
+        return _in_mode(key, finder.template)
+    # Shorter digests cannot be widened, key the representative row again
+    return signature(finder.key_text(first_row), finder.template)
+
+
+def _request_times(rows: Sequence[Mapping[str, Any]], default: float) -> Tuple[float, float]:
+    """Get the earliest and latest Request Start Time of rows, default if none has one."""
+    times = []
+    for row in rows:
+        try:
+            times.append(parse_request_time(row.get(TIME_FIELD) or ''))
+        except ValueError:
+            pass
+    if not times:
+        return default, default
+    return min(times), max(times)
+
+
+def _timestamp(seconds: float) -> str:
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat(timespec='seconds')
+
+
+class SignatureIndex:
+    """
+    SQLite table of request signatures with their counts and first and last seen times.
+
+    Seen times are Request Start Times of the requests, or the time of the
+    run for requests without a usable one. Exact and template mode keys of
+    the same request have different signatures, see signature.
+
+    The database runs in WAL mode, so readers are not blocked by a writer and
+    several processes can share one index file. Signatures are fixed-size
+    digests keyed by a clustered primary key, so lookups stay a single B-tree
+    search at tens of millions of signatures. A connection is shared by the
+    threads of a process; use open_index to get it.
+    """
+
+    def __init__(self, path: str, batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+        if batch_size < 1:
+            raise ValueError("Index batch size must be positive")
+        self.path = path
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=30.0, check_same_thread=False)
+        try:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KB}")
+            with self._connection:
+                self._connection.execute(_SCHEMA)
+        except sqlite3.DatabaseError as e:
+            self._connection.close()
+            raise ValueError(f"Cannot open signature index {path}: {str(e)}")
+
+    def upsert(self, counts: Iterable[Tuple[bytes, int]], seen: Optional[float] = None) -> int:
+        """
+        Add request counts, inserting signatures not seen before.
+
+        Signatures are written in transactions of batch_size rows; sorted
+        signatures are written about twice as fast, as they fill the same
+        pages of the primary key in turn.
+
+        Args:
+            counts (Iterable[Tuple[bytes, int]]): Signatures and their number of requests
+            seen (Optional[float]): Time the requests were seen as a Unix timestamp, now if None
+
+        Returns:
+            int: Number of signatures written
+        """
+        if seen is None:
+            seen = time.time()
+        written = 0
+        for batch in self._batches((sig, count, seen, seen) for sig, count in counts):
+            with self._lock, self._connection:
+                self._connection.executemany(_UPSERT, batch)
+            written += len(batch)
+        return written
+
+    def _batches(self, rows: Iterable[Tuple[bytes, int, float, float]]
+                 ) -> Iterator[List[Tuple[bytes, int, float, float]]]:
+        """Split rows of the upsert statement into batches of batch_size rows."""
+        batch: List[Tuple[bytes, int, float, float]] = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def lookup(self, signatures: Iterable[bytes]) -> Dict[bytes, Dict[str, Any]]:
+        """
+        Get history of many signatures at once.
+
+        Args:
+            signatures (Iterable[bytes]): Signatures to look up
+
+        Returns:
+            Dict[bytes, Dict[str, Any]]: Count and ISO 8601 first and last seen
+            times of every signature found in the index
+        """
+        found: Dict[bytes, Dict[str, Any]] = {}
+        wanted = list(signatures)
+        for start in range(0, len(wanted), _LOOKUP_CHUNK):
+            with self._lock:
+                self._select(wanted[start:start + _LOOKUP_CHUNK], found)
+        return found
+
+    def _select(self, chunk: List[bytes], found: Dict[bytes, Dict[str, Any]]) -> None:
+        """Add history of up to _LOOKUP_CHUNK signatures to found; the caller holds the lock."""
+        query = ("SELECT signature, count, first_seen, last_seen FROM signatures "
+                 f"WHERE signature IN ({','.join('?' * len(chunk))})")
+        for sig, count, first_seen, last_seen in self._connection.execute(query, chunk).fetchall():
+            found[sig] = {
+                "count": count,
+                "first_seen": _timestamp(first_seen),
+                "last_seen": _timestamp(last_seen)
+            }
+
+    def record(self, finder: DuplicateFinder, seen: Optional[float] = None,
+               update: bool = True) -> Dict[str, Any]:
+        """
+        Look up history of every request of a finder, then add its counts.
+
+        History is looked up before the counts are added, so it covers earlier
+        runs only. Both happen in one immediate transaction, which takes the
+        write lock of the database first, so concurrent runs recording the
+        same requests, even in other processes, see each other's counts.
+
+        Requests are recorded with the earliest and latest Request Start Time
+        of their rows.
+
+        Args:
+            finder (DuplicateFinder): Finder holding the requests of this run
+            seen (Optional[float]): Time of this run as a Unix timestamp, now if None,
+                recorded for requests without a usable Request Start Time
+            update (bool): Add the counts; False only looks up history, e.g. for
+                requests already recorded
+
+        Returns:
+            Dict[str, Any]: Number of signatures seen in earlier runs, number of
+            new signatures, and the history of duplicate groups seen before,
+            keyed like the duplicate groups of the finder's result
+        """
+        if seen is None:
+            seen = time.time()
+        counts: Dict[bytes, Tuple[int, float, float]] = {}
+        duplicate_keys: Dict[bytes, str] = {}
+        for key, rows in finder.iter_groups():
+            sig = _group_signature(finder, key, rows[0])
+            first, last = _request_times(rows, seen)
+            if sig in counts:
+                count, earlier, later = counts[sig]
+                first, last = min(first, earlier), max(last, later)
+                counts[sig] = (count + len(rows), first, last)
+            else:
+                counts[sig] = (len(rows), first, last)
+            if len(rows) > 1:
+                duplicate_keys[sig] = _format_key(key)
+
+        # Visit the primary key in order instead of jumping between pages
+        ordered = sorted(counts)
+        history: Dict[bytes, Dict[str, Any]] = {}
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE" if update else "BEGIN")
+            try:
+                for start in range(0, len(ordered), _LOOKUP_CHUNK):
+                    self._select(ordered[start:start + _LOOKUP_CHUNK], history)
+                if update:
+                    for batch in self._batches((sig,) + counts[sig] for sig in ordered):
+                        self._connection.executemany(_UPSERT, batch)
+                self._connection.commit()
+            except BaseException:
+                self._connection.rollback()
+                raise
+        return {
+            "seen_before": len(history),
+            "new": len(counts) - len(history),
+            "groups": {key: history[sig] for sig, key in duplicate_keys.items() if sig in history}
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get index path and size.
+
+        Returns:
+            Dict[str, Any]: Path, number of signatures and total requests counted
+        """
+        with self._lock:
+            signatures, requests = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(count), 0) FROM signatures").fetchone()
+        return {"path": self.path, "signatures": signatures, "requests": requests}
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
+
+
+def indexed_result(finder: DuplicateFinder, index: Optional[SignatureIndex],
+                   update: bool = True) -> Dict[str, Any]:
+    """
+    Get finder results, recording the requests in the index if there is one.
+
+    Args:
+        finder (DuplicateFinder): Finder holding the requests of this run
+        index (Optional[SignatureIndex]): Index to record the requests in
+        update (bool): Add the requests to the index; False only looks up their history
+
+    Returns:
+        Dict[str, Any]: Processing results, see DuplicateFinder.result, plus
+        'history' from SignatureIndex.record when an index is given
+    """
+    result = finder.result()
+    if index is not None:
+        result["history"] = index.record(finder, update=update)
+    return result
+
+
+# Open indexes of this process by path, connections are not shared with forked processes
+_indexes: Dict[str, SignatureIndex] = {}
+_indexes_pid = os.getpid()
+_indexes_lock = threading.Lock()
+
+
+def open_index(path: str) -> SignatureIndex:
+    """
+    Get the index at a path, opening it once per process.
+
+    Args:
+        path (str): SQLite database file, created if missing
+
+    Returns:
+        SignatureIndex: Index shared by the threads of this process
+
+    Raises:
+        ValueError: If the file is not a signature index
+    """
+    global _indexes_pid
+    path = os.path.abspath(path)
+    with _indexes_lock:
+        if _indexes_pid != os.getpid():
+            # Forked worker: connections of the parent must not be used here
+            _indexes.clear()
+            _indexes_pid = os.getpid()
+        index = _indexes.get(path)
+        if index is None:
+            index = _indexes[path] = SignatureIndex(path)
+        return index
+
+
+# Index used by API endpoints, configured at startup
+_index_path: Optional[str] = None
+
+
+def configure_signature_index(path: Optional[str]) -> None:
+    """
+    Set the index used by API endpoints.
+
+    Args:
+        path (Optional[str]): SQLite database file, None disables the index
+    """
+    global _index_path
+    _index_path = os.path.abspath(path) if path else None
+
+
+def get_signature_index() -> Optional[SignatureIndex]:
+    """
+    Get the index used by API endpoints.
+
+    Returns:
+        Optional[SignatureIndex]: Index, or None if not configured
+    """
+    return open_index(_index_path) if _index_path else None
@@ -0,0 +1,300 @@
+"""Approximate duplicate analysis with fixed-memory sketches."""
+
+import hashlib
+import heapq
+import math
+from array import array
+from collections import defaultdict
+from typing import List, Dict, Any, Iterable, Mapping, Optional, Sequence, Tuple
+
+from model import _create_comparison_key, _canonicalize_url
+from templates import get_templater
+
+# Defaults sized for roughly 1 MB of sketch memory
+DEFAULT_TOP: int = 100
+DEFAULT_WIDTH: int = 16384
+DEFAULT_DEPTH: int = 4
+DEFAULT_PRECISION: int = 14
+DEFAULT_CAPACITY: int = 4096
+
+
+def _hash_key(key: str) -> Tuple[bytes, int, int]:
+    """
+    Hash comparison key once for all sketches.
+
+    Args:
+        key (str): Comparison key
+
+    Returns:
+        Tuple[bytes, int, int]: 128-bit digest and its two 64-bit halves
+    """
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+    return digest, int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little')
+
+
+class CountMinSketch:
+    """
+    Count-Min sketch: frequency estimates that never undercount.
+
+    With probability at least 1 - delta an estimate exceeds the true count
+    by at most epsilon * total, where epsilon = e / width and
+    delta = exp(-depth).
+    """
+
+    def __init__(self, width: int = DEFAULT_WIDTH, depth: int = DEFAULT_DEPTH) -> None:
+        if width < 1 or depth < 1:
+            raise ValueError("Count-Min sketch width and depth must be positive")
+        self.width = width
+        self.depth = depth
+        self.total = 0
+        self._table = array('Q', bytes(8 * width * depth))
+
+    def _cells(self, h1: int, h2: int) -> List[int]:
+        width = self.width
+        return [row * width + (h1 + row * h2) % width for row in range(self.depth)]
+
+    def add(self, h1: int, h2: int, count: int = 1) -> int:
+        """
+        Count an item given its two hash values.
+
+        Args:
+            h1 (int): First 64-bit hash of the item
+            h2 (int): Second 64-bit hash of the item
+            count (int): Number of occurrences to add
+
+        Returns:
+            int: New frequency estimate of the item
+        """
+        table = self._table
+        estimate = None
+        for cell in self._cells(h1, h2):
+            table[cell] += count
+            if estimate is None or table[cell] < estimate:
+                estimate = table[cell]
+        self.total += count
+        return estimate
+
+    def estimate(self, h1: int, h2: int) -> int:
+        """
+        Get frequency estimate of an item.
+
+        Args:
+            h1 (int): First 64-bit hash of the item
+            h2 (int): Second 64-bit hash of the item
+
+        Returns:
+            int: Frequency estimate, never lower than the true count
+        """
+        table = self._table
+        return min(table[cell] for cell in self._cells(h1, h2))
+
+    @property
+    def epsilon(self) -> float:
+        """Maximum overestimate as a fraction of all counted items."""
+        return math.e / self.width
+
+    @property
+    def delta(self) -> float:
+        """Probability that an estimate exceeds the epsilon bound."""
+        return math.exp(-self.depth)
+
+
+class SpaceSaving:
+    """
+    Space-Saving top-k summary over a fixed number of counters.
+
+    Every monitored item has a count that overestimates its true frequency
+    by at most its recorded error, and any item more frequent than
+    total / capacity is guaranteed to be monitored.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError("Space-Saving capacity must be positive")
+        self.capacity = capacity
+        self.total = 0
+        self._counts: Dict[bytes, int] = {}
+        self._errors: Dict[bytes, int] = {}
+        self._items: Dict[bytes, Any] = {}
+        # Min-heap of (count, item) with stale entries skipped lazily
+        self._heap: List[Tuple[int, bytes]] = []
+
+    def add(self, item: bytes, payload: Any = None) -> None:
+        """
+        Count an item.
+
+        Args:
+            item (bytes): Item identifier, e.g. a digest
+            payload (Any): Value kept while the item is monitored, e.g. a sample row
+        """
+        self.total += 1
+        counts = self._counts
+        count = counts.get(item)
+        if count is not None:
+            counts[item] = count + 1
+            heapq.heappush(self._heap, (count + 1, item))
+        elif len(counts) < self.capacity:
+            counts[item] = 1
+            self._errors[item] = 0
+            self._items[item] = payload
+            heapq.heappush(self._heap, (1, item))
+        else:
+            # Replace the item with the smallest count, inheriting its count as error
+            minimum, victim = self._pop_minimum()
+            del counts[victim], self._errors[victim], self._items[victim]
+            counts[item] = minimum + 1
+            self._errors[item] = minimum
+            self._items[item] = payload
+            heapq.heappush(self._heap, (minimum + 1, item))
+
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(c, i) for i, c in counts.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_minimum(self) -> Tuple[int, bytes]:
+        heap = self._heap
+        while True:
+            count, item = heapq.heappop(heap)
+            if self._counts.get(item) == count:
+                return count, item
+
+    def top(self, limit: int) -> List[Tuple[bytes, int, int, Any]]:
+        """
+        Get most frequent monitored items.
+
+        Args:
+            limit (int): Maximum number of items
+
+        Returns:
+            List[Tuple[bytes, int, int, Any]]: Item, count, error and payload,
+            most frequent first
+        """
+        ranked = heapq.nlargest(limit, self._counts.items(), key=lambda entry: entry[1])
+        return [(item, count, self._errors[item], self._items[item]) for item, count in ranked]
+
+    @property
+    def max_error(self) -> int:
+        """Maximum overestimate of any monitored count."""
+        return self.total // self.capacity
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter with 2 ** precision one-byte registers."""
+
+    def __init__(self, precision: int = DEFAULT_PRECISION) -> None:
+        if not 4 <= precision <= 18:
+            raise ValueError("HyperLogLog precision must be between 4 and 18")
+        self.precision = precision
+        self._registers = bytearray(1 << precision)
+
+    def add(self, h: int) -> None:
+        """
+        Count an item given its 64-bit hash.
+
+        Args:
+            h (int): 64-bit hash of the item
+        """
+        bits = 64 - self.precision
+        index = h >> bits
+        rest = h & ((1 << bits) - 1)
+        rank = bits - rest.bit_length() + 1
+        if rank > self._registers[index]:
+            self._registers[index] = rank
+
+    def estimate(self) -> float:
+        """
+        Estimate number of distinct items.
+
+        Returns:
+            float: Distinct count estimate
+        """
+        m = len(self._registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -r for r in self._registers)
+        zeros = self._registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            return m * math.log(m / zeros)
+        return raw
+
+    @property
+    def relative_error(self) -> float:
+        """Relative standard error of the estimate."""
+        return 1.04 / math.sqrt(len(self._registers))
+
+
+def approximate_duplicates(rows: Iterable[Mapping[str, Any]], top: int = DEFAULT_TOP,
+                           width: int = DEFAULT_WIDTH, depth: int = DEFAULT_DEPTH,
+                           precision: int = DEFAULT_PRECISION,
+                           capacity: Optional[int] = None, template: bool = False,
+                           template_patterns: Sequence[str] = ()) -> Dict[str, Any]:
+    """
+    Find most repeated request signatures in fixed memory.
+
+    Counts go to a Count-Min sketch, candidates for the top list are tracked
+    by Space-Saving and distinct signatures are counted with HyperLogLog.
+    Memory does not depend on the number of rows or distinct signatures.
+
+    Args:
+        rows (Iterable[Mapping[str, Any]]): Rows to analyze, e.g. from iter_csv
+        top (int): Number of heavy hitters to report
+        width (int): Count-Min sketch width
+        depth (int): Count-Min sketch depth
+        precision (int): HyperLogLog precision, 2 ** precision registers
+        capacity (Optional[int]): Space-Saving counters, by default the larger
+            of DEFAULT_CAPACITY and 10 * top
+        template (bool): Count URL templates instead of exact URLs
+        template_patterns (Sequence[str]): Extra patterns for template mode, see UrlTemplater
+
+    Returns:
+        Dict[str, Any]: Total rows, estimated distinct signatures and
+        duplicates, heavy hitters with count bounds, exact statistics and
+        error bounds of all estimates
+    """
+    sketch = CountMinSketch(width, depth)
+    summary = SpaceSaving(capacity or max(DEFAULT_CAPACITY, 10 * top))
+    distinct = HyperLogLog(precision)
+    code_counts: Dict[str, int] = defaultdict(int)
+    method_counts: Dict[str, int] = defaultdict(int)
+    templater = get_templater(tuple(template_patterns), _canonicalize_url) if template else None
+
+    for row in rows:
+        digest, h1, h2 = _hash_key(_create_comparison_key(row, templater))
+        sketch.add(h1, h2)
+        summary.add(digest, row)
+        distinct.add(h1)
+        code_counts[row.get('Response Code', 'No code')] += 1
+        method_counts[row.get('Method', 'No method')] += 1
+
+    total = sketch.total
+    distinct_estimate = min(float(total), distinct.estimate())
+
+    heavy_hitters = []
+    for _, count, error, row in summary.top(top):
+        key = _create_comparison_key(row, templater)
+        _, h1, h2 = _hash_key(key)
+        upper = min(count, sketch.estimate(h1, h2))
+        if upper < 2:
+            continue
+        heavy_hitters.append({
+            "key": key,
+            "count": upper,
+            "count_lower_bound": max(count - error, 1),
+            "row": row
+        })
+
+    return {
+        "approximate": True,
+        "total_rows": total,
+        "distinct_estimate": round(distinct_estimate),
+        "duplicates_count_estimate": round(total - distinct_estimate),
+        "heavy_hitters": heavy_hitters,
+        "statistics": {'codes': dict(code_counts), 'methods': dict(method_counts)},
+        "error_bounds": {
+            "count_overestimate": math.ceil(sketch.epsilon * total),
+            "count_confidence": 1 - sketch.delta,
+            "space_saving_max_error": summary.max_error,
+            "distinct_relative_std_error": distinct.relative_error,
+            "duplicates_count_std_error": round(distinct.relative_error * distinct_estimate)
+        }
+    }
@@ -0,0 +1,138 @@
+"""URL templates: path segments holding IDs replaced with placeholders."""
+
+import functools
+import re
+from typing import Callable, Dict, Match, Optional, Sequence, Tuple
+
+# Built-in segment patterns with their placeholder names, in order of precedence.
+# Hex segments need a digit, so words made of the letters a-f stay as they are.
+BUILTIN_PATTERNS: Tuple[Tuple[str, str], ...] = (
+    ('uuid', r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}'),
+    ('id', r'[0-9]+'),
+    ('hex', r'(?=[a-fA-F]*[0-9])[0-9a-fA-F]{8,}'),
+)
+
+# Placeholder name of user patterns given without one
+DEFAULT_PATTERN_NAME: str = 'param'
+
+# Number of templated URLs cached per templater
+TEMPLATE_CACHE_SIZE: int = 65536
+
+_NAMED_PATTERN_RE = re.compile(r'([A-Za-z_][A-Za-z0-9_]*)=(.+)\Z', re.DOTALL)
+
+
+def parse_pattern(pattern: str) -> Tuple[str, str]:
+    """
+    Split a user pattern 'name=regex' into placeholder name and regex.
+
+    Args:
+        pattern (str): 'name=regex', or just a regex for the 'param' placeholder
+
+    Returns:
+        Tuple[str, str]: Placeholder name and regex
+
+    Raises:
+        ValueError: If the regex does not compile or matches empty segments
+    """
+    match = _NAMED_PATTERN_RE.match(pattern)
+    name, regex = match.groups() if match else (DEFAULT_PATTERN_NAME, pattern)
+    try:
+        compiled = re.compile(regex)
+    except re.error as e:
+        raise ValueError(f"Invalid URL pattern {pattern!r}: {str(e)}")
+    if compiled.fullmatch(''):
+        raise ValueError(f"Invalid URL pattern {pattern!r}: matches empty segments")
+    return name, regex
+
+
+class UrlTemplater:
+    """
+    Replace whole path segments matching ID patterns with '{name}' placeholders.
+
+    All patterns are combined into one compiled regex of alternatives, one
+    capture group each, anchored at segment starts, so a path is templated
+    in a single scan no matter how many patterns there are. User patterns
+    are tried before the built-in ones. Only the path is templated; scheme,
+    host, query and fragment are kept.
+
+    Templates are cached by the raw URL and include its normalization, so a
+    repeated URL costs one cache lookup, less than exact keys pay.
+    """
+
+    def __init__(self, patterns: Sequence[str] = (),
+                 normalize: Optional[Callable[[str], str]] = None) -> None:
+        """
+        Compile user patterns together with the built-in ones.
+
+        Args:
+            patterns (Sequence[str]): User patterns, see parse_pattern
+            normalize (Optional[Callable[[str], str]]): Applied to URLs before
+                templating, e.g. ordering of query parameters
+
+        Raises:
+            ValueError: If a pattern is invalid
+        """
+        self.patterns = tuple(patterns)
+        self._normalize = normalize
+        named = [parse_pattern(pattern) for pattern in self.patterns] + list(BUILTIN_PATTERNS)
+        # The outer group of an alternative closes last, so it is the match's lastgroup
+        alternatives = '|'.join(f'(?P<_t{index}>{regex})' for index, (_, regex) in enumerate(named))
+        # Anchoring on the slash keeps the engine from trying every position inside segments
+        self._matcher = re.compile(f'/(?:{alternatives})(?=/|\\Z)')
+        self._placeholders: Dict[str, str] = {
+            f'_t{index}': '/{' + name + '}' for index, (name, _) in enumerate(named)
+        }
+        self.template = functools.lru_cache(maxsize=TEMPLATE_CACHE_SIZE)(self._template)
+
+    def __reduce__(self) -> Tuple[type, Tuple[Tuple[str, ...], Optional[Callable[[str], str]]]]:
+        # Compiled once more on unpickling, the cache is not carried over
+        return UrlTemplater, (self.patterns, self._normalize)
+
+    def _placeholder(self, match: Match) -> str:
+        return self._placeholders[match.lastgroup]
+
+    def _template(self, url: str) -> str:
+        """
+        Normalize a URL and template its path.
+
+        Args:
+            url (str): URL
+
+        Returns:
+            str: URL with matching path segments replaced by placeholders
+        """
+        if self._normalize is not None:
+            url = self._normalize(url)
+        scheme_end = url.find('://')
+        start = url.find('/', scheme_end + 3) if scheme_end >= 0 else url.find('/')
+        if start < 0:
+            return url
+        end = len(url)
+        for separator in ('?', '#'):
+            position = url.find(separator, start, end)
+            if position >= 0:
+                end = position
+        path = url[start:end]
+        templated = self._matcher.sub(self._placeholder, path)
+        if templated == path:
+            return url
+        return url[:start] + templated + url[end:]
+
+
+@functools.lru_cache(maxsize=16)
+def get_templater(patterns: Tuple[str, ...] = (),
+                  normalize: Optional[Callable[[str], str]] = None) -> UrlTemplater:
+    """
+    Get a templater, compiled once per process for the same arguments.
+
+    Args:
+        patterns (Tuple[str, ...]): User patterns, see parse_pattern
+        normalize (Optional[Callable[[str], str]]): Applied to URLs before templating
+
+    Returns:
+        UrlTemplater: Shared templater
+
+    Raises:
+        ValueError: If a pattern is invalid
+    """
+    return UrlTemplater(patterns, normalize)
@@ -0,0 +1,222 @@
+"""
+Endpoint tests for the REST API.
+"""
+
+import gzip
+import math
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+import api
+import batch
+from instrumentation import configure_request_profiler
+from jobs import configure_job_manager
+from pool import configure_analysis_pool, get_analysis_pool
+from result_cache import configure_result_cache
+from signature_index import configure_signature_index, get_signature_index
+from sketch import CountMinSketch, HyperLogLog
+
+SAMPLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'res', 'requests_08_26_06.06.2025.csv')
+FIND_DUPLICATES = f'/{api.API_VERSION}/api/find-duplicates'
+BATCH = f'/{api.API_VERSION}/api/find-duplicates/batch'
+JOBS = f'/{api.API_VERSION}/api/jobs'
+
+
+class TestFindDuplicates(unittest.TestCase):
+
+    def setUp(self):
+        configure_result_cache()
+        self.client = TestClient(api.app)
+        with open(SAMPLE_FILE, 'rb') as file:
+            self.data = file.read()
+
+    def tearDown(self):
+        configure_result_cache()
+        configure_request_profiler()
+        configure_analysis_pool()
+
+    def upload(self, query='', **kwargs):
+        return self.client.post(FIND_DUPLICATES + query, files={'file': ('sample.csv', self.data)}, **kwargs)
+
+    def test_result_cache(self):
+        """Test a repeated upload is answered from the cache and other options are not."""
+        first = self.upload()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.headers['X-Cache'], 'MISS')
+        repeated = self.upload()
+        self.assertEqual(repeated.headers['X-Cache'], 'HIT')
+        self.assertEqual(repeated.headers['X-Cache-Tier'], 'memory')
+        self.assertEqual(repeated.json(), first.json())
+
+        for query in ('?compact=true', '?template=true', '?key_mode=hash'):
+            with self.subTest(query=query):
+                self.assertEqual(self.upload(query).headers['X-Cache'], 'MISS')
+                self.assertEqual(self.upload(query).headers['X-Cache'], 'HIT')
+
+    def test_sketch_sizes(self):
+        """Test sketch size parameters reach the sketches and bad sizes are rejected."""
+        default = self.upload('?approximate=true').json()['error_bounds']
+        sized = self.upload('?approximate=true&sketch_width=16&sketch_depth=2&hll_precision=4'
+                            '&sketch_capacity=8').json()['error_bounds']
+        sketch = CountMinSketch(width=16, depth=2)
+        self.assertEqual(sized['count_overestimate'], math.ceil(sketch.epsilon * 170))
+        self.assertEqual(sized['count_confidence'], 1 - sketch.delta)
+        self.assertEqual(sized['distinct_relative_std_error'], HyperLogLog(precision=4).relative_error)
+        self.assertLess(default['distinct_relative_std_error'], sized['distinct_relative_std_error'])
+        self.assertGreater(sized['space_saving_max_error'], default['space_saving_max_error'])
+        self.assertEqual(self.upload('?approximate=true&hll_precision=20').status_code, 400)
+
+    def test_batch_default_workers(self):
+        """Test a batch of several files is parsed by one worker per file up to the number of CPUs."""
+        files = [('files', (f'{name}.csv', self.data)) for name in ('first', 'second', 'third')]
+        with mock.patch.object(batch.os, 'cpu_count', return_value=8), \
+                mock.patch.object(batch, 'ProcessPoolExecutor', wraps=ThreadPoolExecutor) as executor:
+            response = self.client.post(BATCH, files=files)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['merged']['total_rows'], 3 * 170)
+        executor.assert_called_once_with(max_workers=3)
+
+    def test_indexed_pages_recorded_once(self):
+        """Test later pages of an indexed upload do not record its requests again."""
+        with tempfile.TemporaryDirectory() as directory:
+            configure_signature_index(os.path.join(directory, 'index.db'))
+            try:
+                first = self.upload('?index=true&limit=5')
+                self.assertEqual(first.headers['X-Cache'], 'BYPASS')
+                cursor = first.json()['next_cursor']
+                second = self.upload(f'?index=true&limit=5&cursor={cursor}')
+                self.assertEqual(second.headers['X-Cache'], 'HIT')
+                self.assertEqual(second.json()['history'], first.json()['history'])
+
+                # Once the result is evicted, later pages only look up history
+                configure_result_cache()
+                evicted = self.upload(f'?index=true&limit=5&cursor={cursor}')
+                self.assertEqual(evicted.headers['X-Cache'], 'MISS')
+                self.assertEqual(evicted.json()['duplicates'], second.json()['duplicates'])
+                self.assertEqual(get_signature_index().stats()['requests'], 170)
+            finally:
+                get_signature_index().close()
+                configure_signature_index(None)
+
+    def test_saturated_pool(self):
+        """Test uploads are rejected with 503 while the analysis pool is full."""
+        configure_analysis_pool(workers=1, max_pending=0)
+        release = threading.Event()
+        running = get_analysis_pool().submit(release.wait)
+        try:
+            response = self.upload()
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.headers['Retry-After'], '1')
+        finally:
+            release.set()
+            running.result()
+        self.assertEqual(self.upload().status_code, 200)
+        self.assertEqual(self.client.get(f'/{api.API_VERSION}/api/pool').json()['rejected'], 1)
+
+    def test_profile(self):
+        """Test profiled requests bypass the cache, report stages and are counted in metrics."""
+        with tempfile.TemporaryDirectory() as directory:
+            configure_request_profiler(directory)
+            response = self.upload()
+            self.assertEqual(response.headers['X-Cache'], 'MISS')
+            # Keys are timed one by one only when asked for
+            self.assertNotIn('normalize;dur=', response.headers['Server-Timing'])
+            for _ in range(2):
+                response = self.upload('?profile=true')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.headers['X-Cache'], 'BYPASS')
+                self.assertIn('parse;dur=', response.headers['Server-Timing'])
+                self.assertIn('normalize;dur=', response.headers['Server-Timing'])
+                self.assertTrue(os.path.exists(os.path.join(directory, response.headers['X-Profile-Dump'])))
+
+            # Sampled requests are profiled without asking
+            configure_request_profiler(directory, sample_rate=1.0)
+            self.assertEqual(self.upload().headers['X-Cache'], 'BYPASS')
+
+        metrics = self.client.get('/metrics')
+        self.assertEqual(metrics.status_code, 200)
+        self.assertIn('duplicate_finder_request_seconds_count{endpoint="find-duplicates"}', metrics.text)
+        self.assertIn('duplicate_finder_stage_seconds_count{stage="parse"}', metrics.text)
+
+
+class TestJobs(unittest.TestCase):
+
+    def setUp(self):
+        configure_job_manager()
+        self.client = TestClient(api.app)
+
+    def tearDown(self):
+        configure_job_manager()
+
+    def test_job_lifecycle(self):
+        """Test a submitted job is accepted, polled until done and its result fetched."""
+        with open(SAMPLE_FILE, 'rb') as file:
+            submitted = self.client.post(JOBS, files={'file': ('sample.csv', file)})
+        self.assertEqual(submitted.status_code, 202)
+        job_id = submitted.json()['job_id']
+
+        deadline = time.monotonic() + 30
+        while True:
+            job = self.client.get(f'{JOBS}/{job_id}').json()
+            if job['status'] in ('done', 'failed') or time.monotonic() > deadline:
+                break
+            time.sleep(0.05)
+        self.assertEqual(job['status'], 'done')
+        self.assertEqual(job['rows_processed'], 170)
+
+        result = self.client.get(f'{JOBS}/{job_id}/result')
+        self.assertEqual(result.status_code, 200)
+        self.assertEqual(result.json()['total_rows'], 170)
+
+    def test_unknown_job(self):
+        """Test unknown job ids are answered with 404."""
+        self.assertEqual(self.client.get(f'{JOBS}/missing').status_code, 404)
+        self.assertEqual(self.client.get(f'{JOBS}/missing/result').status_code, 404)
+
+
+class TestGzipRequests(unittest.TestCase):
+
+    def setUp(self):
+        configure_result_cache()
+        self.client = TestClient(api.app)
+        with open(SAMPLE_FILE, 'rb') as file:
+            request = self.client.build_request('POST', FIND_DUPLICATES, files={'file': ('sample.csv', file.read())})
+        self.body = request.read()
+        self.content_type = request.headers['Content-Type']
+
+    def tearDown(self):
+        configure_result_cache()
+
+    def post(self, body, encoding, client=None):
+        headers = {'Content-Type': self.content_type, 'Content-Encoding': encoding}
+        return (client or self.client).post(FIND_DUPLICATES, content=body, headers=headers)
+
+    def test_gzip_body(self):
+        """Test a gzip request body gives the result of the plain one."""
+        plain = self.client.post(FIND_DUPLICATES, content=self.body, headers={'Content-Type': self.content_type})
+        response = self.post(gzip.compress(self.body), 'gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), plain.json())
+
+    def test_invalid_bodies(self):
+        """Test corrupt, unsupported and oversized request bodies are rejected."""
+        self.assertEqual(self.post(gzip.compress(self.body)[:-100], 'gzip').status_code, 400)
+        self.assertEqual(self.post(b'not gzip', 'gzip').status_code, 400)
+        self.assertEqual(self.post(self.body, 'br').status_code, 415)
+
+        limited = TestClient(api.GzipRequestMiddleware(api.app, max_size=len(self.body) - 1))
+        self.assertEqual(self.post(gzip.compress(self.body), 'gzip', limited).status_code, 413)
+        # A small body decompressing far beyond the limit is stopped chunk by chunk
+        bomb = gzip.compress(b'\0' * (64 * api.DECOMPRESSED_CHUNK_SIZE))
+        self.assertEqual(self.post(bomb, 'gzip', limited).status_code, 413)
+
+
+if __name__ == '__main__':
+    unittest.main()
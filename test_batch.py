@@ -0,0 +1,82 @@
+"""
+Unit tests for batch analysis of several files.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import batch
+from batch import analyze_files, expand_paths, SOURCE_FIELD
+from model import analyze_rows, iter_csv
+
+HEADER = 'URL,Status,Response Code,Method,Request Start Time\n'
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        """Create two capture files sharing one request, plus a file that is not a capture."""
+        self.directory = tempfile.mkdtemp()
+        self.first = self.write('a.csv', ['/skipped', '/a', '/a', '/shared'])
+        self.second = self.write('b.csv', ['/skipped', '/shared', '/b', '/a'])
+        self.write('notes.txt', [])
+
+    def tearDown(self):
+        """Remove the files."""
+        shutil.rmtree(self.directory)
+
+    def write(self, name, urls):
+        """Write a capture file with one GET row per URL."""
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', newline='') as file:
+            file.write(HEADER)
+            for i, url in enumerate(urls):
+                file.write(f'{url},COMPLETE,200,GET,{i}\n')
+        return path
+
+    def test_expand_paths(self):
+        """Test that directories and globs expand to sorted capture files, each listed once."""
+        self.assertEqual(expand_paths([self.directory]), [self.first, self.second])
+        self.assertEqual(expand_paths([os.path.join(self.directory, 'b*'), self.first, self.second]),
+                         [self.second, self.first])
+        with self.assertRaises(ValueError):
+            expand_paths([os.path.join(self.directory, 'missing.csv')])
+
+    def test_per_file_and_cross_file_duplicates(self):
+        """Test that files are analyzed alone and together, with rows tagged by source."""
+        for workers in (1, 2, None):
+            result = analyze_files([self.first, self.second], workers)
+            self.assertEqual(result['files'][self.first]['duplicate_groups'], 1)
+            self.assertEqual(result['files'][self.second]['duplicate_groups'], 0)
+            merged = result['merged']
+            self.assertEqual(merged['total_rows'], 6)
+            self.assertEqual(merged['duplicate_groups'], 2)
+            self.assertEqual(result['cross_file_groups'], 2)
+            self.assertEqual(len(merged['duplicates']['/a-GET-200-COMPLETE']), 3)
+            shared = merged['duplicates']['/shared-GET-200-COMPLETE']
+            self.assertEqual([row[SOURCE_FIELD] for row in shared], [self.first, self.second])
+            # Merging must not change results of the first file
+            first = result['files'][self.first]
+            first['duplicates'] = {key: [dict(row) for row in rows] for key, rows in first['duplicates'].items()}
+            for row in first['duplicates']['/a-GET-200-COMPLETE']:
+                del row[SOURCE_FIELD]
+            self.assertEqual(first, analyze_rows(iter_csv(self.first)))
+
+    def test_default_workers(self):
+        """Test that files are parsed at once by one worker per file up to the number of CPUs."""
+        for cpus, expected in ((8, 2), (1, None)):
+            with mock.patch.object(batch.os, 'cpu_count', return_value=cpus), \
+                    mock.patch.object(batch, 'ProcessPoolExecutor', wraps=ThreadPoolExecutor) as executor:
+                analyze_files([self.first, self.second])
+            if expected is None:
+                executor.assert_not_called()
+            else:
+                executor.assert_called_once_with(max_workers=expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+Unit tests for the synthetic capture generator and the benchmark harness.
+"""
+
+import io
+import os
+import tempfile
+import unittest
+
+from benchmark import find_regressions, run_benchmarks
+from model import read_csv, find_duplicates
+from synthetic import CHARLES_COLUMNS, generate_capture, write_capture
+
+
+class TestSynthetic(unittest.TestCase):
+
+    def test_capture_shape(self):
+        """Test captures are reproducible, readable and repeat requests at the given ratio."""
+        first, second = io.StringIO(newline=''), io.StringIO(newline='')
+        repeats = write_capture(first, 2000, duplicate_ratio=0.5, url_length=80, seed=7)
+        write_capture(second, 2000, duplicate_ratio=0.5, url_length=80, seed=7)
+        self.assertEqual(first.getvalue(), second.getvalue())
+        self.assertTrue(first.getvalue().startswith(','.join(CHARLES_COLUMNS) + '\n'))
+        self.assertAlmostEqual(repeats / 2000, 0.5, delta=0.05)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'capture.csv')
+            generate_capture(path, 2000, duplicate_ratio=0.5, url_length=80, seed=7)
+            rows = read_csv(path, skip_header=False)
+        self.assertEqual(len(rows), 2000)
+        self.assertTrue(all(len(row['URL']) >= 80 for row in rows))
+        # Repeats with reordered query parameters are still duplicates
+        self.assertEqual(sum(count - 1 for count in find_duplicates(rows).values()), repeats)
+
+    def test_invalid_options(self):
+        """Test ratios outside 0..1 are rejected."""
+        with self.assertRaises(ValueError):
+            write_capture(io.StringIO(), 10, duplicate_ratio=1.5)
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_run_stages(self):
+        """Test chosen stages are timed and unknown ones rejected."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'capture.csv')
+            generate_capture(path, 500)
+            timings = run_benchmarks(path, repeat=1, stages=['get_stats', 'read_csv'])
+            with self.assertRaises(ValueError):
+                run_benchmarks(path, stages=['compile'])
+        self.assertEqual(list(timings), ['read_csv', 'get_stats'])
+        self.assertTrue(all(seconds >= 0 for seconds in timings.values()))
+
+    def test_regressions(self):
+        """Test only stages slower than the threshold and the noise floor regress."""
+        baseline = {'read_csv': 1.0, 'get_stats': 0.001, 'api_round_trip': None}
+        timings = {'read_csv': 1.3, 'get_stats': 0.002, 'api_round_trip': 5.0, 'print_results': 1.0}
+        self.assertEqual(len(find_regressions(timings, baseline, threshold=0.25)), 1)
+        self.assertEqual(find_regressions(timings, baseline, threshold=0.5), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+Unit tests for out-of-core duplicate detection.
+"""
+
+import os
+import tracemalloc
+import unittest
+from unittest import mock
+
+import external
+from external import analyze_external, parse_size
+from model import analyze_rows, iter_csv
+
+SAMPLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'res', 'requests_08_26_06.06.2025.csv')
+
+
+class TestExternal(unittest.TestCase):
+
+    def test_parse_size(self):
+        """Test parsing of human-readable sizes."""
+        self.assertEqual(parse_size('512'), 512)
+        self.assertEqual(parse_size('4K'), 4096)
+        self.assertEqual(parse_size('1.5GB'), 1536 * 1024 * 1024)
+        with self.assertRaises(ValueError):
+            parse_size('lots')
+
+    def test_matches_in_memory(self):
+        """Test that spilling to many small buckets gives the in-memory result."""
+        expected = analyze_rows(iter_csv(SAMPLE_FILE))
+        result = analyze_external(iter_csv(SAMPLE_FILE), parse_size('4K'),
+                                  size_hint=os.path.getsize(SAMPLE_FILE))
+        self.assertEqual(result, expected)
+        self.assertEqual(list(result['duplicates']), list(expected['duplicates']))
+        self.assertEqual(list(result['statistics']['codes']), list(expected['statistics']['codes']))
+
+    def test_rows_read_back_once(self):
+        """Test that keys are counted without reading rows, so spilled rows are read back once."""
+        with mock.patch.object(external, '_read_spill', wraps=external._read_spill) as read_spill:
+            result = analyze_external(iter_csv(SAMPLE_FILE), parse_size('1M'), size_hint=os.path.getsize(SAMPLE_FILE))
+        paths = [call.args[0] for call in read_spill.call_args_list]
+        rows = [path for path in paths if path.endswith(external.ROWS_SUFFIX)]
+        self.assertEqual(len(rows), len(set(rows)))
+        self.assertEqual(len(rows), len(paths) - len(rows))
+        self.assertEqual(result, analyze_rows(iter_csv(SAMPLE_FILE)))
+
+    def test_memory_limit(self):
+        """Test that mostly duplicate input many times the limit is analyzed within it."""
+        limit = parse_size('2M')
+
+        def rows():
+            for index in range(20000):
+                yield {'URL': f'https://example.com/api/{index % 200}', 'Method': 'POST', 'Response Code': '200',
+                       'Status': 'COMPLETE', 'Request Body': f'{index % 200:0>1000}', 'Row': str(index)}
+
+        tracemalloc.start()
+        try:
+            result = analyze_external(rows(), limit)
+            sizes = {key: len(group) for key, group in result['duplicates'].items()}
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertLess(peak, limit)
+        self.assertEqual(result['duplicates_count'], 20000 - 200)
+        self.assertEqual(list(sizes.values()), [100] * 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
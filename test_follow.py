@@ -0,0 +1,114 @@
+"""
+Unit tests for following a growing log file.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import controller
+from follow import LogFollower
+
+HEADER = 'URL,Status,Response Code,Method,Request Start Time\n'
+
+
+class TestLogFollower(unittest.TestCase):
+
+    def setUp(self):
+        """Create a log with a header and one row that is skipped with it."""
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'requests.csv')
+        self.checkpoint = os.path.join(self.directory, 'requests.checkpoint')
+        self.append(HEADER + '/skipped,COMPLETE,200,GET,0\n')
+
+    def tearDown(self):
+        """Remove the files."""
+        shutil.rmtree(self.directory)
+
+    def append(self, data, mode='a'):
+        """Append text to the log."""
+        with open(self.path, mode, newline='') as file:
+            file.write(data)
+
+    def test_poll_reports_new_and_grown_groups(self):
+        """Test that each poll reads appended data only, waiting for incomplete lines."""
+        follower = LogFollower(self.path)
+        self.assertEqual(follower.poll(), [])
+
+        self.append('/a,COMPLETE,200,GET,1\n/b,COMPLETE,200,GET,2\n/a,COMPLETE,200,GET,3\n/b,COMPL')
+        updates = follower.poll()
+        self.assertEqual([len(rows) for _, rows in updates], [2])
+        self.assertIn('/a', updates[0][0])
+
+        self.append('ETE,200,GET,4\n/a,COMPLETE,200,GET,5\n')
+        updates = follower.poll()
+        self.assertEqual([(rows[-1]['URL'], len(rows)) for _, rows in updates], [('/b', 2), ('/a', 3)])
+        self.assertEqual(follower.poll(), [])
+
+        result = follower.result()
+        self.assertEqual(result['total_rows'], 5)
+        self.assertEqual(result['duplicate_groups'], 2)
+        self.assertEqual(result['duplicates_count'], 3)
+
+    def test_checkpoint_resume(self):
+        """Test that a restarted follower continues from the checkpoint without re-reading."""
+        follower = LogFollower(self.path, self.checkpoint)
+        self.append('/a,COMPLETE,200,GET,1\n/a,COMPLETE,200,GET,2\n/a,COMPL')
+        follower.poll()
+        follower.save_checkpoint()
+        offset = follower.offset
+
+        resumed = LogFollower(self.path, self.checkpoint)
+        self.assertEqual(resumed.offset, offset)
+        self.append('ETE,200,GET,3\n')
+        updates = resumed.poll()
+        self.assertEqual([len(rows) for _, rows in updates], [3])
+        self.assertEqual(resumed.result()['total_rows'], 3)
+
+        # A checkpoint made with other options is ignored
+        other = LogFollower(self.path, self.checkpoint, key_mode='hash')
+        self.assertEqual(other.offset, 0)
+
+    def test_failed_chunk_not_skipped(self):
+        """Test that a chunk failing to parse leaves offset, parser and checkpoint at the last good chunk."""
+        follower = LogFollower(self.path, self.checkpoint)
+        self.append('/a,COMPLETE,200,GET,1\n/a,COMPL')
+        follower.poll()
+        offset, pending = follower.offset, follower.parser.pending_bytes
+
+        with open(self.path, 'ab') as file:
+            file.write(b'ETE,200,GET,2\n/\xff,COMPLETE,200,GET,3\n')
+        with self.assertRaises(ValueError):
+            follower.poll()
+        self.assertEqual((follower.offset, follower.parser.pending_bytes), (offset, pending))
+        self.assertEqual(follower.result()['total_rows'], 1)
+
+        follower.save_checkpoint()
+        resumed = LogFollower(self.path, self.checkpoint)
+        self.assertEqual(resumed.offset, offset)
+        with self.assertRaises(ValueError):
+            resumed.poll()
+        self.assertEqual(resumed.result()['total_rows'], 1)
+
+    def test_follow_needs_single_file(self):
+        """Test that follow mode rejects several files, glob patterns and directories."""
+        for paths in ([self.path, self.path], os.path.join(self.directory, '*.csv'), self.directory):
+            with mock.patch('builtins.print') as output:
+                self.assertEqual(controller.main(paths, follow=True), 1)
+            self.assertIn('Follow mode follows a single file', output.call_args[0][0])
+
+    def test_truncated_file_starts_over(self):
+        """Test that a truncated or rotated log is read again from its beginning."""
+        follower = LogFollower(self.path)
+        self.append('/a,COMPLETE,200,GET,1\n/a,COMPLETE,200,GET,2\n/b,COMPLETE,200,GET,3\n')
+        follower.poll()
+
+        self.append(HEADER + '/skipped,COMPLETE,200,GET,0\n/c,COMPLETE,200,GET,1\n', mode='w')
+        self.assertEqual(follower.poll(), [])
+        self.assertEqual(follower.result()['total_rows'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
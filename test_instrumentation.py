@@ -0,0 +1,90 @@
+"""
+Unit tests for run profiles, Prometheus metrics and request profiling.
+"""
+
+import os
+import tempfile
+import time
+import unittest
+
+from instrumentation import MetricsRegistry, RequestProfiler, RunProfile, profiled, server_timing
+from model import DuplicateFinder
+
+
+class TestRunProfile(unittest.TestCase):
+
+    def test_nested_stages(self):
+        """Test a stage excludes the time of stages recorded inside it."""
+        run = RunProfile()
+        with run.stage('group'):
+            time.sleep(0.02)
+            with run.stage('metrics'):
+                time.sleep(0.05)
+        self.assertGreaterEqual(run.stages['metrics'], 0.05)
+        self.assertLess(run.stages['group'], 0.05)
+
+    def test_rows_and_keys(self):
+        """Test timed rows and keys record parse and normalize without changing results."""
+        rows = [{'URL': f'https://example.com/{index % 3}', 'Method': 'GET', 'Response Code': '200',
+                 'Status': 'COMPLETE'} for index in range(3000)]
+        run = RunProfile()
+        with run.stage('group'):
+            result = run.timed_keys(DuplicateFinder()).update(run.timed_rows(rows)).result()
+        self.assertEqual(result, DuplicateFinder().update(rows).result())
+        self.assertEqual(set(run.stages), {'parse', 'normalize', 'group'})
+        with run.sample_memory():
+            pass
+        profile = run.to_dict()
+        self.assertIsNotNone(profile['peak_memory_bytes'])
+        self.assertEqual(server_timing(profile).count(';dur='), 3)
+
+        untimed = RunProfile(time_keys=False)
+        finder = DuplicateFinder()
+        self.assertIs(untimed.timed_keys(finder), finder)
+        self.assertNotIn('key', vars(finder))
+
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def test_exposition(self):
+        """Test histograms have cumulative buckets and counters sum profiles."""
+        registry = MetricsRegistry()
+        profile = {'stages': {'parse': 0.2}, 'rows': 10, 'bytes': 500, 'peak_memory_bytes': 2 ** 25}
+        registry.record('find-duplicates', 0.02, profile)
+        registry.record('find-duplicates', 0.3, profile)
+        registry.record('find-duplicates', 1000.0)
+        lines = registry.expose().splitlines()
+        self.assertIn('duplicate_finder_request_seconds_bucket{endpoint="find-duplicates",le="0.025"} 1', lines)
+        self.assertIn('duplicate_finder_request_seconds_bucket{endpoint="find-duplicates",le="0.5"} 2', lines)
+        self.assertIn('duplicate_finder_request_seconds_bucket{endpoint="find-duplicates",le="+Inf"} 3', lines)
+        self.assertIn('duplicate_finder_request_seconds_count{endpoint="find-duplicates"} 3', lines)
+        self.assertIn('duplicate_finder_stage_seconds_count{stage="parse"} 2', lines)
+        self.assertIn('duplicate_finder_rows_total 20', lines)
+        self.assertIn('duplicate_finder_bytes_total 1000', lines)
+
+
+class TestRequestProfiling(unittest.TestCase):
+
+    def test_dumps(self):
+        """Test only chosen requests are profiled and only slow runs are dumped."""
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertIsNone(RequestProfiler().dump_path(requested=True))
+            profiler = RequestProfiler(directory)
+            self.assertIsNone(profiler.dump_path())
+            path = profiler.dump_path(requested=True)
+            with profiled(path) as outcome:
+                sum(range(1000))
+            self.assertEqual(outcome['dump'], path)
+            self.assertTrue(os.path.getsize(path))
+
+            skipped = profiler.dump_path(requested=True)
+            with profiled(skipped, min_seconds=60) as outcome:
+                pass
+            self.assertIsNone(outcome['dump'])
+            self.assertFalse(os.path.exists(skipped))
+        with self.assertRaises(ValueError):
+            RequestProfiler(sample_rate=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+Unit tests for background analysis jobs.
+"""
+
+import io
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from jobs import JobManager, track_progress
+from pool import PoolSaturatedError
+
+
+def count_lines(stream, size, progress=None, fail=False):
+    """Job task counting lines of the stored upload."""
+    if fail:
+        raise ValueError("broken upload")
+    lines = list(track_progress(stream, progress, interval=2))
+    return {"size": size, "lines": len(lines)}
+
+
+class TestJobManager(unittest.TestCase):
+
+    def setUp(self):
+        """Create a job manager with one worker."""
+        self.manager = JobManager(workers=1, max_queued=4, result_ttl=60)
+
+    def tearDown(self):
+        """Stop job workers."""
+        self.manager.shutdown()
+
+    def wait(self, job):
+        """Wait until the job finishes."""
+        while job.finished is None:
+            time.sleep(0.01)
+
+    def test_job_result_and_progress(self):
+        """Test that a job runs on a stored copy of the upload and reports progress."""
+        job = self.manager.submit(io.BytesIO(b'a\nb\nc\n'), count_lines)
+        self.wait(job)
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(job.result, {"size": 6, "lines": 3})
+        self.assertEqual(job.rows_processed, 3)
+        self.assertFalse(os.path.exists(job.path))
+        self.assertIs(self.manager.get(job.id), job)
+
+    def test_failed_job(self):
+        """Test that task errors are recorded on the job."""
+        job = self.manager.submit(io.BytesIO(b'a\n'), count_lines, fail=True)
+        self.wait(job)
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.error, "broken upload")
+        self.assertEqual(self.manager.stats()['jobs']['failed'], 1)
+
+    def test_finished_jobs_expire(self):
+        """Test that finished jobs are evicted after the result TTL."""
+        job = self.manager.submit(io.BytesIO(b'a\n'), count_lines)
+        self.wait(job)
+        self.manager.result_ttl = 0
+        job.finished -= 1
+        self.assertIsNone(self.manager.get(job.id))
+
+    def test_finished_jobs_capped(self):
+        """Test that the oldest finished jobs are evicted beyond max results."""
+        self.manager.max_results = 2
+        jobs = []
+        for _ in range(3):
+            jobs.append(self.manager.submit(io.BytesIO(b'a\n'), count_lines))
+            self.wait(jobs[-1])
+        self.assertIsNone(self.manager.get(jobs[0].id))
+        self.assertIs(self.manager.get(jobs[1].id), jobs[1])
+        self.assertIs(self.manager.get(jobs[2].id), jobs[2])
+
+    def test_full_queue_rejects_before_storing(self):
+        """Test that uploads are not copied to disk when the job queue is full."""
+        release = threading.Event()
+        with tempfile.TemporaryDirectory() as directory:
+            manager = JobManager(workers=1, max_queued=0, directory=directory)
+            try:
+                running = manager.submit(io.BytesIO(b'a\n'), lambda stream, size, progress: release.wait())
+                upload = mock.Mock(wraps=io.BytesIO(b'b\n'))
+                with self.assertRaises(PoolSaturatedError):
+                    manager.submit(upload, count_lines)
+                upload.read.assert_not_called()
+                self.assertEqual(os.listdir(directory), [os.path.basename(running.path)])
+            finally:
+                release.set()
+                manager.shutdown()
+            self.assertEqual(running.status, 'done')
+            self.assertEqual(manager.stats()['pool']['in_flight'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+Unit tests for cost metrics of duplicate groups.
+"""
+
+import unittest
+from unittest import mock
+
+import metrics
+from metrics import duplicate_metrics
+from result_format import shape_result
+
+
+def make_row(duration, latency, request_bytes='', response_bytes=''):
+    """Build a row with the metric columns."""
+    return {'Duration (ms)': duration, 'Latency (ms)': latency,
+            'Request Body Size (bytes)': request_bytes, 'Response Body Size (bytes)': response_bytes,
+            'Request Start Time': '1'}
+
+
+GROUPS = {
+    'a': [make_row('10', '1', '5', '100'), make_row('20', '2', '5', '100'), make_row('30', '3', '', '50'),
+          make_row('40', '4', '5', '100'), make_row('', '', '', '')],
+    'b': [make_row('7', ''), make_row('n/a', '')]
+}
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_group_and_overall_metrics(self):
+        """Test repeats after the first request are summed and missing cells are skipped."""
+        result = duplicate_metrics(GROUPS)
+        self.assertEqual(result['groups']['a'], {
+            'requests': 5,
+            'wasted_duration_ms': 90.0,
+            'wasted_bytes': 260,
+            'latency_ms': {'p50': 2.5, 'p95': 3.85, 'p99': 3.97}
+        })
+        self.assertEqual(result['groups']['b']['wasted_duration_ms'], 0.0)
+        self.assertEqual(result['groups']['b']['latency_ms'], {'p50': None, 'p95': None, 'p99': None})
+        self.assertEqual(result['overall']['requests'], 7)
+        self.assertEqual(result['overall']['wasted_bytes'], 260)
+        self.assertEqual(duplicate_metrics({})['overall']['latency_ms']['p50'], None)
+
+    def test_python_fallback_matches(self):
+        """Test metrics without NumPy are the same as the vectorized ones."""
+        expected = duplicate_metrics(GROUPS)
+        with mock.patch.object(metrics, 'np', None):
+            self.assertEqual(duplicate_metrics(GROUPS), expected)
+
+    def test_compact_shape(self):
+        """Test compact results carry metrics per group and overall metrics at the top."""
+        result = {'total_rows': 7, 'duplicates': GROUPS, 'row_numbers': {'a': [1, 2, 3, 4, 5], 'b': [6, 7]},
+                  'metrics': duplicate_metrics(GROUPS)}
+        shaped = shape_result(result, compact=True)
+        self.assertEqual(shaped['groups'][1]['metrics']['requests'], 2)
+        self.assertEqual(list(shaped['metrics']), ['overall'])
+
+
+if __name__ == '__main__':
+    unittest.main()
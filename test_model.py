@@ -2,10 +2,16 @@
 Unit tests for the duplicate finder application.
 """
 
+import io
 import unittest
 import tempfile
 import os
-from model import read_csv, find_duplicates, get_stats
+import random
+from unittest import mock
+import model
+from model import read_csv, find_duplicates, get_stats, iter_csv, analyze_rows, REPORT_FIELDS, LRUCache
+from model import _canonicalize_url, _normalize_url_for_comparison, DuplicateFinder
+from model import iter_csv_stream, CsvRowParser
 
 
 class TestModel(unittest.TestCase):
@@ -54,6 +60,160 @@ class TestModel(unittest.TestCase):
         self.assertEqual(stats['methods']['GET'], 3)
         self.assertEqual(stats['methods']['POST'], 1)
 
+        
+    def test_analyze_rows(self):
+        """Test single-pass analysis matches find_duplicates and get_stats."""
+        rows = read_csv(self.temp_file.name)
+        result = analyze_rows(iter_csv(self.temp_file.name))
+        self.assertEqual(result['total_rows'], len(rows))
+        self.assertEqual(result['statistics'], get_stats(rows))
+        self.assertEqual({k: len(v) for k, v in result['duplicates'].items()}, find_duplicates(rows))
+        self.assertEqual(result['duplicates_count'], 1)
+        self.assertEqual(result['duplicate_groups'], 1)
+        
+    def test_hashed_keys(self):
+        """Test that hashed keys group rows exactly like string keys."""
+        rows = list(iter_csv(self.temp_file.name))
+        expected = DuplicateFinder().update(rows).groups()
+        for digest_size in (8, 16):
+            groups = DuplicateFinder(key_mode='hash', digest_size=digest_size,
+                                     verify_collisions=True).update(rows).groups()
+            self.assertEqual(list(groups.values()), list(expected.values()))
+            self.assertTrue(all(len(key) == digest_size * 2 for key in groups))
+            
+    def test_hash_collision_detected(self):
+        """Test that collision verification rejects different keys with equal digests."""
+        rows = list(iter_csv(self.temp_file.name))
+        finder = DuplicateFinder(key_mode='hash', verify_collisions=True)
+        with mock.patch('model.hashlib.blake2b') as blake2b:
+            blake2b.return_value.digest.return_value = b'\x00' * 16
+            with self.assertRaises(ValueError):
+                finder.update(rows)
+
+    def test_collision_check_keys_rows_once(self):
+        """Test that verified rows are keyed once and groups keep a digest, not the key."""
+        row = {'URL': 'http://example.com/' + 'a' * 1000, 'Method': 'GET', 'Response Code': '200',
+               'Status': 'COMPLETE'}
+        finder = DuplicateFinder(key_mode='hash', verify_collisions=True)
+        with mock.patch('model._create_comparison_key', wraps=model._create_comparison_key) as create_key:
+            finder.update([row] * 10)
+        self.assertEqual(create_key.call_count, 10)
+        self.assertEqual(finder.result()['duplicates_count'], 9)
+        self.assertEqual([len(check) for check in finder._checks.values()], [model.CHECK_DIGEST_SIZE])
+
+    def test_merged_collision_detected(self):
+        """Test that merging finders verifies groups found by both."""
+        rows = list(iter_csv(self.temp_file.name))
+        first = DuplicateFinder(key_mode='hash', verify_collisions=True).update(rows)
+        second = DuplicateFinder(key_mode='hash', verify_collisions=True).update(rows)
+        self.assertEqual(first.merge(second).total, 2 * len(rows))
+        second._checks = {key: b'\0' * model.CHECK_DIGEST_SIZE for key in second._checks}
+        with self.assertRaises(ValueError):
+            first.merge(second)
+
+        
+    def test_iter_csv_compact_rows(self):
+        """Test compact rows keep only reported columns unless asked for all."""
+        rows = read_csv(self.temp_file.name)
+        compact = list(iter_csv(self.temp_file.name))
+        full = list(iter_csv(self.temp_file.name, full_rows=True))
+        self.assertEqual(len(compact), len(rows))
+        self.assertEqual(list(compact[0]), list(REPORT_FIELDS))
+        self.assertEqual(compact[0]['URL'], 'http://example.com')
+        self.assertEqual(compact[0].get('Duration (ms)', 'n/a'), 'n/a')
+        self.assertEqual([row.to_dict() for row in full], rows)
+
+    def test_stream_parsing_any_chunk_size(self):
+        """Test incremental parsing matches file parsing wherever chunks are split."""
+        with open(self.temp_file.name, 'rb') as file:
+            data = file.read().replace(b'text/html', b'"text/\xc3\xa9,\n""x"""')
+        expected = [row.to_dict() for row in iter_csv_stream(io.BytesIO(data), full_rows=True)]
+        self.assertEqual(len(expected), 4)
+        self.assertEqual(expected[0]['Content-Type'], 'text/\u00e9,\n"x"')
+        for size in (1, 2, 7, 64):
+            parser = CsvRowParser(full_rows=True)
+            rows = []
+            for start in range(0, len(data), size):
+                rows.extend(parser.feed(data[start:start + size]))
+            rows.extend(parser.close())
+            self.assertEqual([row.to_dict() for row in rows], expected)
+            self.assertEqual(parser.bytes_parsed, len(data))
+
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_counters_and_eviction(self):
+        """Test hits, misses and least-recently-used eviction."""
+        cache = LRUCache(2)
+        self.assertEqual(cache.get_or_compute('a', str.upper), 'A')
+        self.assertEqual(cache.get_or_compute('b', str.upper), 'B')
+        self.assertEqual(cache.get_or_compute('a', str.upper), 'A')  # 'a' becomes most recent
+        cache.get_or_compute('c', str.upper)  # evicts 'b'
+        self.assertIsNone(cache.get('b'))
+        stats = cache.stats()
+        self.assertEqual(stats['size'], 2)
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 4)
+        self.assertEqual(stats['evictions'], 1)
+
+    def test_zero_size_disables_caching(self):
+        """Test that a zero-sized cache stores nothing."""
+        cache = LRUCache(0)
+        cache.get_or_compute('a', str.upper)
+        cache.get_or_compute('a', str.upper)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.stats()['misses'], 2)
+
+
+
+class TestCanonicalizeUrl(unittest.TestCase):
+
+    def _random_url(self, rng):
+        """Build a random URL mixing common and pathological parts."""
+        def token(alphabet, size=4):
+            return ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, size)))
+
+        if rng.random() < 0.1:
+            return token('aZ09_.-~%+=&?#;/: \t\n[]@\u00e9{}"', 30)
+
+        if rng.random() < 0.7:
+            host = rng.choice(['example.com', 'host:80', '', '[::1]', 'a b', 'u@h', '\u00e9.com'])
+        else:
+            # Stray brackets make urlparse() reject the netloc
+            host = token('ab1.:@[]', 8)
+        url = (rng.choice(['http', 'https', 'HTTP', 'ftp', '', 'a+b', '1x'])
+               + rng.choice(['://', '://', ':', ':///', ''])
+               + host
+               + ''.join(rng.choice(['/', '/api', '/a;b', ';', '/%2F', '/x y', '//']) for _ in range(rng.randint(0, 3))))
+        if rng.random() < 0.9:
+            parts = []
+            for _ in range(rng.randint(0, 6)):
+                if rng.random() < 0.6:
+                    parts.append(token('abcAB12') + '=' + token('abc12_.-~'))
+                else:
+                    parts.append(token('abAB12_.-~%+= ;{}"\t\u00e9') + rng.choice(['=', '', '==']) + token('ab%20+{}"2F'))
+            url += '?' + '&'.join(parts)
+        if rng.random() < 0.3:
+            url += '#' + token('ab?#&= ')
+        return url
+
+    def test_matches_urllib_normalization(self):
+        """Property test: fast canonicalizer equals the urllib round-trip."""
+        rng = random.Random(20250606)
+        for _ in range(20000):
+            url = self._random_url(rng)
+            self.assertEqual(_canonicalize_url(url), _normalize_url_for_comparison(url), repr(url))
+        for url in ('http://h]x/?b=1&a=2', 'http://example.com]?b=1&a=2', 'http://[::1?b=1&a=2'):
+            self.assertEqual(_canonicalize_url(url), url)
+
+    def test_ordered_query_returned_as_is(self):
+        """Test that already ordered queries are not rebuilt."""
+        url = 'https://pl.iptv2021.com/api/v4/channels?lang=ru&page=2'
+        self.assertIs(_canonicalize_url(url), url)
+        self.assertEqual(_canonicalize_url('https://example.com/api?user=1&event=play'),
+                         'https://example.com/api?event=play&user=1')
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,67 @@
+"""
+Unit tests for multi-process duplicate detection.
+"""
+
+import csv
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+import parallel
+from model import analyze_rows, iter_csv
+
+
+class TestParallel(unittest.TestCase):
+
+    def setUp(self):
+        """Create a CSV file with quoted multi-line fields."""
+        rng = random.Random(42)
+        self.temp_file = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', newline='')
+        writer = csv.writer(self.temp_file)
+        writer.writerow(['URL', 'Status', 'Response Code', 'Method', 'Exception', 'Request Start Time'])
+        for i in range(500):
+            writer.writerow([
+                f'http://example.com/{rng.randint(0, 20)}?b={rng.randint(0, 2)}&a=1',
+                'COMPLETE',
+                rng.choice(['200', '404']),
+                rng.choice(['GET', 'POST']),
+                rng.choice(['', 'line one,\nline "two"\n', 'error']),
+                str(i)
+            ])
+        self.temp_file.close()
+
+    def tearDown(self):
+        """Clean up the temporary file."""
+        os.unlink(self.temp_file.name)
+
+    def test_split_on_record_boundaries(self):
+        """Test that ranges cover the data and never split quoted fields."""
+        with mock.patch.object(parallel, 'SCAN_BLOCK_SIZE', 64):
+            header, ranges = parallel.split_csv(self.temp_file.name, 8)
+        self.assertEqual(header[0], 'URL')
+        self.assertGreater(len(ranges), 1)
+        self.assertEqual(ranges[-1][1], os.path.getsize(self.temp_file.name))
+        with open(self.temp_file.name, 'rb') as file:
+            data = file.read()
+        for start, _ in ranges:
+            self.assertEqual(data[start - 1:start], b'\n')
+            self.assertEqual(data.count(b'"', 0, start) % 2, 0)
+
+    def test_matches_single_process(self):
+        """Test that merged results equal single-process results, including order."""
+        expected = analyze_rows(iter_csv(self.temp_file.name))
+        result = parallel.analyze_csv_parallel(self.temp_file.name, 3)
+        self.assertEqual(result, expected)
+        self.assertEqual(list(result['duplicates']), list(expected['duplicates']))
+
+    def test_row_numbers_continue_across_ranges(self):
+        """Test that row numbers of merged ranges match single-process numbering."""
+        expected = analyze_rows(iter_csv(self.temp_file.name), row_numbers=True)
+        result = parallel.analyze_csv_parallel(self.temp_file.name, 3, row_numbers=True)
+        self.assertEqual(result['row_numbers'], expected['row_numbers'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+"""
+Unit tests for the bounded analysis pool.
+"""
+
+import asyncio
+import threading
+import unittest
+
+from pool import AnalysisPool, PoolSaturatedError
+
+
+class TestAnalysisPool(unittest.TestCase):
+
+    def setUp(self):
+        """Create a pool with one worker and one waiting slot."""
+        self.pool = AnalysisPool('thread', workers=1, max_pending=1)
+
+    def tearDown(self):
+        """Stop pool workers."""
+        self.pool.shutdown()
+
+    def test_rejects_when_saturated(self):
+        """Test that tasks beyond workers + max_pending are rejected until slots free up."""
+        release = threading.Event()
+        running = [self.pool.submit(release.wait) for _ in range(2)]
+        with self.assertRaises(PoolSaturatedError):
+            self.pool.submit(release.wait)
+        self.assertEqual(self.pool.stats()['rejected'], 1)
+
+        release.set()
+        self.assertEqual([future.result() for future in running], [True, True])
+        # Joining the workers also waits for completion callbacks that free the slots
+        self.pool.shutdown()
+        self.assertEqual(self.pool.submit(sum, [1, 2]).result(), 3)
+        self.assertEqual(self.pool.stats()['completed'], 3)
+
+    def test_run_awaits_result(self):
+        """Test awaiting a task from a coroutine."""
+        result = asyncio.run(self.pool.run(sorted, [3, 1, 2]))
+        self.assertEqual(result, [1, 2, 3])
+
+    def test_invalid_kind(self):
+        """Test that unknown pool kinds are rejected."""
+        with self.assertRaises(ValueError):
+            AnalysisPool('fiber')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+Unit tests for capture format readers.
+"""
+
+import bz2
+import gzip
+import io
+import json
+import lzma
+import os
+import tempfile
+import unittest
+
+from model import analyze_rows
+from readers import detect_compression, detect_format, iter_json_array, iter_rows, iter_rows_stream
+
+SESSION = [
+    {"status": "COMPLETE", "method": "GET", "scheme": "https", "host": "a.com", "actualPort": 443,
+     "path": "/items", "query": "b=2&a=1", "times": {"start": "2025-06-06T07:05:08.120+03:00"},
+     "response": {"status": 200, "mimeType": "application/json", "charset": "UTF-8"}},
+    {"status": "COMPLETE", "method": "GET", "scheme": "https", "host": "a.com", "actualPort": 443,
+     "path": "/items", "query": "a=1&b=2", "times": {"start": "2025-06-06T07:05:09.000+03:00"},
+     "response": {"status": 200}},
+    {"status": "FAILED", "method": "CONNECT", "scheme": "https", "host": "b.com", "actualPort": 8443,
+     "path": None, "query": None, "errorMessage": "Connection refused", "response": None}
+]
+
+
+def make_har(session):
+    """Build a HAR document with the requests of a Charles JSON session."""
+    entries = [{
+        "startedDateTime": entry.get("times", {}).get("start", ""),
+        "time": 12.0,
+        "request": {"method": entry["method"], "url": f"https://{entry['host']}{entry['path'] or ''}"
+                                                      + (f"?{entry['query']}" if entry['query'] else ''),
+                    "headersSize": -1, "bodySize": 0},
+        "response": {"status": (entry["response"] or {}).get("status", 0), "content": {"mimeType": ""}}
+    } for entry in session]
+    return {"log": {"version": "1.2", "creator": {"name": "Charles Proxy"}, "entries": entries}}
+
+
+class TestReaders(unittest.TestCase):
+
+    def test_detect_format(self):
+        """Test formats are told apart by content and the stream is left in place."""
+        samples = {
+            b'URL,Status,Response Code,Method\n': 'csv',
+            b'{"URL": "u", "Method": "GET"}\n{"URL": "u"}\n': 'jsonl',
+            b'\xef\xbb\xbf{\n  "log": {\n    "entries": []\n  }\n}': 'har',
+            b'{"log": {"entries": []}}': 'har',
+            b'  [\n  {"host": "a.com"}\n]': 'chlsj'
+        }
+        for data, expected in samples.items():
+            stream = io.BytesIO(data)
+            self.assertEqual(detect_format(stream), expected)
+            self.assertEqual(stream.tell(), 0)
+
+    def test_charles_session(self):
+        """Test Charles JSON entries become rows shaped like CSV export rows."""
+        data = json.dumps(SESSION).encode('utf-8')
+        rows = [row.to_dict() for row in iter_rows_stream(io.BytesIO(data), full_rows=True)]
+        self.assertEqual([row['URL'] for row in rows],
+                         ['https://a.com/items?b=2&a=1', 'https://a.com/items?a=1&b=2', 'https://b.com:8443'])
+        self.assertEqual(rows[0]['Content-Type'], 'application/json; charset=UTF-8')
+        self.assertEqual(rows[2]['Response Code'], '')
+        self.assertEqual(rows[2]['Exception'], 'Connection refused')
+        result = analyze_rows(iter_rows_stream(io.BytesIO(data)))
+        self.assertEqual(result['duplicates_count'], 1)
+
+    def test_formats_agree(self):
+        """Test the same requests give the same groups as HAR, JSON session and JSON Lines."""
+        session = json.dumps(SESSION).encode('utf-8')
+        har = json.dumps(make_har(SESSION), indent=2).encode('utf-8')
+        lines = b''.join(json.dumps(row.to_dict()).encode('utf-8') + b'\n'
+                         for row in iter_rows_stream(io.BytesIO(session)))
+        results = [analyze_rows(iter_rows_stream(io.BytesIO(data))) for data in (session, har, lines)]
+        for result in results:
+            self.assertEqual(list(result['duplicates']), list(results[0]['duplicates']))
+
+        with tempfile.NamedTemporaryFile(suffix='.har', delete=False) as file:
+            file.write(har)
+        try:
+            self.assertEqual(len(list(iter_rows(file.name))), 3)
+        finally:
+            os.unlink(file.name)
+
+    def test_json_array_chunks(self):
+        """Test items are decoded across chunk boundaries, even inside numbers."""
+        data = '{"log": {"pages": [{"x": 1}], "entries": [12345, 2.5e3, "привет", {"a": [1]}]}}'.encode('utf-8')
+        items = list(iter_json_array(io.BytesIO(data), ('log', 'entries'), chunk_size=1))
+        self.assertEqual(items, [12345, 2500.0, 'привет', {"a": [1]}])
+
+    def test_compressed_captures(self):
+        """Test gzip, bzip2 and xz captures are detected by magic bytes and read like plain ones."""
+        data = json.dumps(SESSION).encode('utf-8')
+        expected = [row.to_dict() for row in iter_rows_stream(io.BytesIO(data))]
+        for name, compress in (('gzip', gzip.compress), ('bzip2', bz2.compress), ('xz', lzma.compress)):
+            stream = io.BytesIO(compress(data))
+            self.assertEqual(detect_compression(stream), name)
+            self.assertEqual([row.to_dict() for row in iter_rows_stream(stream)], expected)
+
+        with tempfile.NamedTemporaryFile(suffix='.gz', delete=False) as file:
+            file.write(gzip.compress(b'URL,Status,Response Code,Method\nu,C,200,GET\nu,C,200,GET\nu,C,200,GET\n'))
+        try:
+            self.assertEqual(analyze_rows(iter_rows(file.name))['duplicates_count'], 1)
+        finally:
+            os.unlink(file.name)
+
+        with self.assertRaises(ValueError):
+            list(iter_rows_stream(io.BytesIO(gzip.compress(data)[:-20])))
+
+    def test_invalid_data(self):
+        """Test broken captures raise ValueError."""
+        for data in (b'{"log": {"entries": [{"request": {}}', b'{"log": {}}', b'[1]',
+                     b'{"URL": "u", "Method": "GET"}\n'):
+            with self.assertRaises(ValueError):
+                list(iter_rows_stream(io.BytesIO(data)))
+
+
+if __name__ == '__main__':
+    unittest.main()
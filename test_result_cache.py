@@ -0,0 +1,57 @@
+"""
+Unit tests for the content-addressed result cache.
+"""
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from result_cache import ResultCache, hash_stream, result_key
+
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        """Create a directory for the disk tier."""
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the disk tier."""
+        shutil.rmtree(self.directory)
+
+    def test_key_depends_on_content_and_options(self):
+        """Test that keys change with content or options but not with option order."""
+        stream = io.BytesIO(b'URL,Method\n' * 1000)
+        digest = hash_stream(stream, chunk_size=7)
+        self.assertEqual(stream.tell(), 0)
+        self.assertEqual(digest, hash_stream(io.BytesIO(b'URL,Method\n' * 1000)))
+        self.assertEqual(result_key(digest, {"a": 1, "b": 2}), result_key(digest, {"b": 2, "a": 1}))
+        self.assertNotEqual(result_key(digest, {"a": 1}), result_key(digest, {"a": 2}))
+        self.assertNotEqual(result_key(digest, {"a": 1}), result_key(hash_stream(io.BytesIO(b'')), {"a": 1}))
+
+    def test_disk_tier_survives_restart(self):
+        """Test that results evicted from memory are served from disk, also by a new cache."""
+        cache = ResultCache(memory_entries=1, directory=self.directory)
+        cache.put('a', {"total_rows": 1})
+        cache.put('b', {"total_rows": 2})
+        self.assertEqual(cache.get('b'), ({"total_rows": 2}, 'memory'))
+        self.assertEqual(cache.get('a'), ({"total_rows": 1}, 'disk'))
+        self.assertEqual(cache.get('c'), (None, None))
+        self.assertEqual(ResultCache(directory=self.directory).get('b'), ({"total_rows": 2}, 'disk'))
+
+    def test_disk_size_cap(self):
+        """Test that least recently used results are evicted above the disk limit."""
+        cache = ResultCache(memory_entries=0, directory=self.directory, disk_limit=100)
+        for key in 'abc':
+            cache.put(key, {"rows": key * 30})
+            cache.get('a')
+        self.assertEqual(cache.get('b'), (None, None))
+        self.assertIsNotNone(cache.get('a')[0])
+        self.assertLessEqual(cache.stats()["disk"]["size"], 100)
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
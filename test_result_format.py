@@ -0,0 +1,80 @@
+"""
+Unit tests for NDJSON and paginated results.
+"""
+
+import json
+import unittest
+
+from model import analyze_rows
+from result_format import accepts_ndjson, iter_ndjson, paginate, shape_result
+
+
+class TestResultFormat(unittest.TestCase):
+
+    def setUp(self):
+        """Create results with three duplicate groups."""
+        self.result = {
+            "total_rows": 7,
+            "duplicates_count": 4,
+            "duplicates": {key: [{"URL": key}] * 2 for key in ('a', 'b', 'c')},
+            "statistics": {"codes": {"200": 7}, "methods": {"GET": 7}},
+            "duplicate_groups": 3
+        }
+
+    def test_ndjson_lines(self):
+        """Test that the summary comes first, then one line per group in order."""
+        lines = [json.loads(line) for line in iter_ndjson(self.result)]
+        self.assertEqual(lines[0]["type"], "summary")
+        self.assertEqual(lines[0]["total_rows"], 7)
+        self.assertNotIn("duplicates", lines[0])
+        self.assertEqual([line["key"] for line in lines[1:]], ['a', 'b', 'c'])
+        self.assertEqual(lines[1]["rows"], [{"URL": "a"}] * 2)
+
+    def test_pages_cover_all_groups(self):
+        """Test that following cursors returns every group once, in order."""
+        keys, cursor = [], None
+        while True:
+            page = paginate(self.result, 2, cursor)
+            self.assertEqual(page["total_rows"], 7)
+            keys.extend(page["duplicates"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        self.assertEqual(keys, ['a', 'b', 'c'])
+        self.assertEqual(len(self.result["duplicates"]), 3)
+
+    def test_invalid_page_arguments(self):
+        """Test that bad limits and cursors are rejected."""
+        with self.assertRaises(ValueError):
+            paginate(self.result, 0, None)
+        with self.assertRaises(ValueError):
+            paginate(self.result, 1, 'abc')
+
+    def test_compact_shape(self):
+        """Test that compact groups carry counts, request times and row numbers."""
+        rows = [
+            {'URL': url, 'Method': 'GET', 'Response Code': '200', 'Status': 'COMPLETE',
+             'Request Start Time': str(i), 'Duration (ms)': '5'}
+            for i, url in enumerate(['/a', '/b', '/a', '/a', '/b', '/c'])
+        ]
+        result = shape_result(analyze_rows(rows, row_numbers=True), compact=True)
+        self.assertNotIn("duplicates", result)
+        self.assertEqual(result["groups"][0], {
+            "key": "/a-GET-200-COMPLETE", "count": 3,
+            "first_request_time": "0", "last_request_time": "3", "row_numbers": [1, 3, 4]
+        })
+        self.assertEqual(result["groups"][1]["row_numbers"], [2, 5])
+
+        selected = shape_result(analyze_rows(rows, row_numbers=True), compact=True, fields=['Duration (ms)'])
+        self.assertEqual(selected["groups"][1]["rows"], [{'Duration (ms)': '5'}] * 2)
+        self.assertEqual(paginate(selected, 1, '1')["groups"], selected["groups"][1:])
+
+    def test_accept_header(self):
+        """Test NDJSON detection among accepted media types."""
+        self.assertTrue(accepts_ndjson('application/json, application/x-ndjson;q=0.9'))
+        self.assertFalse(accepts_ndjson('application/json'))
+        self.assertFalse(accepts_ndjson(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
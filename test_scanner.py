@@ -0,0 +1,59 @@
+"""
+Unit tests for the memory-mapped CSV scanner.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import scanner
+from model import iter_csv
+from scanner import iter_csv_mmap
+
+HEADER = 'URL,Status,Response Code,Protocol,Method,Content-Type,Exception,Request Start Time,Duration (ms)\r\n'
+
+ROWS = [
+    'https://a.com/x,COMPLETE,200,https,GET,text/html,,06 Jun 2025 07:05:08,21\r\n',
+    '\r\n',
+    '"https://a.com/x?a=1,2",COMPLETE,200,https,GET,text/html,,06 Jun 2025 07:05:08,21\r\n',
+    'https://a.com/y,EXCEPTION,,https,CONNECT,,"Handshake failed, ""unknown""",06 Jun 2025 07:05:09,3\r\n',
+    'https://a.com/z,COMPLETE,200,https,POST,,"line one\nline two",06 Jun 2025 07:05:10,4\r\n',
+    'https://a.com/x,COMPLETE,200,https,GET,text/html,,06 Jun 2025 07:05:11,"1,5"\r\n',
+    'https://a.com/short,COMPLETE,204\r\n',
+    'https://a.com/пример,COMPLETE,200,https,GET,,,06 Jun 2025 07:05:12,5'
+]
+
+
+class TestScanner(unittest.TestCase):
+
+    def write(self, text):
+        """Write a temporary CSV file removed after the test."""
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8', newline='') as file:
+            file.write(text)
+        self.addCleanup(os.unlink, file.name)
+        return file.name
+
+    def test_same_rows_as_iter_csv(self):
+        """Test quoted commas, quotes, newlines, blank and short lines match the csv module."""
+        path = self.write(HEADER + ''.join(ROWS))
+        for skip_header in (True, False):
+            expected = list(iter_csv(path, skip_header))
+            self.assertEqual(list(iter_csv_mmap(path, skip_header)), expected)
+            # Lines and quoted records split across scan blocks
+            with mock.patch.object(scanner, 'SCAN_BLOCK_SIZE', 7):
+                self.assertEqual(list(iter_csv_mmap(path, skip_header)), expected)
+        self.assertEqual(len(expected), 7)
+
+    def test_edge_files(self):
+        """Test empty files, header-only files and missing required fields."""
+        self.assertEqual(list(iter_csv_mmap(self.write(''))), [])
+        self.assertEqual(list(iter_csv_mmap(self.write(HEADER))), [])
+        with self.assertRaises(ValueError):
+            list(iter_csv_mmap(self.write('URL,Method\nu,GET\nu,GET\n')))
+        with self.assertRaises(ValueError):
+            list(iter_csv_mmap('/nonexistent/file.csv'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+Unit tests for the persistent signature index.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from model import DuplicateFinder, LogRow, _create_comparison_key
+from signature_index import SignatureIndex, indexed_result, parse_signature, signature
+
+COLUMNS = {'URL': 0, 'Status': 1, 'Response Code': 2, 'Method': 3}
+
+
+def make_rows(urls):
+    """Build GET rows for the URLs."""
+    return [LogRow((url, 'COMPLETE', '200', 'GET'), COLUMNS) for url in urls]
+
+
+class TestSignatureIndex(unittest.TestCase):
+
+    def setUp(self):
+        """Create an index in a temporary directory."""
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'index.db')
+        self.index = SignatureIndex(self.path, batch_size=2)
+
+    def tearDown(self):
+        """Close and remove the index."""
+        self.index.close()
+        shutil.rmtree(self.directory)
+
+    def test_upsert_and_lookup(self):
+        """Test that counts add up across batches and times keep the first and last run."""
+        first, second, missing = signature('a'), signature('b'), signature('c')
+        self.assertEqual(self.index.upsert([(first, 2), (second, 1), (first, 1)], seen=1000.0), 3)
+        self.index.upsert([(second, 4)], seen=2000.0)
+
+        found = self.index.lookup([first, second, missing])
+        self.assertNotIn(missing, found)
+        self.assertEqual(found[first]['count'], 3)
+        self.assertEqual(found[second]['count'], 5)
+        self.assertEqual(found[second]['first_seen'], '1970-01-01T00:16:40+00:00')
+        self.assertEqual(found[second]['last_seen'], '1970-01-01T00:33:20+00:00')
+        self.assertEqual(self.index.stats()['signatures'], 2)
+
+    def test_record_reports_earlier_runs_only(self):
+        """Test that history covers earlier runs and persists across connections."""
+        yesterday = DuplicateFinder().update(make_rows(['/a', '/a', '/b']))
+        history = indexed_result(yesterday, self.index)['history']
+        self.assertEqual((history['seen_before'], history['new'], history['groups']), (0, 2, {}))
+
+        # Keys of 'hash' mode results map to the same signatures as comparison keys
+        reopened = SignatureIndex(self.path)
+        today = DuplicateFinder(key_mode='hash').update(make_rows(['/a', '/a', '/b', '/c']))
+        result = indexed_result(today, reopened)
+        reopened.close()
+        history = result['history']
+        self.assertEqual((history['seen_before'], history['new']), (2, 1))
+        key, = result['duplicates']
+        self.assertEqual(history['groups'][key]['count'], 2)
+
+        comparison_key = _create_comparison_key(make_rows(['/a'])[0])
+        self.assertEqual(parse_signature(key), parse_signature(comparison_key))
+        self.assertEqual(self.index.lookup([signature(comparison_key)])[signature(comparison_key)]['count'], 4)
+
+    def test_request_times_and_modes(self):
+        """Test that seen times come from the rows and template keys are counted apart."""
+        columns = dict(COLUMNS, **{'Request Start Time': 4})
+        rows = [LogRow(('/a', 'COMPLETE', '200', 'GET', time), columns)
+                for time in ('29 May 2025 13:52:00', '29 May 2025 13:51:59', '')]
+        self.index.record(DuplicateFinder().update(rows), seen=0.0)
+        self.index.record(DuplicateFinder(template=True).update(rows[2:]), seen=1000.0)
+
+        comparison_key = _create_comparison_key(rows[0])
+        exact = signature(comparison_key)
+        template = signature(comparison_key, template=True)
+        self.assertNotEqual(exact, template)
+        self.assertEqual(parse_signature(comparison_key, template=True), template)
+        found = self.index.lookup([exact, template])
+        self.assertEqual(found[exact]['count'], 3)
+        self.assertEqual(found[exact]['first_seen'], '2025-05-29T13:51:59+00:00')
+        self.assertEqual(found[exact]['last_seen'], '2025-05-29T13:52:00+00:00')
+        # Rows without a usable time are recorded at the time of the run
+        self.assertEqual(found[template]['count'], 1)
+        self.assertEqual(found[template]['first_seen'], '1970-01-01T00:16:40+00:00')
+
+    def test_short_digests_use_full_keys(self):
+        """Test that 8-byte digest keys are recorded under full signatures."""
+        finder = DuplicateFinder(key_mode='hash', digest_size=8).update(make_rows(['/a', '/a']))
+        self.index.record(finder)
+        comparison_key = _create_comparison_key(make_rows(['/a'])[0])
+        self.assertIn(signature(comparison_key), self.index.lookup([signature(comparison_key)]))
+
+    def test_concurrent_records_see_each_other(self):
+        """Test that two connections recording the same requests at once report them as new only once."""
+        select = SignatureIndex._select
+
+        def slow_select(index, chunk, found):
+            # Widen the gap between lookup and upsert that a race would need
+            select(index, chunk, found)
+            time.sleep(0.2)
+
+        finder = DuplicateFinder().update(make_rows(['/a', '/b']))
+        other = SignatureIndex(self.path)
+        results = []
+        with mock.patch.object(SignatureIndex, '_select', slow_select):
+            threads = [threading.Thread(target=lambda index=index: results.append(index.record(finder)))
+                       for index in (self.index, other)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        other.close()
+        self.assertEqual(sorted(result['new'] for result in results), [0, 2])
+        self.assertEqual(self.index.stats()['requests'], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
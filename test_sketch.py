@@ -0,0 +1,81 @@
+"""
+Unit tests for approximate duplicate analysis.
+"""
+
+import os
+import random
+import unittest
+from unittest import mock
+
+import controller
+import sketch
+from sketch import CountMinSketch, SpaceSaving, HyperLogLog, approximate_duplicates, _hash_key
+
+
+class TestSketches(unittest.TestCase):
+
+    def setUp(self):
+        """Build a skewed stream: a few heavy keys and many unique ones."""
+        rng = random.Random(7)
+        self.keys = [f'heavy-{i}' for i in range(5) for _ in range(200 - i * 30)]
+        self.keys += [f'unique-{i}' for i in range(5000)]
+        rng.shuffle(self.keys)
+
+    def test_count_min_never_undercounts(self):
+        """Test that estimates are within the epsilon bound above true counts."""
+        sketch = CountMinSketch(width=512, depth=4)
+        for key in self.keys:
+            _, h1, h2 = _hash_key(key)
+            sketch.add(h1, h2)
+        for i in range(5):
+            _, h1, h2 = _hash_key(f'heavy-{i}')
+            estimate = sketch.estimate(h1, h2)
+            self.assertGreaterEqual(estimate, 200 - i * 30)
+            self.assertLessEqual(estimate, 200 - i * 30 + sketch.epsilon * sketch.total * 3)
+
+    def test_space_saving_finds_heavy_hitters(self):
+        """Test that the most frequent keys are reported in order."""
+        summary = SpaceSaving(capacity=100)
+        for key in self.keys:
+            summary.add(key.encode(), key)
+        top = [payload for _, _, _, payload in summary.top(5)]
+        self.assertEqual(top, [f'heavy-{i}' for i in range(5)])
+
+    def test_hyperloglog_estimate(self):
+        """Test distinct count estimate within a few standard errors."""
+        counter = HyperLogLog(precision=12)
+        for key in self.keys:
+            counter.add(_hash_key(key)[1])
+        distinct = 5005
+        self.assertLess(abs(counter.estimate() - distinct) / distinct, 4 * counter.relative_error)
+
+    def test_approximate_duplicates(self):
+        """Test heavy hitters and error bounds on rows."""
+        rows = [{'URL': f'http://example.com/{key}', 'Method': 'GET', 'Response Code': '200', 'Status': 'COMPLETE'}
+                for key in self.keys]
+        result = approximate_duplicates(rows, top=3)
+        self.assertEqual(result['total_rows'], len(rows))
+        self.assertEqual([hitter['row']['URL'] for hitter in result['heavy_hitters']],
+                         [f'http://example.com/heavy-{i}' for i in range(3)])
+        for hitter in result['heavy_hitters']:
+            self.assertLessEqual(hitter['count_lower_bound'], hitter['count'])
+        self.assertIn('count_overestimate', result['error_bounds'])
+        self.assertEqual(result['statistics']['methods'], {'GET': len(rows)})
+
+    def test_cli_sketch_sizes(self):
+        """Test sketch sizes given to the command line reach the sketches."""
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'res', 'requests_08_26_06.06.2025.csv')
+        with mock.patch('sketch.CountMinSketch', wraps=sketch.CountMinSketch) as count_min, \
+                mock.patch('sketch.HyperLogLog', wraps=sketch.HyperLogLog) as distinct, \
+                mock.patch('sketch.SpaceSaving', wraps=sketch.SpaceSaving) as summary, \
+                mock.patch('builtins.print'):
+            self.assertEqual(controller.main(path, approximate=True, sketch_width=64, sketch_depth=3,
+                                             hll_precision=6, sketch_capacity=32), 0)
+            self.assertEqual(controller.main([path, path], approximate=True, sketch_width=128), 0)
+        self.assertEqual(count_min.call_args_list, [mock.call(64, 3), mock.call(128, sketch.DEFAULT_DEPTH)])
+        self.assertEqual(distinct.call_args_list[0], mock.call(6))
+        self.assertEqual(summary.call_args_list[0], mock.call(32))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+Unit tests for URL template grouping.
+"""
+
+import pickle
+import unittest
+
+from model import DuplicateFinder, LogRow
+from external import analyze_external
+from templates import UrlTemplater, parse_pattern
+
+COLUMNS = {'URL': 0, 'Status': 1, 'Response Code': 2, 'Method': 3}
+
+
+def make_rows(urls):
+    """Build GET rows for URLs."""
+    return [LogRow((url, 'COMPLETE', '200', 'GET'), COLUMNS) for url in urls]
+
+
+class TestTemplates(unittest.TestCase):
+
+    def test_builtin_placeholders(self):
+        """Test whole ID segments are replaced while words and the query are kept."""
+        template = UrlTemplater().template
+        self.assertEqual(template('https://a.com/users/123/orders/9f8e7d6c5b4a'),
+                         'https://a.com/users/{id}/orders/{hex}')
+        self.assertEqual(template('https://a.com/s/123e4567-e89b-12d3-a456-426614174000?id=5'),
+                         'https://a.com/s/{uuid}?id=5')
+        self.assertEqual(template('https://a.com/v2/facade/abc123/x'), 'https://a.com/v2/facade/abc123/x')
+        self.assertEqual(template('https://a.com:8080'), 'https://a.com:8080')
+
+    def test_user_patterns(self):
+        """Test user patterns take precedence and invalid ones are rejected."""
+        templater = UrlTemplater(['sku=[A-Z]{3}-[0-9]+', '[a-z]+-[0-9]+'])
+        self.assertEqual(templater.template('https://a.com/p/ABC-12/slug-7/42'),
+                         'https://a.com/p/{sku}/{param}/{id}')
+        self.assertEqual(parse_pattern('x=[0-9]'), ('x', '[0-9]'))
+        for pattern in ('(', 'x=[0-9]*'):
+            with self.assertRaises(ValueError):
+                parse_pattern(pattern)
+
+    def test_groups_with_variants(self):
+        """Test rows of one template form a group with counts per concrete URL."""
+        urls = ['https://a.com/users/1?b=2&a=1', 'https://a.com/users/2?a=1&b=2', 'https://a.com/users/1?a=1&b=2',
+                'https://a.com/users/3']
+        result = DuplicateFinder(template=True).update(make_rows(urls)).result()
+        self.assertEqual(result['duplicates_count'], 2)
+        self.assertEqual(list(result['duplicates']), ['https://a.com/users/{id}?a=1&b=2-GET-200-COMPLETE'])
+        self.assertEqual(result['variants'], {'https://a.com/users/{id}?a=1&b=2-GET-200-COMPLETE': {
+            'https://a.com/users/1?a=1&b=2': 2,
+            'https://a.com/users/2?a=1&b=2': 1
+        }})
+        self.assertNotIn('variants', DuplicateFinder().update(make_rows(urls)).result())
+
+    def test_finders_pickle_and_spill(self):
+        """Test template mode survives pickling and matches results spilled to disk."""
+        urls = [f'https://a.com/items/{n % 7}/x/{n}' for n in range(200)]
+        finder = pickle.loads(pickle.dumps(DuplicateFinder(template=True, template_patterns=['x=x'])))
+        expected = finder.update(make_rows(urls)).result()
+        self.assertEqual(list(expected['duplicates']), ['https://a.com/items/{id}/{x}/{id}-GET-200-COMPLETE'])
+        spilled = analyze_external(make_rows(urls), 4096, template=True, template_patterns=['x=x'])
+        self.assertEqual(spilled['duplicates_count'], expected['duplicates_count'])
+        self.assertEqual(spilled['variants'], expected['variants'])
+
+
+if __name__ == '__main__':
+    unittest.main()
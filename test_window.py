@@ -0,0 +1,76 @@
+"""
+Unit tests for time-windowed duplicate detection.
+"""
+
+import unittest
+
+from model import LogRow
+from window import WindowedDuplicateFinder, analyze_window, parse_duration, parse_request_time
+
+COLUMNS = {'URL': 0, 'Status': 1, 'Response Code': 2, 'Method': 3, 'Request Start Time': 4}
+
+
+def make_rows(requests):
+    """Build POST rows from (url, second of 29 May 2025 13:51) pairs."""
+    return [LogRow((url, 'COMPLETE', '200', 'POST', f'29 May 2025 13:{51 + second // 60}:{second % 60:02d}'),
+                   COLUMNS)
+            for url, second in requests]
+
+
+class TestWindow(unittest.TestCase):
+
+    def test_parse_duration(self):
+        """Test window lengths with and without units."""
+        self.assertEqual(parse_duration('5s'), 5.0)
+        self.assertEqual(parse_duration('500ms'), 0.5)
+        self.assertEqual(parse_duration('2m'), 120.0)
+        self.assertEqual(parse_duration('3'), 3.0)
+        for value in ('0s', '-1s', '5 days', ''):
+            with self.assertRaises(ValueError):
+                parse_duration(value)
+
+    def test_parse_request_time(self):
+        """Test Charles and ISO 8601 times."""
+        self.assertEqual(parse_request_time('29 May 2025 13:51:59'), 1748526719.0)
+        self.assertEqual(parse_request_time('2025-05-29T13:51:59.250'), 1748526719.25)
+        self.assertEqual(parse_request_time('2025-05-29T16:51:59.250+03:00'), 1748526719.25)
+        for value in ('', '29 Foo 2025 13:51:59', 'yesterday'):
+            with self.assertRaises(ValueError):
+                parse_request_time(value)
+
+    def test_repeats_within_window_only(self):
+        """Test that retries are reported and identical requests far apart are not."""
+        rows = make_rows([('/log', 0), ('/poll', 1), ('/log', 3), ('/log', 4),
+                          ('/poll', 60), ('/log', 100), ('/log', 102)])
+        result = analyze_window(rows, 5, row_numbers=True)
+
+        self.assertEqual(result['total_rows'], 7)
+        self.assertEqual(result['duplicates_count'], 3)
+        self.assertEqual(result['window']['bursts'], 2)
+        key, = result['duplicates']
+        self.assertTrue(key.startswith('/log'))
+        self.assertEqual(result['row_numbers'][key], [1, 3, 4, 6, 7])
+        self.assertEqual(result['statistics']['methods'], {'POST': 7})
+
+    def test_state_bounded_by_window(self):
+        """Test that expired keys are dropped, so tracked keys depend on the window only."""
+        finder = WindowedDuplicateFinder(2)
+        finder.update(make_rows([(f'/unique/{second}', second) for second in range(300)]))
+        self.assertLessEqual(finder.peak_keys, 4)
+        self.assertEqual(finder.result()['duplicate_groups'], 0)
+
+    def test_missing_time(self):
+        """Test that rows without a usable Request Start Time are skipped and counted."""
+        rows = make_rows([('/log', 0), ('/log', 2)])
+        rows.insert(1, LogRow(('/log', 'FAILED', '', 'POST', ''), COLUMNS))
+        rows.append(LogRow(('/log', 'COMPLETE', '200', 'POST', 'not a time'), COLUMNS))
+        result = analyze_window(rows, 5, row_numbers=True)
+
+        self.assertEqual(result['window']['skipped_rows'], 2)
+        self.assertEqual(result['total_rows'], 4)
+        self.assertEqual(result['duplicates_count'], 1)
+        self.assertEqual(list(result['row_numbers'].values()), [[1, 3]])
+
+
+if __name__ == '__main__':
+    unittest.main()
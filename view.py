@@ -1,9 +1,10 @@
 """Module for displaying results in console."""
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 
 
-def print_results(total: int, duplicates_count: int, duplicates: Dict[str, List[Dict[str, Any]]], stats: Dict[str, Dict[str, int]]) -> None:
+def print_results(total: int, duplicates_count: int, duplicates: Dict[str, List[Dict[str, Any]]], stats: Dict[str, Dict[str, int]],
+                  extra_column: Optional[str] = None) -> None:
     """
     Print processing results, including duplicates.
     
@@ -12,6 +13,7 @@ def print_results(total: int, duplicates_count: int, duplicates: Dict[str, List[
         duplicates_count (int): Number of duplicates found
         duplicates (Dict[str, List[Dict[str, Any]]]): Dictionary with duplicate entries
         stats (Dict[str, Dict[str, int]]): Dictionary with statistics
+        extra_column (Optional[str]): Column printed after the URL, e.g. the source file
     """
     # Colors for light background for better readability
     reset = '\033[0m'
@@ -39,7 +41,8 @@ def print_results(total: int, duplicates_count: int, duplicates: Dict[str, List[
 
     if duplicates:
         print(f"\n{overall_color}Duplicate rows:{reset}")
-        print(f"{'Response code':<15} | {'Start time':<25} | {'Method':<7} | {'URL':<150} |")
+        extra_header = f" {extra_column} |" if extra_column else ""
+        print(f"{'Response code':<15} | {'Start time':<25} | {'Method':<7} | {'URL':<150} |{extra_header}")
 
         groups = list(duplicates.keys())
         for group_index, key in enumerate(groups):
@@ -54,14 +57,212 @@ def print_results(total: int, duplicates_count: int, duplicates: Dict[str, List[
                         color = error_5xx_color
                 
                 # Apply color to row
+                extra = f"{row.get(extra_column, '')} | " if extra_column else ""
                 print(f"{color}"
                       f"{row['Response Code']:<15} | "
                       f"{row.get('Request Start Time', '')[:25]:<25} | "
                       f"{row['Method']:<7} | "
                       f"{row['URL']:<150} | "
+                      f"{extra}"
                       f"{reset}")
 
 
+def print_batch_results(result: Dict[str, Any], source_column: str) -> None:
+    """
+    Print per-file summaries followed by duplicates across all files.
+    
+    Args:
+        result (Dict[str, Any]): Result of batch.analyze_files
+        source_column (str): Column holding the source file of a row
+    """
+    reset = '\033[0m'
+    header_color = '\033[94m'
+
+    print(f"\n{header_color}Files:{reset}")
+    print(f"{'Rows':>10} | {'Duplicates':>10} | {'Groups':>8} | File")
+    for source, file_result in result['files'].items():
+        print(f"{file_result['total_rows']:>10} | "
+              f"{file_result['duplicates_count']:>10} | "
+              f"{file_result['duplicate_groups']:>8} | "
+              f"{source}")
+
+    merged = result['merged']
+    print(f"\n{header_color}All files:{reset} {merged['duplicate_groups']} duplicate groups, "
+          f"{result['cross_file_groups']} of them span several files")
+    print_results(merged['total_rows'], merged['duplicates_count'],
+                  merged['duplicates'], merged['statistics'], extra_column=source_column)
+
+
+def print_variants(variants: Dict[str, Dict[str, int]]) -> None:
+    """
+    Print URL templates with counts of their concrete URLs.
+    
+    Args:
+        variants (Dict[str, Dict[str, int]]): Count per URL of every template group
+    """
+    reset = '\033[0m'
+    header_color = '\033[94m'
+
+    print(f"\n{header_color}URL templates:{reset}")
+    for key, counts in variants.items():
+        print(f"{sum(counts.values()):>6}x {key} ({len(counts)} variants)")
+        for url, count in sorted(counts.items(), key=lambda item: -item[1]):
+            print(f"{count:>13}x {url}")
+
+
+def print_metrics(metrics: Dict[str, Any]) -> None:
+    """
+    Print time and bytes wasted by duplicate requests and their latency percentiles.
+    
+    Args:
+        metrics (Dict[str, Any]): Result of metrics.duplicate_metrics
+    """
+    reset = '\033[0m'
+    header_color = '\033[94m'
+
+    def latency(summary: Dict[str, Any]) -> str:
+        return " / ".join('-' if value is None else f"{value:.10g}" for value in summary['latency_ms'].values())
+
+    overall = metrics['overall']
+    print(f"\n{header_color}Cost of duplicates:{reset} {overall['wasted_duration_ms']:.10g} ms and "
+          f"{overall['wasted_bytes']} bytes wasted, latency p50 / p95 / p99: {latency(overall)} ms")
+    print(f"{'Requests':>8} | {'Wasted (ms)':>12} | {'Wasted bytes':>12} | {'Latency p50 / p95 / p99 (ms)':<30} | Key")
+    groups = sorted(metrics['groups'].items(), key=lambda item: -item[1]['wasted_duration_ms'])
+    for key, summary in groups:
+        print(f"{summary['requests']:>8} | "
+              f"{summary['wasted_duration_ms']:>12.10g} | "
+              f"{summary['wasted_bytes']:>12} | "
+              f"{latency(summary):<30} | "
+              f"{key}")
+
+
+def print_profile(profile: Dict[str, Any]) -> None:
+    """
+    Print time per stage, throughput and peak memory of a run.
+    
+    Args:
+        profile (Dict[str, Any]): Result of instrumentation.RunProfile.to_dict
+    """
+    reset = '\033[0m'
+    header_color = '\033[94m'
+    seconds = profile['seconds']
+
+    print(f"\n{header_color}Profile:{reset} {seconds:.3f} s")
+    print(f"{'Stage':<10} | {'Seconds':>9} | {'Share':>6}")
+    for name, stage_seconds in sorted(profile['stages'].items(), key=lambda item: -item[1]):
+        print(f"{name:<10} | {stage_seconds:>9.3f} | {stage_seconds / seconds if seconds else 0:>6.1%}")
+    rate = f", {profile['rows'] / seconds:,.0f} rows/s, {profile['bytes'] / seconds / 1e6:.1f} MB/s" if seconds else ''
+    print(f"Rows: {profile['rows']}, bytes: {profile['bytes']}{rate}")
+    if profile['peak_memory_bytes'] is not None:
+        print(f"Peak memory: {profile['peak_memory_bytes'] / 2 ** 20:.1f} MiB")
+
+
+def print_window_stats(window: Dict[str, Any]) -> None:
+    """
+    Print window length and bursts of requests repeated within it.
+    
+    Args:
+        window (Dict[str, Any]): 'window' part of window.WindowedDuplicateFinder.result
+    """
+    reset = '\033[0m'
+    header_color = '\033[94m'
+
+    print(f"\n{header_color}Window:{reset} {window['seconds']:g}s, "
+          f"{window['bursts']} bursts of repeated requests, "
+          f"at most {window['peak_tracked_keys']} requests tracked at once")
+    if window['skipped_rows']:
+        print(f"{window['skipped_rows']} rows without a usable Request Start Time were skipped")
+
+
+def print_history(history: Dict[str, Any]) -> None:
+    """
+    Print how many requests were seen in earlier runs and the history of duplicate groups.
+    
+    Args:
+        history (Dict[str, Any]): History from SignatureIndex.record
+    """
+    reset = '\033[0m'
+    header_color = '\033[94m'
+
+    print(f"\n{header_color}Signature index:{reset} {history['seen_before']} distinct requests seen in earlier runs, "
+          f"{history['new']} new")
+    if history['groups']:
+        print(f"{'Seen before':>11} | {'First seen':<25} | {'Last seen':<25} | Key")
+        for key, seen in history['groups'].items():
+            print(f"{seen['count']:>11} | "
+                  f"{seen['first_seen'][:25]:<25} | "
+                  f"{seen['last_seen'][:25]:<25} | "
+                  f"{key}")
+
+
+def print_approximate_results(result: Dict[str, Any]) -> None:
+    """
+    Print approximate analysis results with their error bounds.
+    
+    Args:
+        result (Dict[str, Any]): Result of sketch.approximate_duplicates
+    """
+    reset = '\033[0m'
+    header_color = '\033[94m'
+    bounds = result['error_bounds']
+
+    print(f"\n{header_color}Approximate processing statistics:{reset}")
+    print(f"Processed rows: {result['total_rows']}")
+    print(f"Distinct requests (estimate): {result['distinct_estimate']} "
+          f"(\u00b1{bounds['distinct_relative_std_error']:.2%})")
+    print(f"Duplicates found (estimate): {result['duplicates_count_estimate']} "
+          f"(\u00b1{bounds['duplicates_count_std_error']})")
+    print(f"Counts overestimate by at most {bounds['count_overestimate']} "
+          f"with probability {bounds['count_confidence']:.2%}")
+
+    if result['heavy_hitters']:
+        print(f"\n{header_color}Most repeated requests:{reset}")
+        print(f"{'Count':<15} | {'Response code':<15} | {'Method':<7} | {'URL':<150} |")
+        for hitter in result['heavy_hitters']:
+            row = hitter['row']
+            count = f"{hitter['count_lower_bound']}..{hitter['count']}"
+            print(f"{count:<15} | "
+                  f"{row['Response Code']:<15} | "
+                  f"{row['Method']:<7} | "
+                  f"{row['URL']:<150} |")
+
+
+def print_group_updates(updates: List[Tuple[str, List[Dict[str, Any]]]]) -> None:
+    """
+    Print duplicate groups that appeared or grew while following a log.
+    
+    Args:
+        updates (List[Tuple[str, List[Dict[str, Any]]]]): Key and rows of every changed group
+    """
+    reset = '\033[0m'
+    new_color = '\033[91m'
+    grown_color = '\033[93m'
+
+    for _, rows in updates:
+        # The latest row is the one that made the group appear or grow
+        row = rows[-1]
+        color = new_color if len(rows) == 2 else grown_color
+        print(f"{color}{len(rows):>6}x{reset} | "
+              f"{row['Response Code']:<15} | "
+              f"{row.get('Request Start Time', '')[:25]:<25} | "
+              f"{row['Method']:<7} | "
+              f"{row['URL']}")
+
+
+def print_follow_summary(result: Dict[str, Any]) -> None:
+    """
+    Print totals and statistics of a followed log.
+    
+    Args:
+        result (Dict[str, Any]): Processing results, see DuplicateFinder.result
+    """
+    print(f"\nProcessed rows: {result['total_rows']}")
+    print(f"Duplicates found: {result['duplicates_count']} in {result['duplicate_groups']} groups")
+    stats = result['statistics']
+    print("Response codes: " + ", ".join(f"{code}: {count}" for code, count in sorted(stats['codes'].items())))
+    print("Methods: " + ", ".join(f"{method}: {count}" for method, count in sorted(stats['methods'].items())))
+
+
 def print_no_duplicates() -> None:
     """Print message that no duplicates were found."""
     print("\033[92mNo duplicates found\033[0m")
\ No newline at end of file
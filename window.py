@@ -0,0 +1,248 @@
+"""Duplicate detection limited to requests repeated within a time window."""
+
+import calendar
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Any, Deque, Iterable, List, Mapping, Tuple
+
+from model import DuplicateFinder
+
+# Column holding the time a request was sent
+TIME_FIELD: str = 'Request Start Time'
+
+_DURATION_RE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*(ms|s|m|h)?\s*$', re.IGNORECASE)
+_DURATION_UNITS = {'ms': 0.001, 's': 1.0, 'm': 60.0, 'h': 3600.0}
+
+# Charles CSV exports times as '29 May 2025 13:51:59', HAR and JSON sessions as ISO 8601
+_TIME_RE = re.compile(
+    r'^\s*(?:(\d{1,2}) ([A-Za-z]{3}) (\d{4})|(\d{4})-(\d{2})-(\d{2}))[ T]'
+    r'(\d{1,2}):(\d{2}):(\d{2})(?:[.,](\d+))?\s*(Z|[+-]\d{2}:?\d{2})?\s*$'
+)
+_MONTHS = {name: number for number, name in enumerate(
+    ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'), 1)}
+
+
+def parse_duration(value: str) -> float:
+    """
+    Parse a window length such as '5s', '500ms' or '2m' into seconds.
+
+    Args:
+        value (str): Duration with optional ms, s, m or h suffix, seconds by default
+
+    Returns:
+        float: Duration in seconds
+
+    Raises:
+        ValueError: If value is not a valid positive duration
+    """
+    match = _DURATION_RE.match(value)
+    if not match:
+        raise ValueError(f"Invalid duration: {value}")
+    seconds = float(match.group(1)) * _DURATION_UNITS[(match.group(2) or 's').lower()]
+    if seconds <= 0:
+        raise ValueError(f"Invalid duration: {value}")
+    return seconds
+
+
+@lru_cache(maxsize=4096)
+def parse_request_time(value: str) -> float:
+    """
+    Parse a request time into seconds since the epoch.
+
+    Times without a UTC offset, such as those of Charles CSV exports, are
+    taken as UTC.
+
+    Rows of a capture share few distinct time strings, so results are cached.
+
+    Args:
+        value (str): Time such as '29 May 2025 13:51:59' or '2025-05-29T13:51:59.250+03:00'
+
+    Returns:
+        float: Seconds since the epoch
+
+    Raises:
+        ValueError: If value is not a supported time
+    """
+    match = _TIME_RE.match(value)
+    if not match:
+        raise ValueError(f"Invalid {TIME_FIELD}: {value!r}")
+    day, month_name, year, iso_year, iso_month, iso_day, hour, minute, second, fraction, zone = match.groups()
+    if day is not None:
+        month = _MONTHS.get(month_name.lower())
+        if month is None:
+            raise ValueError(f"Invalid {TIME_FIELD}: {value!r}")
+        date = (int(year), month, int(day))
+    else:
+        date = (int(iso_year), int(iso_month), int(iso_day))
+    seconds = calendar.timegm(date + (int(hour), int(minute), int(second), 0, 0, 0))
+    if fraction:
+        seconds += float('0.' + fraction)
+    if zone and zone != 'Z':
+        offset = int(zone[1:3]) * 3600 + int(zone[-2:]) * 60
+        seconds -= offset if zone[0] == '+' else -offset
+    return float(seconds)
+
+
+class WindowedDuplicateFinder:
+    """
+    Single-pass detector of requests repeated within a time window.
+
+    A burst is a run of rows with the same key, each sent at most window
+    seconds after the previous one. Only keys seen within the last window
+    seconds are tracked: a queue of recent rows in arrival order expires keys
+    as time moves on, so memory depends on the traffic of one window rather
+    than on the whole capture. Rows are expected roughly in order of time;
+    an out of order row joins the open burst of its key if it is within the
+    window of the burst's latest row.
+
+    Bursts of two or more rows are reported as duplicate groups. All bursts
+    of a key form one group, in order of first occurrence.
+
+    Rows without a usable Request Start Time, such as some rows Charles
+    writes for failed requests, are counted in totals and statistics but
+    cannot join a burst; they are skipped and counted in skipped_rows.
+    """
+
+    def __init__(self, window: float, **options: Any) -> None:
+        """
+        Create an empty finder.
+
+        Args:
+            window (float): Window length in seconds
+            **options: Key options passed to DuplicateFinder
+
+        Raises:
+            ValueError: If window is not positive or key options are not supported
+        """
+        if window <= 0:
+            raise ValueError("Window must be positive")
+        self.window = window
+        self.bursts = 0
+        self.duplicates = 0
+        self.peak_keys = 0
+        self.skipped_rows = 0
+        self._finder = DuplicateFinder(**options)
+        self._now = float('-inf')
+        # Times and keys of rows of the last window, in arrival order
+        self._recent: Deque[Tuple[float, Any]] = deque()
+        # Key -> latest time, rows and row numbers of its open burst
+        self._open: Dict[Any, Tuple[List[float], List[Mapping[str, Any]], List[int]]] = {}
+        # Key -> row number of its first reported row
+        self._first: Dict[Any, int] = {}
+
+    def add(self, row: Mapping[str, Any]) -> None:
+        """
+        Add a single row.
+
+        Args:
+            row (Mapping[str, Any]): Row data, e.g. LogRow
+        """
+        finder = self._finder
+        number = finder.count(row)
+
+        try:
+            time = parse_request_time(row.get(TIME_FIELD) or '')
+        except ValueError:
+            self.skipped_rows += 1
+            return
+        key = finder.key(row)
+        if time > self._now:
+            self._now = time
+            self._expire(time - self.window)
+
+        burst = self._open.get(key)
+        if burst is not None and abs(time - burst[0][0]) <= self.window:
+            latest, rows, numbers = burst
+            latest[0] = max(latest[0], time)
+            rows.append(row)
+            numbers.append(number)
+        else:
+            if burst is not None:
+                self._close(key, burst)
+            self._open[key] = ([time], [row], [number])
+        self._recent.append((time, key))
+        if len(self._open) > self.peak_keys:
+            self.peak_keys = len(self._open)
+
+    def update(self, rows: Iterable[Mapping[str, Any]]) -> 'WindowedDuplicateFinder':
+        """
+        Add rows from any iterable, e.g. a lazy CSV reader.
+
+        Args:
+            rows (Iterable[Mapping[str, Any]]): Rows to add
+
+        Returns:
+            WindowedDuplicateFinder: self, to allow chaining
+        """
+        add = self.add
+        for row in rows:
+            add(row)
+        return self
+
+    def _expire(self, horizon: float) -> None:
+        """Close bursts whose latest row is older than horizon."""
+        recent = self._recent
+        while recent and recent[0][0] < horizon:
+            _, key = recent.popleft()
+            burst = self._open.get(key)
+            if burst is not None and burst[0][0] < horizon:
+                del self._open[key]
+                self._close(key, burst)
+
+    def _close(self, key: Any, burst: Tuple[List[float], List[Mapping[str, Any]], List[int]]) -> None:
+        """Report a finished burst if it repeated."""
+        _, rows, numbers = burst
+        if len(rows) < 2:
+            return
+        self.bursts += 1
+        self.duplicates += len(rows) - 1
+        self._first.setdefault(key, numbers[0])
+        add_keyed = self._finder.add_keyed
+        for row, number in zip(rows, numbers):
+            add_keyed(key, row, number)
+
+    def result(self) -> Dict[str, Any]:
+        """
+        Close open bursts and get results; call after all rows are added.
+
+        Returns:
+            Dict[str, Any]: Processing results like DuplicateFinder.result, where
+            duplicates_count counts rows repeating a request within the window,
+            plus 'window' with the window length, number of bursts, the
+            largest number of keys tracked at once and the number of rows
+            skipped for lack of a usable Request Start Time
+        """
+        for key, burst in self._open.items():
+            self._close(key, burst)
+        self._open.clear()
+        self._recent.clear()
+
+        # Bursts close in order of expiry, report groups by first occurrence
+        finder = self._finder
+        finder.sort_groups(self._first.__getitem__)
+
+        result = finder.result()
+        result["duplicates_count"] = self.duplicates
+        result["window"] = {
+            "seconds": self.window,
+            "bursts": self.bursts,
+            "peak_tracked_keys": self.peak_keys,
+            "skipped_rows": self.skipped_rows
+        }
+        return result
+
+
+def analyze_window(rows: Iterable[Mapping[str, Any]], window: float, **options: Any) -> Dict[str, Any]:
+    """
+    Find requests repeated within a time window in a single pass over rows.
+
+    Args:
+        rows (Iterable[Mapping[str, Any]]): Rows to analyze, e.g. from iter_csv
+        window (float): Window length in seconds
+        **options: Key options passed to DuplicateFinder
+
+    Returns:
+        Dict[str, Any]: Processing results, see WindowedDuplicateFinder.result
+    """
+    return WindowedDuplicateFinder(window, **options).update(rows).result()